@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for bulk post-approval processing
+Builds a ledger of N paid payments, times process_post_approval_tasks
+called for --single of them one at a time, then process_paid_payments for
+the rest. Checks that every payment got exactly one accounting entry and
+is marked completed, and that a second batch finds nothing to do.
+
+Then interrupts a batch partway through (SIGINT in a child process),
+resumes it and checks that no payment was posted to the ledger twice.
+
+Usage: python benchmark_bulk_post_approval.py [--payments N] [--single N] [--workers N]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+import signal
+import tempfile
+import time
+
+from post_approval_processor import PostApprovalProcessor
+from subscription_payment import SubscriptionPaymentSystem
+
+
+def paid_ledger(count):
+    """A payment system with `count` paid payments, in the working directory"""
+    system = SubscriptionPaymentSystem()
+    now = str(datetime.datetime.now())
+    system.store.insert_many([{
+        "amount": 250.0,
+        "vendor": f"Vendor {i % 50}",
+        "description": "Annual software subscription license",
+        "requester": "John Doe",
+        "status": "paid",
+        "submitted_date": now,
+        "approver": "Jane Smith",
+        "approved_date": now,
+        "processed_date": now
+    } for i in range(count)])
+    system.store.close()
+    return SubscriptionPaymentSystem()
+
+
+def check(system):
+    """{check name: passed} for a fully processed ledger"""
+    with open("accounting_ledger.json", 'r') as f:
+        posted = [entry["payment_id"] for entry in json.load(f)]
+    paid = [p["id"] for p in system.store.with_status("paid")]
+    return {
+        "one ledger entry per payment": sorted(posted) == sorted(paid),
+        "every payment marked completed": all(p.get("post_approval") == "completed"
+                                              for p in system.store.with_status("paid")),
+    }
+
+
+def run_batch(workers):
+    system = SubscriptionPaymentSystem()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.suppress(KeyboardInterrupt):
+            PostApprovalProcessor(system).process_paid_payments(max_workers=workers,
+                                                                checkpoint_every=100)
+    finally:
+        system.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payments", type=int, default=10000)
+    parser.add_argument("--single", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # Receipts and the ledgers are written to the working directory
+        try:
+            system = paid_ledger(args.payments)
+            processor = PostApprovalProcessor(system)
+            print(f"{args.payments} paid payments, {args.workers} workers")
+            print(f"{'':<28} {'payments':>9} {'seconds':>9} {'per second':>11}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for payment_id in range(1, args.single + 1):
+                    processor.process_post_approval_tasks(payment_id)
+                single = time.perf_counter() - start
+            print(f"{'one at a time':<28} {args.single:>9} {single:>9.2f} {args.single / single:>11.0f}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                summary = processor.process_paid_payments(max_workers=args.workers)
+                batch = time.perf_counter() - start
+                again = processor.process_paid_payments(max_workers=args.workers)
+            print(f"{'process_paid_payments':<28} {summary['processed']:>9} {batch:>9.2f} "
+                  f"{summary['processed'] / batch:>11.0f}")
+
+            checks = check(system)
+            checks["all payments processed"] = summary["processed"] == args.payments - args.single
+            checks["second batch finds nothing"] = again["processed"] == 0
+        finally:
+            system.store.close()
+            os.chdir(cwd)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            paid_ledger(args.payments).store.close()
+            child = multiprocessing.Process(target=run_batch, args=(args.workers,))
+            child.start()
+            time.sleep(batch / 3)
+            os.kill(child.pid, signal.SIGINT)
+            child.join()
+
+            system = SubscriptionPaymentSystem()
+            before = len(PostApprovalProcessor(system).awaiting_post_approval())
+            system.store.close()
+            run_batch(args.workers)
+            system = SubscriptionPaymentSystem()
+            print(f"\ninterrupted after {batch / 3:.2f} s with {args.payments - before} payments "
+                  f"checkpointed; resumed with {before}")
+            checks.update({f"after resume: {name}": ok for name, ok in check(system).items()})
+            checks["interrupted partway"] = 0 < before < args.payments
+        finally:
+            system.store.close()
+            os.chdir(cwd)
+
+    for name, ok in checks.items():
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the payment store
+Times approve_payment and list_pending_payments on a ledger of N payments,
+against the old approach (linear scan, whole payment_log.json rewritten on
+every change). Then submits and approves a month-end batch one at a time
+and through submit_payment_requests/approve_payments, with the payment
+processor taking --processor-latency seconds per payment.
+
+Usage: python benchmark_payment_store.py [--payments N] [--approvals N]
+                                         [--batch N] [--processor-latency SECONDS]
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from subscription_payment import SubscriptionPaymentSystem
+
+LEGACY_APPROVALS = 3  # Each one rewrites the whole ledger twice
+
+
+class SlowProcessorSystem(SubscriptionPaymentSystem):
+    """Payment processor calls take `latency` seconds"""
+
+    latency = 0.0
+
+    def charge_payment(self, payment):
+        time.sleep(self.latency)
+
+
+class LegacyLedger:
+    """The old storage: one list, scanned for every lookup, saved whole on every change"""
+
+    def __init__(self, log_file):
+        self.log_file = log_file
+        with open(log_file, 'r') as f:
+            self.payments = json.load(f)
+
+    def _save_payments(self):
+        with open(self.log_file, 'w') as f:
+            json.dump(self.payments, f, indent=2, default=str)
+
+    def approve_payment(self, payment_id, approver):
+        for payment in self.payments:
+            if payment["id"] == payment_id and payment["status"] == "pending":
+                payment["status"] = "approved"
+                payment["approver"] = approver
+                payment["approved_date"] = datetime.datetime.now()
+                self._save_payments()
+                payment["processed_date"] = datetime.datetime.now()
+                payment["status"] = "paid"
+                self._save_payments()
+                return payment
+        return None
+
+    def list_pending_payments(self):
+        return [p for p in self.payments if p["status"] == "pending"]
+
+
+def write_ledger(log_file, count):
+    now = str(datetime.datetime.now())
+    payments = [{
+        "id": i,
+        "amount": 250.0,
+        "vendor": f"Vendor {i % 50}",
+        "description": "Annual software subscription license",
+        "requester": "John Doe",
+        "status": "pending" if i % 10 == 0 else "paid",
+        "submitted_date": now,
+        "approver": None,
+        "approved_date": None
+    } for i in range(1, count + 1)]
+    with open(log_file, 'w') as f:
+        json.dump(payments, f, indent=2)
+    return [p["id"] for p in payments if p["status"] == "pending"]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<28} {statistics.median(samples):>9.3f} {p99:>9.3f} {samples[-1]:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--approvals", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--processor-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, "payment_log.json")
+        pending = write_ledger(log_file, args.payments)
+        random.shuffle(pending)
+        print(f"{args.payments} payments, {len(pending)} pending")
+        print(f"{'ms per call':<28} {'median':>9} {'p99':>9} {'max':>9}")
+
+        legacy = LegacyLedger(log_file)
+        report("old approve_payment", [timed(legacy.approve_payment, payment_id, "Jane Smith")
+                                       for payment_id in pending[:LEGACY_APPROVALS]])
+        report("old list_pending_payments", [timed(legacy.list_pending_payments) for _ in range(20)])
+
+        write_ledger(log_file, args.payments)
+        start = time.perf_counter()
+        system = SubscriptionPaymentSystem(log_file)
+        print(f"{'store load':<28} {(time.perf_counter() - start) * 1000:>9.1f}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            approvals = [timed(system.approve_payment, payment_id, "Jane Smith")
+                         for payment_id in pending[:args.approvals]]
+        report("approve_payment", approvals)
+        report("list_pending_payments", [timed(system.list_pending_payments) for _ in range(20)])
+        report("view_payment_details", [timed(system.view_payment_details, payment_id)
+                                        for payment_id in pending[:1000]])
+        system.store.close()
+
+        reloaded = SubscriptionPaymentSystem(log_file)
+        assert len(reloaded.list_pending_payments()) == len(pending) - args.approvals
+        assert reloaded.view_payment_details(pending[0])["status"] == "paid"
+        reloaded.store.close()
+
+        SlowProcessorSystem.latency = args.processor_latency
+        system = SlowProcessorSystem(log_file)
+        requests = [{"amount": 250.0, "vendor": f"Vendor {i}", "description": "Subscription",
+                     "requester": "John Doe"} for i in range(args.batch)]
+        print(f"\nbatch of {args.batch}, processor latency {args.processor_latency * 1000:.0f} ms")
+        print(f"{'seconds':<28} {'one by one':>10} {'batch':>9}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            single = [system.submit_payment_request(**request)["id"] for request in requests]
+            submit_single = time.perf_counter() - start
+            start = time.perf_counter()
+            batch = [outcome["payment"]["id"] for outcome in system.submit_payment_requests(requests)]
+            submit_batch = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for payment_id in single:
+                system.approve_payment(payment_id, "Jane Smith")
+            approve_single = time.perf_counter() - start
+            start = time.perf_counter()
+            outcomes = system.approve_payments(batch, "Jane Smith")
+            approve_batch = time.perf_counter() - start
+        assert all(outcome["success"] for outcome in outcomes)
+        system.store.close()
+        print(f"{'submit':<28} {submit_single:>10.3f} {submit_batch:>9.3f}")
+        print(f"{'approve + process':<28} {approve_single:>10.3f} {approve_batch:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
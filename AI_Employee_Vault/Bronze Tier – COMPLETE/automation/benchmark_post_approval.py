@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark for post-approval processing
+Gives each post-approval task a simulated remote-call latency and times
+process_post_approval_tasks against the old sequential order (the four
+tasks called one after another). Then checks the retry and timeout
+handling: a vendor notification that fails on its first attempt, and one
+that hangs on its first attempt past the step timeout.
+
+Usage: python benchmark_post_approval.py [--payments N] [--latency SECONDS]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from post_approval_processor import PostApprovalProcessor
+from subscription_payment import SubscriptionPaymentSystem
+
+# Seconds each task spends waiting on its remote system, as multiples of --latency
+LATENCY = {
+    "notify_vendor": 1.0,
+    "generate_receipt": 0.5,
+    "update_accounting_system": 1.5,
+    "send_internal_notification": 1.0,
+}
+
+
+class SlowPostApprovalProcessor(PostApprovalProcessor):
+    """Each task waits `latency * LATENCY[task]` seconds; `faults` makes first attempts misbehave"""
+
+    latency = 0.0
+    faults = {}  # task name -> "fail" | "hang", for its first attempt only
+
+    def __init__(self, *args, **kwargs):
+        self.attempts = {}
+        super().__init__(*args, **kwargs)
+
+    def _remote(self, task):
+        self.attempts[task] = self.attempts.get(task, 0) + 1
+        fault = self.faults.get(task) if self.attempts[task] == 1 else None
+        time.sleep(self.latency * LATENCY[task] * (10 if fault == "hang" else 1))
+        return fault != "fail"
+
+    def notify_vendor(self, payment, log=None):
+        return self._remote("notify_vendor") and super().notify_vendor(payment, log)
+
+    def generate_receipt(self, payment, log=None):
+        return self._remote("generate_receipt") and super().generate_receipt(payment, log)
+
+    def update_accounting_system(self, payment, log=None, ledger=None):
+        return self._remote("update_accounting_system") and \
+            super().update_accounting_system(payment, log, ledger)
+
+    def send_internal_notification(self, payment, log=None, receipt_file=None):
+        return self._remote("send_internal_notification") and \
+            super().send_internal_notification(payment, log, receipt_file)
+
+
+def sequential(processor, payment_id):
+    """The old process_post_approval_tasks: one task after another, the log saved after each"""
+    payment = processor.payment_system.view_payment_details(payment_id)
+    processor.notify_vendor(payment)
+    processor.generate_receipt(payment)
+    processor.update_accounting_system(payment)
+    processor.send_internal_notification(payment)
+
+
+def paid_payments(system, count):
+    requests = [{"amount": 250.0, "vendor": f"Vendor {i}", "description": "Subscription",
+                 "requester": "John Doe"} for i in range(count)]
+    ids = [outcome["payment"]["id"] for outcome in system.submit_payment_requests(requests)]
+    system.approve_payments(ids, "Jane Smith")
+    return ids
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payments", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)  # Receipts and the accounting ledger are written to the working directory
+        try:
+            system = SubscriptionPaymentSystem()
+            SlowPostApprovalProcessor.latency = args.latency
+            with contextlib.redirect_stdout(io.StringIO()):
+                ids = paid_payments(system, 2 * args.payments)
+                processor = SlowPostApprovalProcessor(system, step_timeout=args.latency * 5)
+                old = [timed(sequential, processor, payment_id) for payment_id in ids[:args.payments]]
+                new = [timed(processor.process_post_approval_tasks, payment_id)
+                       for payment_id in ids[args.payments:]]
+            slowest = max(LATENCY.values()) * args.latency
+            chain = (LATENCY["generate_receipt"] + LATENCY["send_internal_notification"]) * args.latency
+            print(f"{args.payments} payments, task latencies "
+                  + ", ".join(f"{name} {factor * args.latency * 1000:.0f} ms"
+                              for name, factor in LATENCY.items()))
+            print(f"{'seconds per payment':<24} {'median':>8} {'max':>8}")
+            print(f"{'sequential':<24} {statistics.median(old):>8.3f} {max(old):>8.3f}")
+            print(f"{'task graph':<24} {statistics.median(new):>8.3f} {max(new):>8.3f}")
+            print(f"{'(slowest task/chain)':<24} {max(slowest, chain):>8.3f}")
+
+            print(f"\nfirst attempt faults, step timeout {processor.graph.steps['vendor_notification'].timeout:.2f} s")
+            for fault in ("fail", "hang"):
+                SlowPostApprovalProcessor.faults = {"notify_vendor": fault}
+                faulty = SlowPostApprovalProcessor(system, step_timeout=args.latency * 5)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    payment_id = paid_payments(system, 1)[0]
+                    start = time.perf_counter()
+                    results = faulty.process_post_approval_tasks(payment_id)
+                    elapsed = time.perf_counter() - start
+                    time.sleep(args.latency * 10)  # Let the abandoned attempt finish before the next run
+                assert not results["tasks_failed"], results
+                print(f"{'vendor ' + fault:<24} {elapsed:>8.3f} s, "
+                      f"{faulty.attempts['notify_vendor']} vendor attempts, all tasks completed")
+            SlowPostApprovalProcessor.faults = {}
+        finally:
+            system.store.close()
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Payment Store for the Subscription Payment System
+Indexed, append-only storage for payment records, shared between processes
+
+payment_log.json stays the snapshot, in the same JSON list format as
+before. Every change after it is appended as one JSON line (the full
+record) to payment_log.changes.jsonl, so approving a payment writes one
+short line instead of rewriting the whole file. Once the change log is as
+long as the snapshot, and when the program exits, it is folded back into
+payment_log.json (compaction), so the JSON file is current after every run.
+
+Payments are indexed by id and by status, so lookups and
+list_pending_payments() don't scan the whole ledger.
+
+Several processes (workflow_dashboard, post_approval_processor, ...) can
+use the same ledger at once:
+- Writes hold an exclusive lock on payment_log.lock (fcntl; without it,
+  only threads of one process are serialised). Under the lock a writer
+  first reads what others appended, so new ids are never handed out twice.
+- Every record carries a `version`. update() with `expected_version`
+  raises PaymentConflict if another process changed the payment since it
+  was read.
+- Reads apply just the lines appended since the last read; only a
+  compaction by another process makes them load the snapshot again.
+
+insert_many() and update_many() apply a whole batch under one lock hold
+with a single write to the change log; durable=True also fsyncs it.
+"""
+
+import atexit
+import contextlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+MIN_COMPACT_CHANGES = 1000  # Never compact more often than this many changes
+
+
+class PaymentConflict(Exception):
+    """The payment was changed by someone else since it was read"""
+
+
+class PaymentStore:
+    """Payment records with an id index, a status index and an append-only change log"""
+
+    def __init__(self, log_file: str = "payment_log.json"):
+        self.log_file = log_file
+        base = os.path.splitext(log_file)[0]
+        self.changes_file = base + ".changes.jsonl"
+        self.lock_file = base + ".lock"
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._pid = os.getpid()
+        self._lock_fd = None
+        self._changes = None  # Append handle
+        self._changes_id = None  # (device, inode) the append handle points at
+        self._reader = None
+        self._log_id = None  # (device, inode) of the change log read so far
+        self._offset = 0
+
+        with self._lock:
+            self._load()
+        atexit.register(self.close)
+
+    def _load(self):
+        """Read the snapshot, then replay the change log over it"""
+        self.by_id: Dict[int, Dict] = {}  # In id order
+        self.by_status: Dict[str, Dict[int, Dict]] = {}
+        self.last_id = 0
+        self.change_count = 0
+        if self._reader is not None:
+            self._reader.close()
+        self._reader = None
+        self._log_id = None
+        self._offset = 0
+
+        # Open the change log before reading the snapshot: if a compaction
+        # happens in between, the next read notices and loads again
+        self._open_reader()
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'r') as f:
+                for record in json.load(f):
+                    self._index(record)
+        self._catch_up()
+
+    def _open_reader(self):
+        try:
+            self._reader = open(self.changes_file, 'rb')
+        except FileNotFoundError:
+            return
+        st = os.fstat(self._reader.fileno())
+        self._log_id = (st.st_dev, st.st_ino)
+
+    def _refresh(self):
+        """Catch up with other processes (caller holds self._lock)"""
+        if self._pid != os.getpid():
+            # Forked child: descriptors shared with the parent share file
+            # offsets and flock()s, so open our own
+            self._pid = os.getpid()
+            self._lock_fd = None
+            self._changes = None
+            self._reader = None
+            self._log_id = None
+            self._lock_depth = 0
+        self._catch_up()
+
+    def _catch_up(self):
+        """Apply the changes appended since the last read, by any process"""
+        try:
+            st = os.stat(self.changes_file)
+        except FileNotFoundError:
+            return
+        if self._log_id != (st.st_dev, st.st_ino):
+            # Compacted by another process (or the first change log appeared):
+            # the snapshot may hold changes we never read
+            return self._load()
+        if st.st_size == self._offset:
+            return
+
+        self._reader.seek(self._offset)
+        data = self._reader.read()
+        end = data.rfind(b"\n") + 1  # A line still being written is read next time
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn line from a crashed writer
+            self._index(record)
+            self.change_count += 1
+        self._offset += end
+
+    def _index(self, record: Dict):
+        old = self.by_id.get(record["id"])
+        if old is not None:
+            self.by_status.get(old["status"], {}).pop(record["id"], None)
+        self.by_id[record["id"]] = record
+        self.last_id = max(self.last_id, record["id"])
+        self.by_status.setdefault(record["status"], {})[record["id"]] = record
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive access across threads and processes, with the indexes caught up"""
+        with self._lock:
+            self._refresh()
+            if self._lock_depth == 0 and HAS_FCNTL:
+                if self._lock_fd is None:
+                    self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                self._catch_up()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and HAS_FCNTL:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    # -- reads ------------------------------------------------------------
+
+    def get(self, payment_id: int) -> Optional[Dict]:
+        with self._lock:
+            self._refresh()
+            return self.by_id.get(payment_id)
+
+    def with_status(self, status: str) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return list(self.by_status.get(status, {}).values())
+
+    def all(self) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return list(self.by_id.values())
+
+    # -- writes -----------------------------------------------------------
+
+    def insert(self, record: Dict) -> Dict:
+        """Add a new payment under the next free id"""
+        with self._locked():
+            record["id"] = self.last_id + 1
+            record["version"] = 1
+            self._index(record)
+            self._append([record])
+        return record
+
+    def insert_many(self, records: List[Dict], durable: bool = False) -> List[Dict]:
+        """Add new payments under consecutive ids, in one write"""
+        with self._locked():
+            for record in records:
+                record["id"] = self.last_id + 1
+                record["version"] = 1
+                self._index(record)
+            self._append(records, durable)
+        return records
+
+    @staticmethod
+    def _changed(record: Dict, expected_version: Optional[int], changes: Dict,
+                 require: Optional[Dict] = None) -> Dict:
+        """The record after `changes`; PaymentConflict if it isn't in the expected state"""
+        version = record.get("version", 0)
+        if expected_version is not None and version != expected_version:
+            raise PaymentConflict(f"Payment #{record['id']} is at version {version}, "
+                                  f"expected {expected_version}")
+        for field, value in (require or {}).items():
+            if record.get(field) != value:
+                raise PaymentConflict(f"Payment #{record['id']} is {field}={record.get(field)}, "
+                                      f"not {value}")
+        record = dict(record, **changes)
+        record["version"] = version + 1
+        return record
+
+    def update(self, payment_id: int, expected_version: Optional[int] = None, **changes) -> Dict:
+        """Apply field changes to a payment; returns the new record
+
+        With `expected_version`, raises PaymentConflict unless the payment is
+        still at that version.
+        """
+        with self._locked():
+            record = self._changed(self.by_id[payment_id], expected_version, changes)
+            self._index(record)
+            self._append([record])
+        return record
+
+    def update_many(self, updates: Iterable[Tuple[int, Optional[int], Dict]],
+                    require: Optional[Dict] = None,
+                    durable: bool = False) -> Tuple[Dict[int, Dict], Dict[int, str]]:
+        """Apply (payment_id, expected_version, changes) updates in one write
+
+        Every update is checked first (the payment exists, is at the expected
+        version and matches `require`, e.g. {"status": "pending"}); the ones
+        that pass are applied together. Returns ({id: new record},
+        {id: error}).
+        """
+        applied, errors = {}, {}
+        with self._locked():
+            for payment_id, expected_version, changes in updates:
+                if payment_id in applied or payment_id in errors:
+                    errors[payment_id] = f"Payment #{payment_id} appears twice in the batch"
+                    applied.pop(payment_id, None)
+                    continue
+                record = self.by_id.get(payment_id)
+                if record is None:
+                    errors[payment_id] = f"Payment #{payment_id} not found"
+                    continue
+                try:
+                    applied[payment_id] = self._changed(record, expected_version, changes, require)
+                except PaymentConflict as e:
+                    errors[payment_id] = str(e)
+            for record in applied.values():
+                self._index(record)
+            if applied:
+                self._append(applied.values(), durable)
+        return applied, errors
+
+    def _append(self, records: Iterable[Dict], durable: bool = False):
+        """Write records to the change log in one write (caller holds the lock, caught up)"""
+        if self._changes is None or self._changes_id != self._log_id:
+            if self._changes is not None:
+                self._changes.close()
+            self._changes = open(self.changes_file, 'ab')
+            st = os.fstat(self._changes.fileno())
+            self._changes_id = (st.st_dev, st.st_ino)
+            if self._log_id is None:
+                self._open_reader()
+        if os.fstat(self._changes.fileno()).st_size > self._offset:
+            # A writer crashed partway through a line; _catch_up stopped before
+            # it. Cut it off, or our first line would be joined to it and lost
+            self._changes.truncate(self._offset)
+        data = b"".join(json.dumps(record, default=str).encode() + b"\n" for record in records)
+        self._changes.write(data)
+        self._changes.flush()
+        if durable:
+            os.fsync(self._changes.fileno())
+        # Our own lines are indexed already; step over them instead of reading them back
+        self._offset += len(data)
+        self.change_count += data.count(b"\n")
+        if self.change_count >= max(MIN_COMPACT_CHANGES, len(self.by_id)):
+            self.compact()
+
+    def compact(self):
+        """Fold the change log into payment_log.json and start a new, empty one"""
+        with self._locked():
+            self.export(self.log_file)
+            # A crash before the replace only replays changes already in the snapshot
+            temp_file = f"{self.changes_file}.tmp"
+            open(temp_file, 'wb').close()
+            os.replace(temp_file, self.changes_file)
+            if self._reader is not None:
+                self._reader.close()
+            self._reader = None
+            self._log_id = None
+            self._offset = 0
+            self.change_count = 0
+            self._open_reader()
+
+    def export(self, filename: str):
+        """Write every payment as one JSON list (the payment_log.json format)"""
+        records = self.all()
+        temp_file = f"{filename}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(records, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, filename)
+
+    def close(self):
+        """Compact any outstanding changes and close the files"""
+        with self._lock:
+            if self.change_count:
+                self.compact()
+            for handle in (self._changes, self._reader):
+                if handle is not None:
+                    handle.close()
+            self._changes = self._reader = None
+            self._log_id = None
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+            self._lock_fd = None
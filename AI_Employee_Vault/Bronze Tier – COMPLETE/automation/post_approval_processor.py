@@ -2,39 +2,155 @@
 """
 Post-Approval Processing for Subscription Payments
 Handles tasks that occur after payment approval like vendor notifications and receipts
+
+The four tasks run as a TaskGraph: the vendor notification, receipt and
+accounting update run at the same time, and the internal notification
+follows the receipt (it names the receipt file). Each task is retried on
+failure or timeout, and the log entries of one run are saved together.
+
+process_paid_payments() handles every paid payment whose post-approval
+tasks haven't completed, found through the payment store's status index
+and a `post_approval` field set on each payment once it is processed.
+The tasks that did complete are kept on the payment (`post_approval_done`,
+{task: result}), so a payment with failed tasks only re-runs those.
+Payments are processed by a process pool; the workers only return their
+log and ledger entries, and this process writes them, then marks the
+payments, every `checkpoint_every` payments. An interrupted batch
+therefore resumes after its last checkpoint.
 """
 
+import contextlib
 import datetime
 import json
 import smtplib
 import os
+import sys
+import textwrap
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import uuid
 
+from task_graph import Step, TaskGraph
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+STEP_TIMEOUT = 30  # Seconds per attempt
+STEP_RETRIES = 2  # Further attempts after a failure or timeout
+CHECKPOINT_EVERY = 500  # Payments between checkpoints in process_paid_payments()
+CHUNK_SIZE = 50  # Payments sent to a pool worker at a time
+LEDGER_FILE = "accounting_ledger.json"
+LEDGER_LOCK_FILE = "accounting_ledger.lock"
+
+
+def _append_to_json_list(filename: str, entries: List[Dict]):
+    """Append entries to a file holding a JSON list, as json.dump(indent=2) writes it
+
+    Only the new entries are encoded and written (over the closing
+    bracket, in one write), so the cost doesn't grow with the file. The
+    file is flock()ed while it is read and rewritten, so appends from
+    several processes don't overwrite each other.
+    """
+    if not entries:
+        return
+    text = ",\n".join(textwrap.indent(json.dumps(entry, indent=2, default=str), "  ")
+                      for entry in entries)
+    # O_CREAT without O_TRUNC: a process creating the file can't empty one another just wrote
+    fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+    with open(fd, 'r+b') as f:
+        if HAS_FCNTL:
+            fcntl.flock(fd, fcntl.LOCK_EX)  # Released when the file is closed
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 64))
+        tail = f.read()
+        body = tail[:tail.rfind(b"]")].rstrip()
+        if not body.endswith((b"[", b"}")):
+            # Empty, or not written by json.dump: rewrite it whole
+            f.seek(0)
+            existing = json.loads(f.read() or b"[]")
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(existing + entries, indent=2, default=str).encode())
+        else:
+            f.seek(size - len(tail) + len(body))
+            separator = b"\n" if body.endswith(b"[") else b",\n"
+            f.write(separator + text.encode() + b"\n]")
+            f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+
 
 class PostApprovalProcessor:
     """Handles post-approval tasks for subscription payments"""
 
-    def __init__(self, payment_system, log_file: str = "post_approval_log.json"):
+    def __init__(self, payment_system, log_file: Optional[str] = "post_approval_log.json",
+                 step_timeout: float = STEP_TIMEOUT, step_retries: int = STEP_RETRIES):
         self.payment_system = payment_system
-        self.log_file = log_file
+        self.log_file = log_file  # None keeps the log in memory (pool workers)
+        self.step_timeout = step_timeout
+        self.step_retries = step_retries
         self.processing_logs = self._load_processing_logs()
+        self._log_lock = threading.Lock()
+        self._ledger_lock = threading.Lock()
+        self._ledger = None  # {payment_id: entry} of LEDGER_FILE as of _ledger_stamp
+        self._ledger_stamp = None
+
+        self.graph = TaskGraph([
+            Step("vendor_notification", self._attempt(self.notify_vendor),
+                 timeout=step_timeout, retries=step_retries),
+            Step("receipt_generation", self._attempt(self.generate_receipt),
+                 timeout=step_timeout, retries=step_retries),
+            Step("accounting_update", self._attempt(self.update_accounting_system, ledger=True),
+                 timeout=step_timeout, retries=step_retries),
+            Step("internal_notification", self._attempt(self.send_internal_notification),
+                 depends_on=("receipt_generation",), timeout=step_timeout, retries=step_retries),
+        ])
 
     def _load_processing_logs(self) -> list:
         """Load existing processing logs from file"""
-        if os.path.exists(self.log_file):
+        if self.log_file and os.path.exists(self.log_file):
             with open(self.log_file, 'r') as f:
                 return json.load(f)
         return []
 
-    def _save_processing_logs(self):
-        """Save processing logs to file"""
-        with open(self.log_file, 'w') as f:
-            json.dump(self.processing_logs, f, indent=2, default=str)
-
-    def notify_vendor(self, payment: Dict) -> bool:
+    def _record(self, entries: List[Dict]):
+        """Add log entries and save them to the log in one write"""
+        with self._log_lock:
+            self.processing_logs.extend(entries)
+            if self.log_file:
+                _append_to_json_list(self.log_file, entries)
+
+    def _log(self, entry: Dict, log: Optional[List[Dict]]):
+        """Collect an entry into `log` for a later _record(), or record it now"""
+        if log is not None:
+            log.append(entry)
+        else:
+            self._record([entry])
+
+    @staticmethod
+    def _attempt(task: Callable, ledger: bool = False) -> Callable:
+        """Wrap a task for the graph: its log entries come back with its result
+
+        With `ledger`, a run with defer_ledger also gets back the accounting
+        entries the task would have posted.
+        """
+        def attempt(payment, defer_ledger, upstream):
+            kwargs = {"log": []}
+            if ledger and defer_ledger:
+                kwargs["ledger"] = []
+            if "receipt_generation" in upstream:
+                kwargs["receipt_file"] = upstream["receipt_generation"][0]
+            result = task(payment, **kwargs)
+            return (result, kwargs["log"], kwargs.get("ledger", [])) if result else None
+        return attempt
+
+    def notify_vendor(self, payment: Dict, log: Optional[List[Dict]] = None) -> bool:
         """Simulate sending payment notification to vendor"""
         try:
             print(f"Sending payment notification to vendor: {payment['vendor']}")
@@ -50,8 +166,7 @@ class PostApprovalProcessor:
                 "status": "sent"
             }
 
-            self.processing_logs.append(notification_log)
-            self._save_processing_logs()
+            self._log(notification_log, log)
 
             print(f"Notification sent to {payment['vendor']} for payment #{payment['id']}")
             return True
@@ -60,7 +175,7 @@ class PostApprovalProcessor:
             print(f"Error sending vendor notification: {str(e)}")
             return False
 
-    def generate_receipt(self, payment: Dict) -> str:
+    def generate_receipt(self, payment: Dict, log: Optional[List[Dict]] = None) -> str:
         """Generate a receipt for the payment"""
         try:
             receipt_data = {
@@ -92,8 +207,7 @@ class PostApprovalProcessor:
                 "status": "generated"
             }
 
-            self.processing_logs.append(receipt_log)
-            self._save_processing_logs()
+            self._log(receipt_log, log)
 
             return receipt_filename
 
@@ -101,7 +215,69 @@ class PostApprovalProcessor:
             print(f"Error generating receipt: {str(e)}")
             return ""
 
-    def update_accounting_system(self, payment: Dict) -> bool:
+    @contextlib.contextmanager
+    def _ledger_locked(self):
+        """Exclusive access to the ledger across threads and processes (fcntl)"""
+        with self._ledger_lock:
+            if not HAS_FCNTL:
+                yield
+                return
+            fd = os.open(LEDGER_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _ledger_file_stamp() -> Optional[Tuple[int, int, int, int]]:
+        try:
+            st = os.stat(LEDGER_FILE)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _posted(self) -> Dict:
+        """{payment_id: entry} of the ledger (caller holds _ledger_locked)
+
+        Read from the file only when it changed since we last read or wrote
+        it, i.e. when another process posted entries.
+        """
+        stamp = self._ledger_file_stamp()
+        if self._ledger is None or stamp != self._ledger_stamp:
+            ledger = []
+            if stamp is not None:
+                with open(LEDGER_FILE, 'r') as f:
+                    ledger = json.load(f)
+            self._ledger = {entry.get("payment_id"): entry for entry in ledger}
+            self._ledger_stamp = stamp
+        return self._ledger
+
+    def _post_to_ledger(self, entries: List[Dict]) -> List[Dict]:
+        """Add accounting entries to the ledger in one write; returns the posted entries
+
+        A payment that already has an entry (e.g. posted by an attempt that
+        timed out, before an interrupted batch, or by another process) keeps
+        it and is not posted twice.
+        """
+        with self._ledger_locked():
+            posted = self._posted()
+            new = {}
+            for entry in entries:
+                if entry["payment_id"] not in posted:
+                    new.setdefault(entry["payment_id"], entry)
+            try:
+                _append_to_json_list(LEDGER_FILE, list(new.values()))
+            except BaseException:
+                self._ledger = None  # Unknown what reached the file; read it next time
+                raise
+            posted.update(new)
+            if new:
+                self._ledger_stamp = self._ledger_file_stamp()
+            return [posted[entry["payment_id"]] for entry in entries]
+
+    def update_accounting_system(self, payment: Dict, log: Optional[List[Dict]] = None,
+                                 ledger: Optional[List[Dict]] = None) -> bool:
         """Simulate updating accounting system with payment information"""
         try:
             print(f"Updating accounting system with payment #{payment['id']}")
@@ -118,17 +294,11 @@ class PostApprovalProcessor:
                 "status": "posted"
             }
 
-            # Save to accounting ledger
-            ledger_filename = "accounting_ledger.json"
-            ledger = []
-            if os.path.exists(ledger_filename):
-                with open(ledger_filename, 'r') as f:
-                    ledger = json.load(f)
-
-            ledger.append(accounting_entry)
-
-            with open(ledger_filename, 'w') as f:
-                json.dump(ledger, f, indent=2, default=str)
+            # Save to accounting ledger, or hand the entry back to be posted with a batch
+            if ledger is not None:
+                ledger.append(accounting_entry)
+            else:
+                accounting_entry = self._post_to_ledger([accounting_entry])[0]
 
             print(f"Accounting entry posted: {accounting_entry['entry_id']}")
 
@@ -142,8 +312,7 @@ class PostApprovalProcessor:
                 "status": "completed"
             }
 
-            self.processing_logs.append(accounting_log)
-            self._save_processing_logs()
+            self._log(accounting_log, log)
 
             return True
 
@@ -151,7 +320,8 @@ class PostApprovalProcessor:
             print(f"Error updating accounting system: {str(e)}")
             return False
 
-    def send_internal_notification(self, payment: Dict) -> bool:
+    def send_internal_notification(self, payment: Dict, log: Optional[List[Dict]] = None,
+                                   receipt_file: Optional[str] = None) -> bool:
         """Send internal notification about completed payment"""
         try:
             print(f"Sending internal notification for payment #{payment['id']}")
@@ -166,10 +336,11 @@ class PostApprovalProcessor:
                 "subject": f"Payment #{payment['id']} Completed: ${payment['amount']} to {payment['vendor']}",
                 "status": "sent"
             }
+            if receipt_file:
+                internal_notification["receipt_file"] = receipt_file
 
             # Log the internal notification
-            self.processing_logs.append(internal_notification)
-            self._save_processing_logs()
+            self._log(internal_notification, log)
 
             print(f"Internal notification sent to {payment['requester']} and {payment['approver']}")
             return True
@@ -192,7 +363,26 @@ class PostApprovalProcessor:
             print(f"Payment #{payment_id} is not in 'paid' status")
             return {"success": False, "error": "Payment not in paid status"}
 
-        # Execute post-approval tasks
+        results, entries, _, done = self._run_tasks(payment)
+        self._record(entries)
+        self.payment_system.store.update(payment_id, post_approval=entries[-1]["status"],
+                                         post_approval_done=done)
+
+        print(f"\nPost-approval processing completed for payment #{payment_id}")
+        print(f"Tasks completed: {len(results['tasks_completed'])}")
+        print(f"Tasks failed: {len(results['tasks_failed'])}")
+
+        return results
+
+    def _run_tasks(self, payment: Dict,
+                   defer_ledger: bool = False) -> Tuple[Dict, List[Dict], List[Dict], Dict]:
+        """Run the post-approval tasks for a paid payment, except those already done
+
+        Returns the results, the log entries (the processing result last),
+        with defer_ledger the accounting entries still to be posted, and the
+        new `post_approval_done` ({task: result} of every completed task).
+        """
+        payment_id = payment['id']
         results = {
             "payment_id": payment_id,
             "timestamp": datetime.datetime.now(),
@@ -201,31 +391,24 @@ class PostApprovalProcessor:
             "summary": {}
         }
 
-        # 1. Notify vendor
-        if self.notify_vendor(payment):
-            results["tasks_completed"].append("vendor_notification")
-        else:
-            results["tasks_failed"].append("vendor_notification")
-
-        # 2. Generate receipt
-        receipt_file = self.generate_receipt(payment)
-        if receipt_file:
-            results["tasks_completed"].append("receipt_generation")
-            results["summary"]["receipt_file"] = receipt_file
-        else:
-            results["tasks_failed"].append("receipt_generation")
-
-        # 3. Update accounting system
-        if self.update_accounting_system(payment):
-            results["tasks_completed"].append("accounting_update")
-        else:
-            results["tasks_failed"].append("accounting_update")
-
-        # 4. Send internal notification
-        if self.send_internal_notification(payment):
-            results["tasks_completed"].append("internal_notification")
-        else:
-            results["tasks_failed"].append("internal_notification")
+        # Vendor notification, receipt, accounting update and internal notification
+        done_before = payment.get("post_approval_done") or {}
+        done = dict(done_before)
+        entries, ledger = [], []
+        outcomes = self.graph.run(payment, defer_ledger,
+                                  completed={task: (value, [], []) for task, value in done.items()})
+        for task, outcome in outcomes.items():
+            if outcome["status"] == "completed":
+                value, task_entries, ledger_entries = outcome["value"]
+                entries.extend(task_entries)
+                ledger.extend(ledger_entries)
+                done[task] = value
+                results["tasks_completed"].append(task)
+                if task == "receipt_generation":
+                    results["summary"]["receipt_file"] = value
+            else:
+                results["tasks_failed"].append(task)
+                results["summary"].setdefault("errors", {})[task] = outcome["error"]
 
         # Log the overall processing result
         processing_result = {
@@ -235,17 +418,85 @@ class PostApprovalProcessor:
             "timestamp": datetime.datetime.now(),
             "tasks_completed": results["tasks_completed"],
             "tasks_failed": results["tasks_failed"],
+            "tasks_done_before": [task for task in outcomes if task in done_before],
             "status": "completed" if not results["tasks_failed"] else "partial_success"
         }
 
-        self.processing_logs.append(processing_result)
-        self._save_processing_logs()
-
-        print(f"\nPost-approval processing completed for payment #{payment_id}")
-        print(f"Tasks completed: {len(results['tasks_completed'])}")
-        print(f"Tasks failed: {len(results['tasks_failed'])}")
-
-        return results
+        entries.append(processing_result)
+        return results, entries, ledger, done
+
+    def awaiting_post_approval(self) -> List[Dict]:
+        """Paid payments whose post-approval tasks haven't all completed"""
+        return [payment for payment in self.payment_system.store.with_status("paid")
+                if payment.get("post_approval") != "completed"]
+
+    def process_paid_payments(self, max_workers: Optional[int] = None,
+                              checkpoint_every: int = CHECKPOINT_EVERY) -> Dict:
+        """Run the post-approval tasks for every paid payment awaiting them, in a process pool"""
+        payments = self.awaiting_post_approval()
+        print(f"\n{len(payments)} paid payments awaiting post-approval processing")
+        summary = {"processed": 0, "completed": 0, "partial_success": 0}
+        if not payments:
+            return summary
+
+        chunks = [payments[i:i + CHUNK_SIZE] for i in range(0, len(payments), CHUNK_SIZE)]
+        pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                   initargs=(self.step_timeout, self.step_retries))
+        done = []
+        try:
+            for outcomes in pool.map(_process_chunk, chunks):
+                done.extend(outcomes)
+                if len(done) >= checkpoint_every:
+                    # Handed over first: if the checkpoint raises, the finally
+                    # below must not write the same entries again
+                    batch, done = done, []
+                    self._checkpoint(batch, summary)
+        finally:
+            # Keep what finished and wasn't checkpointed, even when interrupted
+            self._checkpoint(done, summary)
+            pool.shutdown(cancel_futures=True)
+
+        print(f"Processed {summary['processed']} payments: {summary['completed']} completed, "
+              f"{summary['partial_success']} with failed tasks")
+        return summary
+
+    def _checkpoint(self, outcomes: List[Tuple[int, List[Dict], List[Dict], Dict]], summary: Dict):
+        """Post the ledger entries and log entries of finished payments, then mark the payments
+
+        A crash before the payments are marked only repeats their tasks;
+        their ledger entries are not posted twice.
+        """
+        if not outcomes:
+            return
+        self._post_to_ledger([entry for _, _, ledger, _ in outcomes for entry in ledger])
+        self._record([entry for _, entries, _, _ in outcomes for entry in entries])
+        self.payment_system.store.update_many(
+            [(payment_id, None, {"post_approval": entries[-1]["status"], "post_approval_done": done})
+             for payment_id, entries, _, done in outcomes],
+            durable=True)
+        for _, entries, _, _ in outcomes:
+            summary[entries[-1]["status"]] += 1
+        summary["processed"] += len(outcomes)
+        print(f"Checkpoint: {summary['processed']} payments processed")
+
+
+_worker: Optional[PostApprovalProcessor] = None  # One per pool process
+
+
+def _init_worker(step_timeout: float, step_retries: int):
+    global _worker
+    # Task output for thousands of payments; the results go back to the parent
+    sys.stdout = open(os.devnull, 'w')
+    _worker = PostApprovalProcessor(None, log_file=None, step_timeout=step_timeout,
+                                    step_retries=step_retries)
+
+
+def _process_chunk(payments: List[Dict]) -> List[Tuple[int, List[Dict], List[Dict], Dict]]:
+    outcomes = []
+    for payment in payments:
+        _, entries, ledger, done = _worker._run_tasks(payment, defer_ledger=True)
+        outcomes.append((payment['id'], entries, ledger, done))
+    return outcomes
 
 
 def main():
@@ -265,9 +516,10 @@ def main():
         print("1. Process post-approval tasks for a payment")
         print("2. View post-approval processing logs")
         print("3. View accounting ledger")
-        print("4. Exit")
+        print("4. Process every paid payment awaiting post-approval tasks")
+        print("5. Exit")
 
-        choice = input("\nEnter your choice (1-4): ").strip()
+        choice = input("\nEnter your choice (1-5): ").strip()
 
         if choice == "1":
             payment_id = int(input("Enter payment ID to process (must be in 'paid' status): "))
@@ -284,8 +536,8 @@ def main():
                     print(f"  {log}")
 
         elif choice == "3":
-            if os.path.exists("accounting_ledger.json"):
-                with open("accounting_ledger.json", 'r') as f:
+            if os.path.exists(LEDGER_FILE):
+                with open(LEDGER_FILE, 'r') as f:
                     ledger = json.load(f)
                 print("\nAccounting Ledger:")
                 for entry in ledger[-5:]:  # Show last 5 entries
@@ -294,6 +546,9 @@ def main():
                 print("No accounting ledger found.")
 
         elif choice == "4":
+            processor.process_paid_payments()
+
+        elif choice == "5":
             print("Exiting...")
             break
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Stress test for the payment store across processes
+Starts N processes on one ledger. Each submits M payment requests, then
+all of them race to approve every pending payment. Checks that:
+
+- ids are 1..N*M with no duplicates and no lost submissions
+- every payment was approved by exactly one process (the others get a
+  version conflict or see it already processed)
+- each process's view, kept current from the change log, matches a fresh load
+
+--compact-every makes compactions happen while the others are writing.
+
+Usage: python stress_payment_store.py [--processes N] [--payments M] [--compact-every C]
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import payment_store
+from subscription_payment import SubscriptionPaymentSystem
+
+
+def worker(log_file, payments, compact_every, start, results):
+    payment_store.MIN_COMPACT_CHANGES = compact_every
+    system = SubscriptionPaymentSystem(log_file)
+    start.wait()
+    with contextlib.redirect_stdout(io.StringIO()):
+        submitted = [system.submit_payment_request(250.0, f"Vendor {os.getpid()}", "Subscription",
+                                                   f"requester-{os.getpid()}")["id"]
+                     for _ in range(payments)]
+        start.wait()  # Everyone has submitted; now race for the approvals
+        pending = [p["id"] for p in system.list_pending_payments()]
+        random.shuffle(pending)
+        approved = [payment_id for payment_id in pending
+                    if system.approve_payment(payment_id, f"approver-{os.getpid()}")]
+    start.wait()
+    view = {p["id"]: p["status"] for p in system.view_payment_history()}
+    results.put((submitted, approved, view))
+    system.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--payments", type=int, default=500)
+    parser.add_argument("--compact-every", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, "payment_log.json")
+        start = multiprocessing.Barrier(args.processes)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(log_file, args.payments,
+                                                                  args.compact_every, start, results))
+                     for _ in range(args.processes)]
+        began = time.perf_counter()
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - began
+
+        total = args.processes * args.payments
+        submitted = sorted(i for ids, _, _ in outcomes for i in ids)
+        approved = sorted(i for _, ids, _ in outcomes for i in ids)
+        final = SubscriptionPaymentSystem(log_file)
+        statuses = {p["id"]: p["status"] for p in final.view_payment_history()}
+
+        print(f"{args.processes} processes x {args.payments} payments in {elapsed:.2f} s "
+              f"({2 * total / elapsed:.0f} submits+approvals/s)")
+        checks = {
+            "ids unique and contiguous": submitted == list(range(1, total + 1)),
+            "every submission stored": sorted(statuses) == submitted,
+            "each payment approved once": approved == submitted,
+            "all payments paid": set(statuses.values()) == {"paid"},
+            "every process view current": all(view == statuses for _, _, view in outcomes),
+        }
+        for name, ok in checks.items():
+            print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+        if not all(checks.values()):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
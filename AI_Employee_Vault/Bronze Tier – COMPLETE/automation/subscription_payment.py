@@ -5,9 +5,13 @@ Handles $250 software subscription payments with approval and logging workflow
 """
 
 import datetime
-import json
-import os
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from payment_store import PaymentConflict, PaymentStore
+
+PROCESSING_WORKERS = 8  # Payments charged at once by approve_payments()
+REQUIRED_FIELDS = ("amount", "vendor", "description", "requester")
 
 
 class SubscriptionPaymentSystem:
@@ -15,26 +19,17 @@ class SubscriptionPaymentSystem:
 
     def __init__(self, log_file: str = "payment_log.json"):
         self.log_file = log_file
-        self.payments = self._load_payments()
+        self.store = PaymentStore(log_file)
 
-    def _load_payments(self) -> list:
-        """Load existing payment logs from file"""
-        if os.path.exists(self.log_file):
-            with open(self.log_file, 'r') as f:
-                return json.load(f)
-        return []
+    @property
+    def payments(self) -> list:
+        """All payments in id order"""
+        return self.store.all()
 
-    def _save_payments(self):
-        """Save payment logs to file"""
-        with open(self.log_file, 'w') as f:
-            json.dump(self.payments, f, indent=2, default=str)
-
-    def submit_payment_request(self, amount: float, vendor: str, description: str, requester: str) -> Dict:
-        """
-        Submit a payment request for approval
-        """
-        payment_request = {
-            "id": len(self.payments) + 1,
+    @staticmethod
+    def _new_request(amount: float, vendor: str, description: str, requester: str) -> Dict:
+        return {
+            "id": None,  # Assigned by the store, unique across processes
             "amount": amount,
             "vendor": vendor,
             "description": description,
@@ -45,8 +40,11 @@ class SubscriptionPaymentSystem:
             "approved_date": None
         }
 
-        self.payments.append(payment_request)
-        self._save_payments()
+    def submit_payment_request(self, amount: float, vendor: str, description: str, requester: str) -> Dict:
+        """
+        Submit a payment request for approval
+        """
+        payment_request = self.store.insert(self._new_request(amount, vendor, description, requester))
 
         print(f"Payment request #{payment_request['id']} submitted successfully!")
         print(f"Amount: ${amount}")
@@ -57,71 +55,162 @@ class SubscriptionPaymentSystem:
 
         return payment_request
 
+    @staticmethod
+    def _request_error(request: Dict) -> Optional[str]:
+        """Why a submitted request is invalid, or None"""
+        missing = [field for field in REQUIRED_FIELDS if request.get(field) in (None, "")]
+        if missing:
+            return f"Missing {', '.join(missing)}"
+        amount = request["amount"]
+        if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount <= 0:
+            return f"Invalid amount: {amount!r}"
+        return None
+
+    def submit_payment_requests(self, requests: List[Dict]) -> List[Dict]:
+        """
+        Submit many payment requests (dicts with amount, vendor, description,
+        requester) in one durable write. Returns one outcome per request, in
+        order: {"success": True, "payment": ...} or {"success": False, "error": ...}
+        """
+        outcomes = []
+        valid = []
+        for request in requests:
+            error = self._request_error(request)
+            if error:
+                outcomes.append({"success": False, "error": error})
+            else:
+                outcome = {"success": True, "payment": self._new_request(
+                    request["amount"], request["vendor"], request["description"], request["requester"])}
+                outcomes.append(outcome)
+                valid.append(outcome["payment"])
+
+        if valid:
+            self.store.insert_many(valid, durable=True)
+        print(f"Submitted {len(valid)} of {len(requests)} payment requests.")
+        return outcomes
+
     def list_pending_payments(self) -> list:
         """List all pending payment requests"""
-        return [p for p in self.payments if p["status"] == "pending"]
+        return self.store.with_status("pending")
 
     def approve_payment(self, payment_id: int, approver: str) -> Optional[Dict]:
         """Approve a payment request"""
-        for payment in self.payments:
-            if payment["id"] == payment_id and payment["status"] == "pending":
-                payment["status"] = "approved"
-                payment["approver"] = approver
-                payment["approved_date"] = datetime.datetime.now()
-
-                self._save_payments()
-
-                print(f"Payment #{payment_id} approved successfully!")
-                print(f"Approved by: {approver}")
-                print(f"Amount: ${payment['amount']}")
-
-                # Process the actual payment
-                self.process_payment(payment)
-
-                return payment
+        payment = self.store.get(payment_id)
+        if payment is not None and payment["status"] == "pending":
+            try:
+                payment = self.store.update(payment_id, expected_version=payment.get("version", 0),
+                                            status="approved", approver=approver,
+                                            approved_date=datetime.datetime.now())
+            except PaymentConflict:
+                print(f"Payment #{payment_id} was changed by someone else; check it and try again.")
+                return None
+
+            print(f"Payment #{payment_id} approved successfully!")
+            print(f"Approved by: {approver}")
+            print(f"Amount: ${payment['amount']}")
+
+            # Process the actual payment
+            return self.process_payment(payment)
 
         print(f"Payment #{payment_id} not found or already processed.")
         return None
 
     def reject_payment(self, payment_id: int, approver: str, reason: str = "") -> Optional[Dict]:
         """Reject a payment request"""
-        for payment in self.payments:
-            if payment["id"] == payment_id and payment["status"] == "pending":
-                payment["status"] = "rejected"
-                payment["approver"] = approver
-                payment["rejection_reason"] = reason
-                payment["rejected_date"] = datetime.datetime.now()
-
-                self._save_payments()
-
-                print(f"Payment #{payment_id} rejected!")
-                print(f"Rejected by: {approver}")
-                print(f"Reason: {reason}")
-
-                return payment
+        payment = self.store.get(payment_id)
+        if payment is not None and payment["status"] == "pending":
+            try:
+                payment = self.store.update(payment_id, expected_version=payment.get("version", 0),
+                                            status="rejected", approver=approver,
+                                            rejection_reason=reason,
+                                            rejected_date=datetime.datetime.now())
+            except PaymentConflict:
+                print(f"Payment #{payment_id} was changed by someone else; check it and try again.")
+                return None
+
+            print(f"Payment #{payment_id} rejected!")
+            print(f"Rejected by: {approver}")
+            print(f"Reason: {reason}")
+
+            return payment
 
         print(f"Payment #{payment_id} not found or already processed.")
         return None
 
-    def process_payment(self, payment: Dict):
-        """Process the actual payment (simulated)"""
+    def approve_payments(self, payment_ids: List[int], approver: str,
+                         max_workers: int = PROCESSING_WORKERS) -> List[Dict]:
+        """
+        Approve many pending payments at once. All approvals are written in
+        one durable write; the payments are then charged on a pool of at most
+        `max_workers` threads and marked paid in one more write. Returns one
+        outcome per id, in order: {"id", "success", "status"} plus "error"
+        for payments that were not approved or not charged.
+        """
+        now = datetime.datetime.now()
+        approved, errors = self.store.update_many(
+            [(payment_id, None, {"status": "approved", "approver": approver, "approved_date": now})
+             for payment_id in payment_ids],
+            require={"status": "pending"},
+            durable=True
+        )
+        print(f"Approved {len(approved)} of {len(payment_ids)} payments by {approver}.")
+
+        charged = {}
+        if approved:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(approved))) as pool:
+                futures = {payment_id: pool.submit(self.charge_payment, payment)
+                           for payment_id, payment in approved.items()}
+            for payment_id, future in futures.items():
+                try:
+                    future.result()
+                    charged[payment_id] = approved[payment_id]
+                except Exception as e:
+                    errors[payment_id] = f"Payment failed: {e}"
+
+        now = datetime.datetime.now()
+        paid, paid_errors = self.store.update_many(
+            [(payment_id, payment["version"], {"processed_date": now, "status": "paid"})
+             for payment_id, payment in charged.items()],
+            durable=True
+        )
+        errors.update(paid_errors)
+        print(f"Processed {len(paid)} payments.")
+
+        outcomes = []
+        for payment_id in payment_ids:
+            if payment_id in paid:
+                outcomes.append({"id": payment_id, "success": True, "status": "paid"})
+            else:
+                payment = approved.get(payment_id) or self.store.get(payment_id)
+                outcomes.append({"id": payment_id, "success": False,
+                                 "status": payment["status"] if payment else None,
+                                 "error": errors.get(payment_id, "Not processed")})
+        return outcomes
+
+    def charge_payment(self, payment: Dict):
+        """Send the payment to the payment processor (simulated); raises on failure"""
         print(f"Processing payment of ${payment['amount']} to {payment['vendor']}")
         # In a real system, this would integrate with a payment processor
-        payment["processed_date"] = datetime.datetime.now()
-        payment["status"] = "paid"
-        self._save_payments()
+
+    def process_payment(self, payment: Dict) -> Dict:
+        """Process the actual payment (simulated); returns the paid record"""
+        self.charge_payment(payment)
+        payment = self.store.update(payment["id"], expected_version=payment.get("version", 0),
+                                    processed_date=datetime.datetime.now(), status="paid")
         print("Payment processed successfully!")
+        return payment
 
     def view_payment_history(self) -> list:
         """View all payment history"""
-        return self.payments
+        return self.store.all()
 
     def view_payment_details(self, payment_id: int) -> Optional[Dict]:
         """View details of a specific payment"""
-        for payment in self.payments:
-            if payment["id"] == payment_id:
-                return payment
-        return None
+        return self.store.get(payment_id)
+
+    def export_payments(self, filename: Optional[str] = None):
+        """Write all payments as a payment_log.json style JSON list (default: the log file itself)"""
+        self.store.export(filename or self.log_file)
 
 
 def main():
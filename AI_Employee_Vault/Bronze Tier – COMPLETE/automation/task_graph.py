@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Task Graph for the Subscription Payment System
+Runs a set of steps with declared dependencies concurrently on threads
+
+Each step starts as soon as the steps it depends on have completed, so
+independent steps overlap and a run takes about as long as its slowest
+chain of steps. A step attempt that raises, returns a falsy value or runs
+past the step's timeout is retried up to `retries` times; a step whose
+dependency failed is skipped. Steps that completed in an earlier run can
+be passed in with their values and are not run again.
+
+Every attempt runs on a thread of its own. A timed-out attempt cannot be
+stopped; it finishes in the background and its result is ignored, without
+holding up the attempts of later runs. `stuck` counts those still running.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Step:
+    """One node of a TaskGraph
+
+    `func(*args, upstream)` is called with the run's arguments and a dict
+    of the values returned by the steps named in `depends_on`.
+    """
+
+    def __init__(self, name: str, func: Callable, depends_on: Iterable[str] = (),
+                 timeout: Optional[float] = None, retries: int = 0, retry_delay: float = 0.0):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+
+class TaskGraph:
+    """A dependency graph of Steps, run concurrently on threads"""
+
+    def __init__(self, steps: List[Step]):
+        self.steps = {step.name: step for step in steps}
+        self.order = self._topological_order(steps)
+        # Drivers wait on dependencies and timeouts; each attempt gets its own thread
+        self._drivers = ThreadPoolExecutor(max_workers=len(steps),
+                                           thread_name_prefix="task-graph-driver")
+        self._lock = threading.Lock()  # One run at a time keeps the driver pool deadlock-free
+        self._stuck_lock = threading.Lock()
+        self.stuck = 0  # Timed-out attempts still running
+
+    def _topological_order(self, steps: List[Step]) -> List[str]:
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(f"Step {step.name} depends on unknown step {dependency}")
+
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dependency in self.steps[name].depends_on:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for step in steps:
+            visit(step.name, [])
+        return order
+
+    def run(self, *args, completed: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """Run every step once; returns {step name: result} in declaration order
+
+        A result is {"status": "completed" | "failed" | "skipped",
+        "value", "error", "attempts", "seconds"}. Steps in `completed`
+        ({step name: value}) aren't run: they complete at once with that
+        value, and 0 attempts.
+        """
+        completed = completed or {}
+        with self._lock:
+            drivers = {}
+            for name in self.order:
+                step = self.steps[name]
+                upstream = {dependency: drivers[dependency] for dependency in step.depends_on}
+                if name in completed:
+                    drivers[name] = Future()
+                    drivers[name].set_result({"status": "completed", "value": completed[name],
+                                              "error": None, "attempts": 0, "seconds": 0.0})
+                    continue
+                drivers[name] = self._drivers.submit(self._drive, step, upstream, args)
+            results = {name: drivers[name].result() for name in self.order}
+        return {name: results[name] for name in self.steps}
+
+    def _drive(self, step: Step, upstream: Dict, args) -> Dict[str, Any]:
+        values = {}
+        for dependency, driver in upstream.items():
+            result = driver.result()
+            if result["status"] != "completed":
+                return {"status": "skipped", "value": None, "attempts": 0, "seconds": 0.0,
+                        "error": f"{dependency} {result['status']}"}
+            values[dependency] = result["value"]
+
+        start = time.perf_counter()
+        error = None
+        for attempt in range(1, step.retries + 2):
+            if attempt > 1 and step.retry_delay:
+                time.sleep(step.retry_delay)
+            future = self._start_attempt(step, args, values)
+            try:
+                value = future.result(timeout=step.timeout)
+            except TimeoutError:
+                error = f"timed out after {step.timeout} s"
+                self._abandon(step, future)
+                continue
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                continue
+            if value:
+                return {"status": "completed", "value": value, "error": None,
+                        "attempts": attempt, "seconds": time.perf_counter() - start}
+            error = "step reported failure"
+        return {"status": "failed", "value": None, "error": error,
+                "attempts": step.retries + 1, "seconds": time.perf_counter() - start}
+
+    @staticmethod
+    def _start_attempt(step: Step, args, values: Dict) -> Future:
+        """Run one attempt on a new (daemon) thread; its outcome lands in the returned future"""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def attempt():
+            try:
+                future.set_result(step.func(*args, values))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=attempt, name=f"task-graph-{step.name}", daemon=True).start()
+        return future
+
+    def _abandon(self, step: Step, future: Future):
+        """Count a timed-out attempt as stuck until its thread finishes"""
+        with self._stuck_lock:
+            self.stuck += 1
+            stuck = self.stuck
+        print(f"Step {step.name} timed out after {step.timeout} s; "
+              f"{stuck} timed-out attempt(s) still running")
+        future.add_done_callback(self._unstick)
+
+    def _unstick(self, future: Future):
+        with self._stuck_lock:
+            self.stuck -= 1
+
+    def close(self):
+        self._drivers.shutdown(wait=False)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the payment store
+Run with: python -m pytest test_payment_store.py (or python test_payment_store.py)
+"""
+
+import os
+import tempfile
+import unittest
+
+from payment_store import PaymentStore
+
+
+class TornChangeLogTest(unittest.TestCase):
+    """A writer that crashed partway through a change log line"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "payment_log.json")
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmp.cleanup()
+
+    def open_store(self):
+        store = PaymentStore(self.log_file)
+        self.stores.append(store)
+        return store
+
+    def tear_last_line(self, store):
+        with open(store.changes_file, 'ab') as f:
+            f.write(b'{"id": 2, "amount": 25')
+
+    def test_append_after_torn_line_is_kept(self):
+        self.open_store().insert({"status": "pending", "amount": 1.0})
+        self.tear_last_line(self.stores[0])
+
+        record = self.open_store().insert({"status": "pending", "amount": 2.0})
+        self.assertEqual(record["id"], 2)
+
+        reloaded = self.open_store()
+        self.assertEqual(sorted(reloaded.by_id), [1, 2])
+        self.assertEqual(reloaded.get(2)["amount"], 2.0)
+
+    def test_durable_update_after_torn_line_is_kept(self):
+        store = self.open_store()
+        store.insert({"status": "pending", "amount": 1.0})
+        self.tear_last_line(store)
+
+        applied, errors = store.update_many([(1, 1, {"status": "approved"})], durable=True)
+        self.assertEqual((list(applied), errors), ([1], {}))
+        self.assertEqual(self.open_store().get(1)["status"], "approved")
+
+    def test_reader_in_other_store_sees_append(self):
+        reader = self.open_store()
+        writer = self.open_store()
+        writer.insert({"status": "pending", "amount": 1.0})
+        self.tear_last_line(writer)
+        writer.insert({"status": "pending", "amount": 2.0})
+
+        self.assertEqual(sorted(p["id"] for p in reader.all()), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
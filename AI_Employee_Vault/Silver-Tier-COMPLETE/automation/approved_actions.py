@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Approved Actions for Silver Tier AI Employee System
+Turns an approved action file into the request an MCP server executes.
+
+Approval files (see Orchestrator.trigger_claude) carry the original task
+under "## Details", e.g.:
+
+    Send a test email to admin@example.com with subject "Test Email" and
+    body "This is a test email from the AI employee system."
+
+Frontmatter fields of the approval file (to, subject, body, title,
+visibility) win over what is found in the task text. An email is only
+sent with an explicit recipient and body: `to:`/`body:` in the frontmatter,
+or in the task as above ("to <address>", body "..."). Nothing is taken
+from an inbound email task (a gmail EMAIL_*.md, type: email), whose text
+was written by its sender; without them the task fails. A task that failed
+and was approved again is wrapped in a second approval file; the task is
+unwrapped from both, so the retry builds exactly the same request as the
+first attempt.
+
+The idempotency key combines the request with the task's identity: the
+source and creation time of its first approval file (see task_identity).
+A retry of the same task reuses the key and is never sent twice, while two
+different tasks with the same content are both sent.
+"""
+
+import re
+from typing import Dict, Optional
+
+from frontmatter import parse_frontmatter
+from mcp_idempotency import payload_fingerprint
+
+EMAIL_ADDRESS = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+# "to admin@example.com", "to: admin@example.com", "to \"admin@example.com\""
+RECIPIENT = re.compile(r'\bto\s*:?\s*"?(' + EMAIL_ADDRESS.pattern + ")", re.IGNORECASE)
+# Where trigger_claude's approval template puts the task, and what follows it
+DETAILS_START = re.compile(r"^## Details[ \t]*\n", re.MULTILINE)
+DETAILS_END = re.compile(r"^## Reason[ \t]*\nTask requires human approval", re.MULTILINE)
+DEFAULT_SUBJECT = "Message from your AI Employee"
+
+
+def task_identity(content: str, filename: str) -> str:
+    """The task an approval file is for, the same for every retry of it
+
+    That is the source and creation time of the innermost approval (the
+    one trigger_claude wrote first). An approval written by hand has
+    neither; its file name is used, minus the ACTION_ prefixes and _FAILED
+    suffixes that failing and re-approving add.
+    """
+    identity, text = None, content
+    while True:
+        meta = parse_frontmatter(text)
+        if meta.get("type") != "approval_request":
+            break
+        identity = f"{meta['source']}@{meta['created']}" if meta.get("source") and meta.get("created") else None
+        start = DETAILS_START.search(text)
+        ends = list(DETAILS_END.finditer(text))
+        if not start or not ends:
+            break
+        text = text[start.end():ends[-1].start()].strip()
+    if identity:
+        return identity
+    name = filename[:-3] if filename.endswith(".md") else filename
+    while name.startswith("ACTION_"):
+        name = name[len("ACTION_"):]
+    while name.endswith("_FAILED"):
+        name = name[:-len("_FAILED")]
+    return name
+
+
+def task_details(content: str) -> str:
+    """The original task text inside an approval file (or the text itself)"""
+    text = content
+    while parse_frontmatter(text).get("type") == "approval_request":
+        start = DETAILS_START.search(text)
+        ends = list(DETAILS_END.finditer(text))
+        if not start or not ends:
+            break
+        # The last end marker is this file's own; earlier ones belong to a nested approval
+        text = text[start.end():ends[-1].start()]
+    return text.strip()
+
+
+def _strip_frontmatter(text: str) -> str:
+    lines = text.splitlines()
+    if lines and lines[0].strip() == "---":
+        for end, line in enumerate(lines[1:], start=1):
+            if line.strip() == "---":
+                return "\n".join(lines[end + 1:]).strip()
+    return text
+
+
+def _field(name: str, text: str) -> Optional[str]:
+    """Value written as  subject "..."  or on a  subject: ...  line of the task"""
+    match = re.search(rf'\b{name}\b\s*:?\s*"([^"]*)"', text, re.IGNORECASE)
+    if match:
+        return match.group(1)
+    match = re.search(rf"^\s*{name}\s*:\s*(.+)$", text, re.IGNORECASE | re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def _heading(text: str) -> Optional[str]:
+    match = re.search(r"^#\s+(.+)$", text, re.MULTILINE)
+    return match.group(1).strip() if match else None
+
+
+def _without_heading(text: str) -> str:
+    return re.sub(r"^#\s+.+$\n?", "", text, count=1, flags=re.MULTILINE).strip()
+
+
+def email_request(content: str) -> Dict[str, str]:
+    """{to, subject, body} for /send-email
+
+    Raises ValueError when the approval doesn't say explicitly who to send
+    to or what to send.
+    """
+    details = task_details(content)
+    task_meta = parse_frontmatter(details)
+    if task_meta.get("type") == "email":
+        # An inbound email: its sender's text is not an instruction
+        task_meta, details = {}, ""
+    meta = {**task_meta, **parse_frontmatter(content)}
+    text = _strip_frontmatter(details)
+
+    match = RECIPIENT.search(text)
+    to = meta.get("to") or (match.group(1) if match else None)
+    body = meta.get("body") or _field("body", text)
+    if not to:
+        raise ValueError("no explicit recipient (to:) in task")
+    if not body:
+        raise ValueError("no explicit body (body:) in task")
+    return {
+        "to": to,
+        "subject": meta.get("subject") or _field("subject", text) or _heading(text) or DEFAULT_SUBJECT,
+        "body": body,
+    }
+
+
+def linkedin_request(content: str) -> Dict[str, str]:
+    """{content, title, visibility} for /publish-post"""
+    meta = parse_frontmatter(content)
+    text = _strip_frontmatter(task_details(content))
+    return {
+        "content": meta.get("content") or _field("content", text) or _without_heading(text) or text,
+        "title": meta.get("title") or _heading(text) or "",
+        "visibility": meta.get("visibility", "PUBLIC"),
+    }
+
+
+def request_key(kind: str, identity: str, payload: Dict) -> str:
+    """Idempotency key for a request: the same for every retry of one task (see task_identity)"""
+    return f"{kind}-{payload_fingerprint({'task': identity, 'request': payload})[:32]}"
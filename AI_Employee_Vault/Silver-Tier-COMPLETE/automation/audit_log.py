@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Audit Log for Silver Tier AI Employee System
+Append-only JSON-lines writer shared by the orchestrator and watchers.
+
+Entries go to Logs/YYYY-MM-DD.jsonl, one JSON object per line. Buffered
+entries are written with a single O_APPEND write per flush, so concurrent
+processes never overwrite each other and a line is never split.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+
+class AuditLog:
+    """Buffered, append-only daily JSONL log writer"""
+
+    def __init__(self, logs_dir: Path, flush_interval: float = 1.0, max_buffer: int = 100):
+        self.logs_dir = Path(logs_dir)
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._fd = None
+        self._fd_date = None
+        self._closed = False
+
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def log_file_for(self, log_date: str) -> Path:
+        return self.logs_dir / f"{log_date}.jsonl"
+
+    def log_action(self, action_type: str, target: str, approval_status: str, result: str) -> Dict:
+        """Create structured log entry (compliant with CLAUDE.md)"""
+        log_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "action_type": action_type,
+            "target": target,
+            "approval_status": approval_status,
+            "result": result
+        }
+        self.write(log_entry)
+        return log_entry
+
+    def write(self, entry: Dict):
+        """Buffer one entry; flushes immediately once the buffer is full"""
+        with self._lock:
+            self._buffer.append(entry)
+            if self._closed or len(self._buffer) >= self.max_buffer:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+
+        # Group by day so entries buffered across midnight land in the right file
+        by_date = {}
+        for entry in self._buffer:
+            by_date.setdefault(entry["timestamp"][:10], []).append(entry)
+        self._buffer = []
+
+        for log_date, entries in by_date.items():
+            data = "".join(json.dumps(e, default=str) + "\n" for e in entries).encode()
+            if self._closed or log_date < (self._fd_date or ""):
+                # After close(), or a late entry for an earlier day: append
+                # without keeping (or rotating) the descriptor
+                fd = self._open(log_date)
+                try:
+                    self._write_all(fd, data)
+                finally:
+                    os.close(fd)
+            else:
+                self._write_all(self._fd_for(log_date), data)
+
+    @staticmethod
+    def _write_all(fd: int, data: bytes):
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    def _fd_for(self, log_date: str) -> int:
+        """Return the append descriptor for a day, rotating when the day changes"""
+        if self._fd_date != log_date:
+            if self._fd is not None:
+                os.close(self._fd)
+            self._fd = self._open(log_date)
+            self._fd_date = log_date
+        return self._fd
+
+    def _open(self, log_date: str) -> int:
+        return os.open(self.log_file_for(log_date), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Audit log flush failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_locked()
+            self._closed = True
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._fd_date = None
+
+
+def iter_log_file(log_file: Path) -> Iterator[Dict]:
+    """Yield entries from a JSONL log or a legacy JSON-array log"""
+    with open(log_file, 'r') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == "[":
+            try:
+                yield from json.load(f)
+            except json.JSONDecodeError:
+                return
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Torn final line from a crashed writer
+                continue
+
+
+def read_log_entries(logs_dir: Path, log_date: str) -> List[Dict]:
+    """Load all entries for a day from both the legacy and the JSONL file"""
+    entries = []
+    for suffix in (".json", ".jsonl"):
+        log_file = Path(logs_dir) / f"{log_date}{suffix}"
+        if log_file.exists():
+            entries.extend(iter_log_file(log_file))
+    return entries
+
+
+def read_recent_entries(logs_dir: Path, count: int) -> List[Dict]:
+    """Return the last `count` entries from the most recent day that has logs"""
+    days = sorted({p.stem for p in Path(logs_dir).glob("????-??-??.json*")}, reverse=True)
+    recent = deque(maxlen=count)
+    for log_date in days:
+        recent.extend(read_log_entries(logs_dir, log_date))
+        if recent:
+            break
+    return list(recent)
+
+
+_shared_logs = {}
+_shared_lock = threading.Lock()
+
+
+def get_audit_log(logs_dir: Path) -> AuditLog:
+    """Return the process-wide AuditLog for a logs directory"""
+    key = Path(logs_dir).resolve()
+    with _shared_lock:
+        if key not in _shared_logs:
+            _shared_logs[key] = AuditLog(key)
+        return _shared_logs[key]
+
+
+def reset_shared_logs():
+    """Forget the process-wide AuditLogs, e.g. the ones a forked child inherited
+
+    An inherited AuditLog has no flusher thread in the child, and its lock
+    (or the shared lock) may have been held by another parent thread at
+    fork time, so it must not be used; the next get_audit_log() builds a
+    fresh one. Entries still buffered in the parent are flushed by the parent.
+    """
+    global _shared_lock
+    _shared_lock = threading.Lock()
+    _shared_logs.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_shared_logs)
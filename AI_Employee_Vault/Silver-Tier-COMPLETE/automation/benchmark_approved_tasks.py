@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark for approved-task execution against the local MCP servers
+Starts the MCP gateway on a temporary database, writes approved email and
+LinkedIn tasks into a temporary vault and times Orchestrator.execute_approved_task
+over all of them on a thread pool, with three MCP client setups:
+
+- per-request: a new HTTP connection for every call (urllib, no pooling)
+- pooled: MCPServices, one keep-alive session shared by all threads
+- pooled+batch: as pooled, with concurrent emails gathered into
+  /send-emails:batch requests (--batch-window)
+
+Finally it points the client at a server that accepts connections but
+never answers, to show the circuit breakers: only the first
+BREAKER_FAILURES calls per service wait for the request timeout, the rest
+fail at once.
+
+Usage: python benchmark_approved_tasks.py [--tasks N] [--threads T]
+                                          [--batch-window SECONDS] [--port PORT]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import logging
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+import urllib.error
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import orchestrator
+from dashboard import DashboardEvents
+from mcp_client import BREAKER_FAILURES, MCPError, MCPServices, MCPUnavailable
+from mcp_idempotency import IDEMPOTENCY_HEADER
+
+GATEWAY = Path(__file__).parent / "mcp_gateway.py"
+START_TIMEOUT = 30
+OUTAGE_TASKS = 20
+OUTAGE_TIMEOUT = 0.5  # Request timeout while the server hangs
+
+
+class PerRequestServices:
+    """MCPServices stand-in that opens a new connection for every request"""
+
+    def __init__(self, email_url: str, linkedin_url: str):
+        self.email_url = email_url
+        self.linkedin_url = linkedin_url
+
+    @staticmethod
+    def _post(url, payload, idempotency_key):
+        request = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                         headers={"Content-Type": "application/json",
+                                                  IDEMPOTENCY_HEADER: idempotency_key})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise MCPError(e.code, e.read().decode()) from e
+        except OSError as e:
+            raise MCPUnavailable(str(e)) from e
+
+    def send_email(self, to, subject, body, idempotency_key=None):
+        return self._post(f"{self.email_url}/send-email",
+                          {"to": to, "subject": subject, "body": body}, idempotency_key)
+
+    def publish_post(self, content, title="", visibility="PUBLIC", idempotency_key=None):
+        return self._post(f"{self.linkedin_url}/publish-post",
+                          {"content": content, "title": title, "visibility": visibility}, idempotency_key)
+
+    def close(self):
+        pass
+
+
+def approval_file(task: str) -> str:
+    """An approved action file as Orchestrator.trigger_claude writes it"""
+    return f"""---
+type: approval_request
+action: send_email
+created: 2026-03-04 16:17:50
+priority: medium
+source: task.md
+---
+
+## Action Required
+Execute action for task: task.md
+
+## Details
+{task}
+
+## Reason
+Task requires human approval before execution per Silver Tier HITL policy.
+
+---
+[HUMAN: Move this file to /Approved/ to execute, or /Rejected/ to cancel]
+"""
+
+
+def write_tasks(vault: Path, label: str, count: int):
+    names = []
+    for i in range(count):
+        if i % 4 == 3:
+            task = f"# Update {i}\nPost on LinkedIn: {label} run, product update number {i}."
+        else:
+            task = (f"# Follow-up {i}\nSend an email to client{i}@example.com with subject "
+                    f"\"{label} follow-up {i}\" and body \"Thanks for your time, see you soon.\"")
+        name = f"ACTION_{label}_{i:05d}.md"
+        (vault / "Approved" / name).write_text(approval_file(task))
+        names.append(name)
+    return names
+
+
+def execute_all(worker, names, threads):
+    """Run every approved task on a thread pool; returns (seconds, failures)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker.execute_approved_task, names))
+    elapsed = time.perf_counter() - start
+    failed = len(list((orchestrator.NEEDS_ACTION_DIR).glob("*_FAILED.md")))
+    return elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--batch-window", type=float, default=0.005)
+    parser.add_argument("--port", type=int, default=8098)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    orchestrator.print = lambda *a, **k: None  # One line per task would dominate the timing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = Path(tmp)
+        for name in ("Needs_Action", "Approved", "Done", "Logs"):
+            (vault / name).mkdir()
+        orchestrator.NEEDS_ACTION_DIR = vault / "Needs_Action"
+        orchestrator.APPROVED_DIR = vault / "Approved"
+        orchestrator.DONE_DIR = vault / "Done"
+        orchestrator.LOGS_DIR = vault / "Logs"
+        orchestrator.JOURNAL_DIR = vault / ".state" / "journal"
+
+        base_url = f"http://127.0.0.1:{args.port}"
+        email_url, linkedin_url = f"{base_url}/email", f"{base_url}/linkedin"
+        server = subprocess.Popen(
+            [sys.executable, str(GATEWAY), "--host", "127.0.0.1", "--port", str(args.port)],
+            env=dict(os.environ, MCP_STORAGE=f"sqlite:{vault / 'mcp.sqlite3'}"),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + START_TIMEOUT
+            while True:
+                try:
+                    urllib.request.urlopen(f"{base_url}/health", timeout=1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("gateway did not start")
+                    time.sleep(0.1)
+
+            setups = [
+                ("per-request", lambda: PerRequestServices(email_url, linkedin_url)),
+                ("pooled", lambda: MCPServices(email_url, linkedin_url)),
+                ("pooled+batch", lambda: MCPServices(email_url, linkedin_url,
+                                                     batch_window=args.batch_window)),
+            ]
+            print(f"{args.tasks} approved tasks (3/4 email, 1/4 LinkedIn), {args.threads} threads")
+            print(f"{'client':<13} {'seconds':>8} {'tasks/s':>8} {'failed':>7}")
+            baseline = None
+            for label, make_services in setups:
+                names = write_tasks(vault, label.replace("+", "_"), args.tasks)
+                worker = orchestrator.Orchestrator(dashboard=DashboardEvents())
+                worker.mcp = make_services()
+                elapsed, failed = execute_all(worker, names, args.threads)
+                worker.mcp.close()
+                worker.audit_log.flush()
+                baseline = baseline or elapsed
+                speedup = f"   {baseline / elapsed:.1f}x" if label != setups[0][0] else ""
+                print(f"{label:<13} {elapsed:>8.2f} {args.tasks / elapsed:>8.0f} {failed:>7}{speedup}")
+
+            # Each setup published its own posts once
+            with urllib.request.urlopen(f"{linkedin_url}/published-posts?limit=1") as response:
+                posts = json.loads(response.read())["total_count"]
+            print(f"posts published: {posts} (expected {len(setups) * (args.tasks // 4)})")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+        # A hung server: the kernel completes connections, nobody answers
+        hung = socket.socket()
+        hung.bind(("127.0.0.1", 0))
+        hung.listen(OUTAGE_TASKS)
+        hung_url = f"http://127.0.0.1:{hung.getsockname()[1]}"
+        names = write_tasks(vault, "outage", OUTAGE_TASKS)
+        worker = orchestrator.Orchestrator(dashboard=DashboardEvents())
+        worker.mcp = MCPServices(f"{hung_url}/email", f"{hung_url}/linkedin", timeout=OUTAGE_TIMEOUT)
+        timings = []
+        start = time.perf_counter()
+        for name in names:
+            call_start = time.perf_counter()
+            try:
+                worker.execute_approved_task(name)
+            except Exception:
+                pass
+            timings.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+        breakers = worker.mcp.breakers()
+        worker.mcp.close()
+        hung.close()
+        waited = sum(1 for t in timings if t >= OUTAGE_TIMEOUT * 0.9)
+        print(f"\nHung server, {OUTAGE_TASKS} tasks in {elapsed:.2f} s, all moved to Needs_Action as _FAILED")
+        print(f"  {waited} waited for the {OUTAGE_TIMEOUT} s timeout, {OUTAGE_TASKS - waited} failed fast; "
+              f"circuits: {breakers}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the task classifier
+Compares the original repeated lower()/`in` routing, a single combined
+regex scan and TaskClassifier on synthetic task bodies of increasing size.
+
+Usage: python benchmark_classifier.py [--runs N]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from task_classifier import get_classifier
+
+WORDS = ["please", "review", "the", "attached", "quarterly", "report", "client", "invoice",
+         "meeting", "tomorrow", "team", "update", "project", "status", "thanks", "regards"]
+KEYWORDS = ["email", "send", "payment", "post", "linkedin", "urgent", "asap", "critical"]
+
+
+def legacy_classify(task_content):
+    """Routing exactly as trigger_claude + execute_approved_task did it before"""
+    requires_approval = any(word in task_content.lower() for word in ['email', 'send', 'payment', 'post', 'linkedin'])
+    if 'email' in task_content.lower():
+        action_type = 'send_email'
+    elif 'linkedin' in task_content.lower() or 'post' in task_content.lower():
+        action_type = 'linkedin_post'
+    elif 'payment' in task_content.lower():
+        action_type = 'payment'
+    else:
+        action_type = 'general_action'
+    priority = 'high' if any(word in task_content.lower() for word in ['urgent', 'asap', 'critical']) else 'medium'
+
+    if 'linkedin' in task_content.lower() or 'post' in task_content.lower():
+        execute_type = "linkedin_post"
+    elif 'email' in task_content.lower() or 'send' in task_content.lower():
+        execute_type = "email_send"
+    else:
+        execute_type = "general_task"
+    return action_type, execute_type, priority, requires_approval
+
+
+COMBINED = re.compile("|".join(sorted(KEYWORDS, key=len, reverse=True)))
+
+
+def regex_scan(task_content):
+    """One pass of a combined alternation over the lowered text"""
+    return frozenset(COMBINED.findall(task_content.lower()))
+
+
+def make_body(rng, size, keyword_count):
+    words = [rng.choice(WORDS) for _ in range(size // 7)]
+    for _ in range(keyword_count):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS).upper() if rng.random() < 0.3 else rng.choice(KEYWORDS))
+    return " ".join(words)
+
+
+def timed(func, bodies, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        for body in bodies:
+            func(body)
+    return (time.perf_counter() - start) / (runs * len(bodies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    classifier = get_classifier()
+
+    print(f"{'body size':>10} {'legacy us':>10} {'regex us':>10} {'classifier us':>14} {'speedup':>8}")
+    for size in (500, 5_000, 50_000, 500_000):
+        bodies = [make_body(rng, size, rng.randrange(0, 4)) for _ in range(20)]
+
+        for body in bodies:
+            c = classifier.classify(body)
+            assert legacy_classify(body) == (c.action_type, c.execute_type, c.priority, c.requires_approval)
+
+        runs = max(1, args.runs * 500 // size)
+        legacy = timed(legacy_classify, bodies, runs)
+        regex = timed(regex_scan, bodies, runs)
+        single = timed(classifier.classify, bodies, runs)
+        print(f"{size:>10} {legacy * 1e6:>10.1f} {regex * 1e6:>10.1f} {single * 1e6:>14.1f} {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Email MCP server's SMTP delivery
+Delivers the same messages three ways against a local SMTP sink and times
+each run until the last message is accepted:
+
+- smtplib: one SMTP session per message, 10 threads (the old transport)
+- per-item: one /send-email request per message, delivery queue behind it
+- batched: /send-emails:batch through EmailMCPClient, delivery queue behind it
+
+The built-in sink advertises PIPELINING; `--sink aiosmtpd` uses an aiosmtpd
+server instead (no PIPELINING, so the queue sends commands one at a time).
+
+Usage: python benchmark_email_batch.py [--messages N] [--smtp-latency SECONDS]
+                                       [--connect-latency SECONDS] [--pool-size P]
+                                       [--batch-size B] [--sink builtin|aiosmtpd]
+"""
+
+import asyncio
+import argparse
+import logging
+import smtplib
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from aiohttp.test_utils import TestServer
+
+from email_mcp_server import EMAILS, EMAIL_SEARCH_FIELDS, EmailMCPServer, email_record
+from mcp_client import EmailMCPClient
+from mcp_storage import SQLiteStore
+from smtp_delivery import DEFAULT_SENDER, DeliveryQueue, SMTPClient, build_message
+
+try:
+    from aiosmtpd.controller import Controller
+    HAS_AIOSMTPD = True
+except ImportError:
+    HAS_AIOSMTPD = False
+
+BASELINE_THREADS = 10
+
+
+class SMTPSink:
+    """Minimal pipelining SMTP server on its own thread; counts accepted messages"""
+
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.accepted = 0
+        self.port = None
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    async def _session(self, reader, writer):
+        if self.connect_latency:
+            await asyncio.sleep(self.connect_latency)  # Handshake/greeting delay
+        writer.write(b"220 sink ESMTP\r\n")
+        in_data = False
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    if self.latency:
+                        await asyncio.sleep(self.latency)  # Queueing/relay time
+                    self.accepted += 1
+                    writer.write(b"250 OK queued\r\n")
+                    await writer.drain()
+                continue
+            verb = line[:4].upper()
+            if verb == b"EHLO":
+                writer.write(b"250-sink\r\n250 PIPELINING\r\n")
+            elif verb == b"DATA":
+                in_data = True
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+            elif verb == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._session, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def stop(self):
+        pass
+
+
+class AiosmtpdSink:
+    """aiosmtpd server with a counting handler; same interface as SMTPSink"""
+
+    def __init__(self, latency: float = 0.0, connect_latency: float = 0.0):
+        self.latency = latency
+        self.accepted = 0
+        self.port = 8025
+        self._controller = Controller(self, hostname="127.0.0.1", port=self.port)
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.accepted += 1
+        return "250 OK queued"
+
+    def start(self):
+        self._controller.start()
+
+    def stop(self):
+        self._controller.stop()
+
+
+def make_emails(count):
+    return [{"to": f"client{i}@example.com", "subject": f"Invoice #{i}",
+             "body": f"Please find invoice #{i} attached. Amount due: ${100 + i}."}
+            for i in range(count)]
+
+
+def smtplib_send(port, record):
+    message = build_message(record, DEFAULT_SENDER)
+    with smtplib.SMTP("127.0.0.1", port, timeout=30) as smtp:
+        smtp.sendmail(message.sender, message.recipients, message.data)
+
+
+async def run_baseline(port, emails):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(BASELINE_THREADS)
+
+    async def send(email):
+        async with semaphore:
+            await loop.run_in_executor(None, smtplib_send, port, email_record(email, "sent"))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(email) for email in emails))
+    return time.perf_counter() - start
+
+
+async def run(args):
+    sink_class = AiosmtpdSink if args.sink == "aiosmtpd" else SMTPSink
+    sink = sink_class(args.smtp_latency, args.connect_latency)
+    sink.start()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    store = SQLiteStore(Path(tmp_dir.name) / "benchmark.sqlite3", {EMAILS: EMAIL_SEARCH_FIELDS})
+    delivery = DeliveryQueue(lambda: SMTPClient("127.0.0.1", sink.port),
+                             pool_size=args.pool_size, domain_rate=0)
+    server = EmailMCPServer(store, delivery)
+
+    emails = make_emails(args.messages)
+    timings = {"smtplib": await run_baseline(sink.port, emails)}
+
+    async with TestServer(server.make_app()) as test_server:
+        base_url = str(test_server.make_url(""))
+        async with EmailMCPClient(base_url, batch_size=args.batch_size) as client:
+            start = time.perf_counter()
+            for email in emails:
+                await client.send_email(**email)
+            await delivery.wait_idle()
+            timings["per-item"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = await client.send_emails(emails)
+            await delivery.wait_idle()
+            timings["batched"] = time.perf_counter() - start
+
+    assert all(r["success"] for r in results), "batch reported failures"
+    assert delivery.stats["sent"] == 2 * args.messages, f"queue stats {delivery.stats}"
+    assert sink.accepted == 3 * args.messages, f"sink accepted {sink.accepted}"
+
+    print(f"{args.messages} messages, {args.sink} sink, SMTP latency {args.smtp_latency * 1000:.0f} ms, "
+          f"connect latency {args.connect_latency * 1000:.0f} ms, pool size {args.pool_size}")
+    print(f"{'mode':<10} {'seconds':>8} {'msgs/s':>8}")
+    for mode, seconds in timings.items():
+        speedup = f"   {timings['smtplib'] / seconds:.1f}x" if mode != "smtplib" else ""
+        print(f"{mode:<10} {seconds:>8.2f} {args.messages / seconds:>8.0f}{speedup}")
+    store.close()
+    tmp_dir.cleanup()
+    sink.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--smtp-latency", type=float, default=0.005)
+    parser.add_argument("--connect-latency", type=float, default=0.02)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--sink", choices=["builtin", "aiosmtpd"], default="builtin")
+    args = parser.parse_args()
+    if args.sink == "aiosmtpd" and not HAS_AIOSMTPD:
+        parser.error("aiosmtpd is not installed (pip install aiosmtpd)")
+
+    logging.disable(logging.INFO)  # Per-request access logs would dominate the timing
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Gmail watcher
+Runs the old per-message fetch loop and the batched, deduplicated loop
+against MockGmailService with a simulated per-round-trip latency, then
+compares query-mode polling with history-ID incremental sync while new
+mail keeps arriving in a heavy inbox.
+
+Usage: python benchmark_gmail.py [--messages N] [--polls P] [--latency SECONDS] [--arrivals K]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import gmail_watcher
+from gmail_watcher import (MockGmailService, SeenMessageStore, fetch_messages,
+                           incremental_sync, list_unread_ids, process_new_messages)
+
+
+def legacy_poll(service, message_ids):
+    """The original check_new_emails: one get per message, a task every time"""
+    tasks = 0
+    for message_id in message_ids:
+        message = service.users().messages().get(userId='me', id=message_id).execute()
+        gmail_watcher.create_task_from_email({'id': message_id, 'snippet': message.get('snippet', '')})
+        tasks += 1
+    return tasks
+
+
+def batched_poll(service, seen_store, message_ids):
+    tasks = 0
+    for message in fetch_messages(service, seen_store.unseen(message_ids)):
+        gmail_watcher.create_task_from_email({'id': message['id'], 'snippet': message.get('snippet', '')})
+        seen_store.mark_seen([message['id']])
+        tasks += 1
+    return tasks
+
+
+def run(label, poll, service, message_ids, polls):
+    service.http_requests = 0
+    start = time.perf_counter()
+    tasks = sum(poll(message_ids) for _ in range(polls))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:>8.2f}s {service.http_requests:>10} {tasks:>8}")
+
+
+def run_sync(label, sync, args, tmp):
+    """Initial sync of a heavy inbox, then polls with `arrivals` new messages each"""
+    service = MockGmailService(message_count=args.messages, latency=args.latency)
+    seen_store = SeenMessageStore(tmp / f"{label}.sqlite3")
+    sync(service, seen_store)  # Warm-up: first sync of the existing inbox
+
+    service.http_requests = 0
+    start = time.perf_counter()
+    arrived = []
+    for poll in range(args.polls):
+        for i in range(args.arrivals):
+            message_id = f"new_{poll:04d}_{i:04d}"
+            service.add_message(message_id, f"New message {i}")
+            arrived.append(message_id)
+        sync(service, seen_store)
+    elapsed = time.perf_counter() - start
+    missed = len(seen_store.unseen(arrived))
+    print(f"{label:<12} {elapsed:>8.2f}s {service.http_requests:>10} {len(arrived) - missed:>8} {missed:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--polls", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--arrivals", type=int, default=25, help="New messages per poll in the sync scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gmail_watcher.NEEDS_ACTION_DIR = tmp / "Needs_Action"
+        gmail_watcher.NEEDS_ACTION_DIR.mkdir()
+        gmail_watcher.log_action = lambda *a: None
+        gmail_watcher.print = lambda *a, **k: None
+
+        service = MockGmailService(message_count=args.messages, latency=args.latency)
+        message_ids = [m['id'] for m in service.users().messages().list(maxResults=args.messages).execute()['messages']]
+        print(f"{args.messages} unread messages, {args.polls} polls, {args.latency * 1000:.1f} ms per round trip")
+        print(f"{'mode':<10} {'time':>9} {'requests':>10} {'tasks':>8}")
+
+        run("legacy", lambda ids: legacy_poll(service, ids), service, message_ids, args.polls)
+
+        seen_store = SeenMessageStore(tmp / "seen.sqlite3")
+        run("batched", lambda ids: batched_poll(service, seen_store, ids), service, message_ids, args.polls)
+
+        print(f"\nSync: {args.polls} polls with {args.arrivals} new messages each")
+        print(f"{'mode':<12} {'time':>9} {'requests':>10} {'tasks':>8} {'missed':>8}")
+        run_sync("query", lambda svc, store: process_new_messages(svc, store, list_unread_ids(svc, max_results=10)),
+                 args, tmp)
+        run_sync("incremental", incremental_sync, args, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark for multi-worker MCP serving
+Starts the MCP gateway with --workers 1, 2, 4, ... on a temporary SQLite
+database and drives it from several load-generator processes, reporting
+requests per second for each worker count:
+
+- read: GET /linkedin/published-posts?limit=10 (keyset page + count)
+- write: POST /linkedin/publish-post (one SQLite transaction per request)
+
+Throughput can only scale up to the number of cores; the load generators
+need cores too, so on a machine with C cores expect gains up to roughly C/2
+workers. Writes scale less than reads: SQLite serializes writers.
+
+Usage: python benchmark_http_workers.py [--workers 1,2,4] [--endpoint read|write]
+                                        [--duration SECONDS] [--clients N]
+                                        [--concurrency C] [--port PORT]
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+import aiohttp
+
+GATEWAY = Path(__file__).parent / "mcp_gateway.py"
+SEED_POSTS = 1000
+START_TIMEOUT = 30
+
+
+async def wait_until_up(base_url: str):
+    deadline = time.monotonic() + START_TIMEOUT
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"gateway at {base_url} did not start")
+            await asyncio.sleep(0.1)
+
+
+async def seed(base_url: str, posts: int):
+    async with aiohttp.ClientSession() as session:
+        for i in range(posts):
+            visibility = "PUBLIC" if i % 3 else "CONNECTIONS_ONLY"
+            async with session.post(f"{base_url}/linkedin/publish-post",
+                                    json={"content": f"seed post {i}", "visibility": visibility}) as response:
+                response.raise_for_status()
+
+
+async def generate_load(base_url: str, endpoint: str, duration: float, concurrency: int):
+    """Keep `concurrency` requests in flight for `duration` seconds; returns (ok, errors)"""
+    ok = errors = 0
+    deadline = time.monotonic() + duration
+
+    async def loop(session):
+        nonlocal ok, errors
+        n = 0
+        while time.monotonic() < deadline:
+            n += 1
+            try:
+                if endpoint == "write":
+                    request = session.post(f"{base_url}/linkedin/publish-post",
+                                           json={"content": f"benchmark post {n}"})
+                else:
+                    request = session.get(f"{base_url}/linkedin/published-posts?limit=10")
+                async with request as response:
+                    await response.read()
+                    if response.status == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(loop(session) for _ in range(concurrency)))
+    return ok, errors
+
+
+def load_process(base_url, endpoint, duration, concurrency, results):
+    results.put(asyncio.run(generate_load(base_url, endpoint, duration, concurrency)))
+
+
+def measure(args, workers: int) -> dict:
+    tmp_dir = tempfile.TemporaryDirectory()
+    env = dict(os.environ, MCP_STORAGE=f"sqlite:{Path(tmp_dir.name) / 'benchmark.sqlite3'}")
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, str(GATEWAY), "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(workers)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_until_up(base_url))
+        asyncio.run(seed(base_url, SEED_POSTS))
+
+        results = multiprocessing.Queue()
+        clients = [multiprocessing.Process(target=load_process,
+                                           args=(base_url, args.endpoint, args.duration,
+                                                 args.concurrency, results))
+                   for _ in range(args.clients)]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        totals = [results.get() for _ in clients]
+        elapsed = time.perf_counter() - start
+        for client in clients:
+            client.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+        tmp_dir.cleanup()
+
+    ok = sum(t[0] for t in totals)
+    return {"ok": ok, "errors": sum(t[1] for t in totals), "rps": ok / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--endpoint", choices=["read", "write"], default="read")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+                        help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="requests in flight per load-generator process")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+    worker_counts = [int(n) for n in args.workers.split(",")]
+
+    print(f"{args.endpoint} load, {args.clients} clients x {args.concurrency} in flight, "
+          f"{args.duration:.0f} s per run, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'req/s':>9} {'errors':>7} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        result = measure(args, workers)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:>9.0f} {result['errors']:>7} "
+              f"{result['rps'] / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
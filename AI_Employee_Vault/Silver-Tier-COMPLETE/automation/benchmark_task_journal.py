@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the task transition journal
+Two measurements on a temporary directory:
+
+- Journalled transitions per second (begin + end) from T threads, with
+  every begin fsynced on its own versus TaskJournal's group commit.
+- Restart recovery time as the vault grows: TaskJournal.unfinished() reads
+  only the journal, a rescan lists every vault directory.
+
+Usage: python benchmark_task_journal.py [--transitions N] [--threads T]
+                                        [--vault-sizes N,N,...]
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from task_journal import TaskJournal
+
+VAULT_DIRS = ("Needs_Action", "Plans", "Pending_Approval", "Approved", "Done")
+UNFINISHED = 8  # Transitions open at the simulated crash
+
+
+class SyncEachJournal:
+    """Baseline: one write + fsync per begin, under one lock"""
+
+    def __init__(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(path / "journal.jsonl", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.lock = threading.Lock()
+        self.ids = 0
+
+    def begin(self, task, stage, src, claimed=None, outputs=()):
+        with self.lock:
+            self.ids += 1
+            os.write(self.fd, (json.dumps({"txn": self.ids, "op": "begin", "task": task,
+                                           "stage": stage, "src": str(src)}) + "\n").encode())
+            os.fsync(self.fd)
+            return self.ids
+
+    def end(self, txn, result):
+        with self.lock:
+            os.write(self.fd, (json.dumps({"txn": txn, "op": "end", "result": result}) + "\n").encode())
+
+
+def run_transitions(journal, count, threads):
+    def transition(i):
+        txn = journal.begin(f"task_{i}.md", "needs_action", Path(f"Needs_Action/task_{i}.md"),
+                            outputs=[Path(f"Plans/PLAN_task_{i}.md")])
+        journal.end(txn, "done")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(transition, range(count)))
+    return time.perf_counter() - start
+
+
+def rescan(vault: Path):
+    return sum(len(os.listdir(vault / name)) for name in VAULT_DIRS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transitions", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--vault-sizes", default="1000,10000,100000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{args.transitions} transitions, {args.threads} threads")
+        print(f"{'journal':<13} {'seconds':>8} {'trans/s':>8}")
+        baseline = run_transitions(SyncEachJournal(tmp / "sync-each"), args.transitions, args.threads)
+        print(f"{'fsync each':<13} {baseline:>8.2f} {args.transitions / baseline:>8.0f}")
+        journal = TaskJournal(tmp / "group")
+        elapsed = run_transitions(journal, args.transitions, args.threads)
+        journal.close()
+        print(f"{'group commit':<13} {elapsed:>8.2f} {args.transitions / elapsed:>8.0f}"
+              f"   {baseline / elapsed:.1f}x")
+
+        print(f"\nrecovery with {UNFINISHED} unfinished transitions")
+        print(f"{'vault files':>11} {'journal ms':>11} {'rescan ms':>10}")
+        vault = tmp / "vault"
+        for name in VAULT_DIRS:
+            (vault / name).mkdir(parents=True)
+        files = 0
+        for size in (int(n) for n in args.vault_sizes.split(",")):
+            for i in range(files, size):
+                (vault / "Done" / f"task_{i}.md").touch()
+            files = size
+
+            journal_dir = tmp / f"journal-{size}"
+            journal = TaskJournal(journal_dir)
+            run_transitions(journal, args.transitions, 1)
+            for i in range(UNFINISHED):
+                journal.begin(f"open_{i}.md", "approved", vault / "Approved" / f"open_{i}.md")
+            journal.close()
+
+            start = time.perf_counter()
+            unfinished = TaskJournal(journal_dir).unfinished()
+            journal_ms = (time.perf_counter() - start) * 1000
+            assert len(unfinished) == UNFINISHED
+            start = time.perf_counter()
+            rescan(vault)
+            rescan_ms = (time.perf_counter() - start) * 1000
+            print(f"{size:>11} {journal_ms:>11.1f} {rescan_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
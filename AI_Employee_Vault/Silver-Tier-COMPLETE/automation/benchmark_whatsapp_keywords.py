@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark for WhatsApp keyword detection
+Compares the original five-search detect_keywords with KeywordClassifier,
+one message at a time and in bulk, on synthetic chat messages.
+
+Usage: python benchmark_whatsapp_keywords.py [--messages N]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from keyword_classifier import KeywordClassifier
+
+WORDS = ["hi", "thanks", "ok", "see", "you", "tomorrow", "the", "project", "is", "done",
+         "can", "we", "talk", "later", "sent", "photos", "lunch", "great", "news", "team",
+         "café", "İNVOICE", "größe"]
+KEYWORDS = ["invoice", "proforma", "bill", "quote", "URGENT", "asap", "critical", "paid",
+            "payment", "$250", "amount", "meet", "Call", "appointment", "schedule",
+            "client", "customer", "contact", "billing", "payday", "meeting"]
+
+
+def legacy_detect_keywords(message_text):
+    """detect_keywords exactly as WhatsAppWatcher had it before"""
+    keywords = []
+    keyword_patterns = {
+        'invoice': r'\binvoice\b|\b(?:pro)?forma.*bill\b|\bquote\b',
+        'urgent': r'\burgent\b|\basap\b|\bimmediate\b|\bcritical\b',
+        'payment': r'\bpaid\b|\bpayment\b|\bpay\b|\bbill\b|\bamount\b|\$\d+',
+        'meeting': r'\bmeet\b|\bcall\b|\bappointment\b|\bschedule\b',
+        'client': r'\bclient\b|\bcustomer\b|\bcontact\b'
+    }
+
+    for keyword, pattern in keyword_patterns.items():
+        if re.search(pattern, message_text, re.IGNORECASE):
+            keywords.append(keyword)
+
+    return keywords
+
+
+def make_message(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randrange(3, 25))]
+    for _ in range(rng.choice((0, 0, 0, 1, 1, 2))):
+        words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS))
+    return " ".join(words)
+
+
+def timed(label, func, baseline=None):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    speedup = f"{baseline / elapsed:>7.2f}x" if baseline else ""
+    print(f"{label:<28} {elapsed:>8.3f}s {speedup}")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    messages = [make_message(rng) for _ in range(args.messages)]
+    classifier = KeywordClassifier()
+
+    print(f"{args.messages} messages")
+    legacy, expected = timed("legacy detect_keywords", lambda: [legacy_detect_keywords(m) for m in messages])
+    _, single = timed("classifier.classify", lambda: [classifier.classify(m) for m in messages], legacy)
+    _, bulk = timed("classifier.classify_many", lambda: classifier.classify_many(messages), legacy)
+
+    assert single == expected, "classify() disagrees with the original detect_keywords"
+    assert bulk == expected, "classify_many() disagrees with the original detect_keywords"
+    print(f"results identical; {sum(1 for k in expected if k)} messages tagged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Dashboard State for Silver Tier AI Employee System
+Keeps the numbers shown in Dashboard.md in memory so a refresh costs the
+same whether Done/ holds ten files or tens of thousands.
+
+Counts are seeded with one scan at startup and then adjusted from the
+orchestrator's own moves. A directory is only rescanned when its mtime shows
+that something else (a watcher, a human in Obsidian) changed it, plus a
+periodic reconcile as a safety net. The orchestrator passes the mtimes it
+saw just before each change (directory_mtimes()), so a change by someone
+else in between is noticed instead of being hidden behind ours.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from audit_log import read_recent_entries
+
+RECENT_ACTIVITY_SIZE = 5
+COMPLETION_WINDOW = 86400  # "Completed Today" is a rolling 24h window
+
+
+def directory_mtimes(*paths: Path) -> Dict[Path, Optional[int]]:
+    """Directory mtimes to take just before a change and pass to record_move/record_created"""
+    return {path: DashboardState._mtime(path) for path in paths}
+
+
+class DashboardState:
+    """In-memory counters, recent activity and failures for Dashboard.md"""
+
+    def __init__(self, directories: Dict[str, Path], done_dir: Path, logs_dir: Path,
+                 dashboard_file: Path, reconcile_interval: float = 600,
+                 urgent_approvals: Optional[Callable[[], List[str]]] = None):
+        self.directories = directories  # display name -> path, in display order
+        # Names of high-priority files in Pending_Approval (from the frontmatter index)
+        self.urgent_approvals = urgent_approvals
+        self.done_dir = done_dir
+        self.logs_dir = logs_dir
+        self.dashboard_file = dashboard_file
+        self.reconcile_interval = reconcile_interval
+
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._mtimes = {}
+        self._completions = deque()
+        self._recent = deque(maxlen=RECENT_ACTIVITY_SIZE)
+        self._failures = deque(maxlen=RECENT_ACTIVITY_SIZE)
+        self._log_file = None
+        self._log_offset = 0
+        self._last_reconcile = 0.0
+        self._last_body = None
+
+        self._seed()
+
+    # -- counting ---------------------------------------------------------
+
+    def _scan(self, path: Path) -> int:
+        # Logs holds .json/.jsonl files; every other directory is counted by *.md
+        suffix = "" if path == self.logs_dir else ".md"
+        try:
+            with os.scandir(path) as entries:
+                return sum(1 for e in entries if e.name.endswith(suffix))
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _recount(self, path: Path):
+        self._mtimes[path] = self._mtime(path)
+        self._counts[path] = self._scan(path)
+
+    def _seed(self):
+        """One full pass at startup; everything after is incremental"""
+        with self._lock:
+            for path in self.directories.values():
+                self._recount(path)
+
+            cutoff = time.time() - COMPLETION_WINDOW
+            try:
+                with os.scandir(self.done_dir) as entries:
+                    recent = sorted(e.stat().st_mtime for e in entries
+                                    if e.name.endswith(".md") and e.stat().st_mtime > cutoff)
+            except FileNotFoundError:
+                recent = []
+            self._completions.extend(recent)
+
+            self._recent.extend(read_recent_entries(self.logs_dir, RECENT_ACTIVITY_SIZE))
+            self._log_file = self.logs_dir / f"{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+            self._log_offset = self._log_file.stat().st_size if self._log_file.exists() else 0
+            self._last_reconcile = time.monotonic()
+
+    def _adjust(self, path: Path, delta: int, before: Optional[Dict[Path, Optional[int]]]):
+        if path not in self._counts:
+            return
+        if before is not None and path in before and before[path] != self._mtimes.get(path):
+            # Changed by someone else too since our last look: count it
+            self._recount(path)
+            return
+        self._counts[path] = max(0, self._counts[path] + delta)
+        if before is not None and path in before:
+            # Only our own change since the snapshot; don't treat it as external
+            self._mtimes[path] = self._mtime(path)
+        # Without a snapshot the mtime stays stale, so the next render recounts
+
+    def record_created(self, path: Path, before: Optional[Dict[Path, Optional[int]]] = None):
+        """A file was written into `path` by the orchestrator
+
+        `before` is directory_mtimes(path) taken just before the write.
+        """
+        with self._lock:
+            self._adjust(path, +1, before)
+
+    def record_move(self, src_dir: Path, dst_dir: Path,
+                    before: Optional[Dict[Path, Optional[int]]] = None):
+        """The orchestrator moved one file from src_dir to dst_dir
+
+        `before` is directory_mtimes(src_dir, dst_dir) taken just before the move.
+        """
+        with self._lock:
+            self._adjust(src_dir, -1, before)
+            self._adjust(dst_dir, +1, before)
+            if dst_dir == self.done_dir:
+                self._completions.append(time.time())
+
+    def record_failure(self, filename: str, error: str):
+        with self._lock:
+            self._failures.append((filename, error))
+
+    def _refresh(self):
+        """Rescan only directories changed behind our back"""
+        if time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+            for path in self.directories.values():
+                self._recount(path)
+            self._last_reconcile = time.monotonic()
+            return
+
+        for path in self.directories.values():
+            if self._mtime(path) != self._mtimes.get(path):
+                self._recount(path)
+
+    def _tail_log(self):
+        """Read only the log lines appended since the last refresh"""
+        today_file = self.logs_dir / f"{datetime.now().strftime('%Y-%m-%d')}.jsonl"
+        if today_file != self._log_file:
+            self._log_file = today_file
+            self._log_offset = 0
+
+        try:
+            with open(self._log_file, 'rb') as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Leave a partially written last line for the next refresh
+        end = data.rfind(b"\n") + 1
+        self._log_offset += end
+        for line in data[:end].splitlines():
+            try:
+                self._recent.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    # -- rendering --------------------------------------------------------
+
+    def _render_body(self, running: bool) -> str:
+        cutoff = time.time() - COMPLETION_WINDOW
+        while self._completions and self._completions[0] <= cutoff:
+            self._completions.popleft()
+
+        counts = {name: self._counts[path] for name, path in self.directories.items()}
+
+        body = f"""- **System Status**: {'RUNNING' if running else 'STOPPED'}
+
+## Task Metrics
+- **Pending Tasks**: {counts['Needs_Action']}
+- **Pending Approval**: {counts['Pending_Approval']}
+- **Approved Tasks**: {counts['Approved']}
+- **Completed Today**: {len(self._completions)}
+
+## Recent Activity
+"""
+        if self._recent:
+            for log in self._recent:
+                body += f"- {log.get('timestamp')}: {log.get('action_type')} ({log.get('result')})\n"
+        else:
+            body += "- No recent activity logs available\n"
+
+        if self.urgent_approvals and counts.get('Pending_Approval'):
+            urgent = self.urgent_approvals()
+            if urgent:
+                body += "\n## 🔴 High-Priority Approvals\n"
+                for filename in urgent[:RECENT_ACTIVITY_SIZE]:
+                    body += f"- {filename}\n"
+                if len(urgent) > RECENT_ACTIVITY_SIZE:
+                    body += f"- ...and {len(urgent) - RECENT_ACTIVITY_SIZE} more\n"
+
+        body += "\n## Directories Status\n"
+        for name, count in counts.items():
+            body += f"- {name}: {count} items\n"
+
+        if self._failures:
+            body += "\n## ⚠️ Failed Tasks\n"
+            for filename, error in self._failures:
+                body += f"- **{filename}**: {error}\n"
+
+        body += "\n*Dashboard automatically updated by Orchestrator*\n"
+        return body
+
+    def render(self, running: bool = True) -> bool:
+        """Rewrite Dashboard.md if anything besides the timestamp changed
+
+        Returns True when the file was written.
+        """
+        with self._lock:
+            self._refresh()
+            self._tail_log()
+            body = self._render_body(running)
+            if body == self._last_body:
+                return False
+
+            content = f"""# AI Employee Dashboard
+
+## System Status
+- **Last Updated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+{body}"""
+
+            # Write-then-rename so Obsidian never shows a half-written dashboard
+            tmp_file = self.dashboard_file.with_name(f".{self.dashboard_file.name}.tmp")
+            with open(tmp_file, 'w') as f:
+                f.write(content)
+            os.replace(tmp_file, self.dashboard_file)
+            self._last_body = body
+            return True
+
+
+class DashboardEvents:
+    """Stand-in for DashboardState inside pool worker processes
+
+    Records counter updates so the parent process can replay them onto its
+    own DashboardState when the task finishes.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def record_created(self, path: Path, before: Optional[Dict[Path, Optional[int]]] = None):
+        self.events.append(("record_created", (path, before)))
+
+    def record_move(self, src_dir: Path, dst_dir: Path,
+                    before: Optional[Dict[Path, Optional[int]]] = None):
+        self.events.append(("record_move", (src_dir, dst_dir, before)))
+
+    def record_failure(self, filename: str, error: str):
+        self.events.append(("record_failure", (filename, error)))
+
+    def replay(self, dashboard: DashboardState):
+        for name, args in self.events:
+            getattr(dashboard, name)(*args)
@@ -4,24 +4,118 @@ Email MCP Server for Silver Tier AI Employee System
 Implements MCP protocol for email operations
 """
 
+import os
 import asyncio
+import argparse
 import json
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 from aiohttp import web, hdrs
 import logging
 
+from mcp_idempotency import (IDEMPOTENCY_KEYS, IDEMPOTENCY_INDEXES, MAX_KEY_LENGTH, IdempotencyCache,
+                             idempotent, payload_fingerprint, scoped_key)
+from mcp_schema import Field, compile_schema
+from mcp_storage import STATE_DIR, RecordStore, open_store
+from mcp_workers import add_server_arguments, run_app, serve
+from search_index import QueryError
+from smtp_delivery import DeliveryQueue, delivery_from_env
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 routes = web.RouteTableDef()
 
-# Mock email storage (in real implementation, this would connect to actual email service)
-emails_sent = []
+# Sent mail and drafts are kept in a RecordStore (in real implementation,
+# sending would also go through an actual email service)
+EMAILS = 'emails'
+DRAFTS = 'email_drafts'
+OUTBOX = 'email_outbox'  # Emails accepted but not yet delivered or failed for good
+EMAIL_SEARCH_FIELDS = {'subject': 3.0, 'to': 2.0, 'body': 1.0}  # Subject hits rank highest
+DEFAULT_DB_PATH = STATE_DIR / "email_mcp.sqlite3"
+MAX_SEARCH_LIMIT = 100
+MAX_BATCH_SIZE = 1000  # Items per /send-emails:batch or /draft-emails:batch request
+OUTBOX_PAGE_SIZE = 1000  # Outbox entries re-queued per read
+OUTBOX_SWEEP_INTERVAL = 30  # Seconds between looks for outbox entries a stopped worker left
+DELIVERY_DRAIN_TIMEOUT = 10  # Seconds a stopping server keeps delivering queued mail
+
+validate_email = compile_schema({
+    'to': Field(str),
+    'subject': Field(str),
+    'body': Field(str),
+    # Batch items only; see send_emails_batch()
+    'idempotency_key': Field(str, required=False, max_length=MAX_KEY_LENGTH),
+})
+
+
+def send_response(email_id: int, status: str) -> Tuple[Dict, int]:
+    """Body and HTTP status of a /send-email response"""
+    if status == 'queued':
+        return {
+            'success': True,
+            'message': 'Email queued for delivery',
+            'email_id': email_id,
+            'status': status
+        }, 202
+    return {
+        'success': True,
+        'message': 'Email sent successfully',
+        'email_id': email_id,
+        'status': status
+    }, 200
+
+
+def email_record(data: Dict, status: str) -> Dict:
+    return {
+        'to': data['to'],
+        'subject': data['subject'],
+        'body': data['body'],
+        'timestamp': datetime.now().isoformat(),
+        'status': status
+    }
+
+
+def process_alive(pid: Optional[int], own_pid: int) -> bool:
+    """Whether another live process has this pid (outbox entry owners)
+
+    Our own pid counts as not alive: entries we deliver are in _delivering,
+    so one with our pid is left over from an earlier process that had it.
+    """
+    if pid is None or pid == own_pid or os.name == 'nt':
+        return False  # On Windows os.kill would terminate it; one process serves there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
 
 class EmailMCPServer:
-    def __init__(self):
-        self.routes = routes
+    def __init__(self, store: RecordStore = None, delivery: DeliveryQueue = None,
+                 replay_outbox: bool = True):
+        # A store passed in belongs to the caller (e.g. the gateway's shared one)
+        self.owns_store = store is None
+        self.store = store or open_store(os.environ.get('MCP_STORAGE', 'sqlite'), DEFAULT_DB_PATH,
+                                         searchable={EMAILS: EMAIL_SEARCH_FIELDS},
+                                         indexed={IDEMPOTENCY_KEYS: IDEMPOTENCY_INDEXES})
+        # Responses to requests sent with an Idempotency-Key, for replaying retries
+        self.idempotency = IdempotencyCache(self.store)
+        # Without a delivery queue emails are only recorded (mock mode)
+        self.delivery = delivery or delivery_from_env()
+        if self.delivery:
+            self.delivery.on_result = self._on_delivery_result
+        # Re-queue outbox entries whose delivering process is gone (at
+        # startup and every OUTBOX_SWEEP_INTERVAL); each entry records its owner pid
+        self.replay_outbox = replay_outbox
+        self._delivering = set()  # Outbox IDs in this process's delivery queue
+        self._sweeper = None
+        # The handlers below are methods; bind them to this instance so
+        # aiohttp can call handler(request)
+        self.routes = [web.route(r.method, r.path, r.handler.__get__(self), **r.kwargs)
+                       for r in routes]
 
     @routes.get('/health')
     async def health_check(self, request):
@@ -29,39 +123,28 @@ class EmailMCPServer:
         return web.json_response({'status': 'ok', 'service': 'email-mcp'})
 
     @routes.post('/send-email')
+    @idempotent
     async def send_email(self, request):
         """Send an email"""
         try:
             data = await request.json()
 
-            required_fields = ['to', 'subject', 'body']
-            for field in required_fields:
-                if field not in data:
-                    return web.json_response(
-                        {'error': f'Missing required field: {field}'},
-                        status=400
-                    )
-
-            # In a real implementation, this would send the actual email
-            # For now, we'll just log it as sent
-
-            email_record = {
-                'to': data['to'],
-                'subject': data['subject'],
-                'body': data['body'],
-                'timestamp': asyncio.get_event_loop().time(),
-                'status': 'sent'
-            }
+            error = validate_email(data)
+            if error:
+                return web.json_response(
+                    {'error': error},
+                    status=400
+                )
 
-            emails_sent.append(email_record)
+            [email_id], status = self._accept([data])
 
-            logger.info(f"Email sent to {data['to']}: {data['subject']}")
+            if status == 'queued':
+                logger.info(f"Email to {data['to']} queued: {data['subject']}")
+            else:
+                logger.info(f"Email sent to {data['to']}: {data['subject']}")
 
-            return web.json_response({
-                'success': True,
-                'message': 'Email sent successfully',
-                'email_id': len(emails_sent)  # Simple ID for demo
-            })
+            body, http_status = send_response(email_id, status)
+            return web.json_response(body, status=http_status)
 
         except json.JSONDecodeError:
             return web.json_response(
@@ -76,34 +159,28 @@ class EmailMCPServer:
             )
 
     @routes.post('/draft-email')
+    @idempotent
     async def draft_email(self, request):
         """Draft an email (save as draft, don't send)"""
         try:
             data = await request.json()
 
-            required_fields = ['to', 'subject', 'body']
-            for field in required_fields:
-                if field not in data:
-                    return web.json_response(
-                        {'error': f'Missing required field: {field}'},
-                        status=400
-                    )
+            error = validate_email(data)
+            if error:
+                return web.json_response(
+                    {'error': error},
+                    status=400
+                )
 
             # Save as draft (in real implementation, would save to draft folder)
-            draft_record = {
-                'to': data['to'],
-                'subject': data['subject'],
-                'body': data['body'],
-                'timestamp': asyncio.get_event_loop().time(),
-                'status': 'draft'
-            }
+            draft_id = self.store.insert(DRAFTS, email_record(data, 'draft'))
 
             logger.info(f"Email drafted for {data['to']}: {data['subject']}")
 
             return web.json_response({
                 'success': True,
                 'message': 'Email drafted successfully',
-                'draft_id': len(emails_sent) + 1000  # Different ID space for drafts
+                'draft_id': draft_id  # Drafts have their own ID sequence
             })
 
         except json.JSONDecodeError:
@@ -118,31 +195,258 @@ class EmailMCPServer:
                 status=500
             )
 
+    @staticmethod
+    def _validate_batch(data):
+        """Split a batch into per-item results (errors filled in) and valid indexes"""
+        if not isinstance(data, list) or not data:
+            raise ValueError('Request body must be a non-empty JSON array')
+        if len(data) > MAX_BATCH_SIZE:
+            raise ValueError(f'Batch is larger than {MAX_BATCH_SIZE} items')
+
+        results = [None] * len(data)
+        valid = []
+        for index, item in enumerate(data):
+            error = validate_email(item)
+            if error:
+                results[index] = {'index': index, 'success': False, 'error': error}
+            else:
+                valid.append(index)
+        return results, valid
+
+    @staticmethod
+    def _batch_response(results, status=200):
+        failed = sum(1 for result in results if not result['success'])
+        return web.json_response({
+            'success': failed == 0,
+            'results': results,
+            'succeeded': len(results) - failed,
+            'failed': failed
+        }, status=status)
+
+    def _accept(self, items: List[Dict]) -> Tuple[List[int], str]:
+        """Record emails in one write and hand them to the delivery queue
+
+        Returns the email IDs and their status: 'queued', or 'sent' in mock
+        mode. Delivery happens in the background; each outcome is written
+        back to the email record by _on_delivery_result().
+        """
+        if not self.delivery:
+            return self.store.insert_many(EMAILS, [email_record(item, 'sent') for item in items]), 'sent'
+
+        records = [email_record(item, 'queued') for item in items]
+        # One write: a crash in between can't leave a queued email with no outbox entry
+        pid = os.getpid()
+        email_ids, outbox_ids = self.store.insert_linked(
+            EMAILS, records, OUTBOX, lambda email_id, record: {'email_id': email_id, 'owner': pid})
+        for email_id, outbox_id, record in zip(email_ids, outbox_ids, records):
+            self._delivering.add(outbox_id)
+            self.delivery.submit((email_id, outbox_id), record)
+        return email_ids, 'queued'
+
+    def _on_delivery_result(self, job_id, status: str, attempts: int, error: Optional[str]):
+        email_id, outbox_id = job_id
+        record = self.store.get_many(EMAILS, [email_id]).get(email_id)
+        if record is not None:
+            record.update(status=status, attempts=attempts, last_error=error)
+            if status == 'sent':
+                record['sent_at'] = datetime.now().isoformat()
+            self.store.update(EMAILS, email_id, record)
+        if status != 'retrying':
+            self.store.delete(OUTBOX, [outbox_id])
+            self._delivering.discard(outbox_id)
+
+        if status == 'failed':
+            logger.error(f"Email {email_id} failed after {attempts} attempt(s): {error}")
+        elif status == 'retrying':
+            logger.warning(f"Email {email_id} attempt {attempts} failed, will retry: {error}")
+
+    @routes.post('/send-emails:batch')
+    @idempotent
+    async def send_emails_batch(self, request):
+        """Send an array of emails; every item gets its own result
+
+        An item may carry an `idempotency_key`: it is then handled as a
+        /send-email request with that Idempotency-Key, so an email already
+        sent under the key (by this endpoint or /send-email) is not sent
+        again and its result comes back with 'replayed': True.
+        """
+        try:
+            data = await request.json()
+            try:
+                results, valid = self._validate_batch(data)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+
+            single_path = request.path.rsplit('/', 1)[0] + '/send-email'
+            keys, fingerprints = {}, {}
+            for index in valid:
+                item = data[index]
+                if item.get('idempotency_key'):
+                    keys[index] = scoped_key('POST', single_path, item['idempotency_key'])
+                    fingerprints[index] = payload_fingerprint(
+                        {k: v for k, v in item.items() if k != 'idempotency_key'})
+
+            pending, first = [], {}  # first: key -> index of its first item in this batch
+            for index in valid:
+                key = keys.get(index)
+                if key is None:
+                    pending.append(index)
+                elif key in first:
+                    continue  # Filled in from the first item below
+                else:
+                    first[key] = index
+                    entry = self.idempotency.lookup(key)
+                    if entry is None:
+                        pending.append(index)
+                    elif entry['fingerprint'] != fingerprints[index]:
+                        results[index] = {'index': index, 'success': False,
+                                          'error': 'idempotency_key was already used for a different email'}
+                    else:
+                        stored = json.loads(entry['body'])
+                        results[index] = {'index': index, 'success': True, 'email_id': stored['email_id'],
+                                          'status': stored['status'], 'replayed': True}
+
+            status = 'queued' if self.delivery else 'sent'
+            if pending:
+                email_ids, status = self._accept([data[index] for index in pending])
+                for index, email_id in zip(pending, email_ids):
+                    results[index] = {'index': index, 'success': True, 'email_id': email_id,
+                                      'status': status}
+                stored = []
+                for index, email_id in zip(pending, email_ids):
+                    if index in keys:
+                        body, http_status = send_response(email_id, status)
+                        stored.append((keys[index], fingerprints[index], http_status,
+                                       'application/json', json.dumps(body)))
+                if stored:
+                    self.idempotency.save_many(stored)
+
+            for index in valid:
+                if results[index] is None:  # Repeated key within this batch
+                    result = results[first[keys[index]]]
+                    if result['success'] and fingerprints[index] != fingerprints[first[keys[index]]]:
+                        result = {'success': False,
+                                  'error': 'idempotency_key was already used for a different email'}
+                    results[index] = dict(result, index=index)
+
+            logger.info(f"Email batch: {len(pending)} {status}, {len(valid) - len(pending)} replayed, "
+                        f"{len(data) - len(valid)} invalid")
+            return self._batch_response(results, 202 if status == 'queued' else 200)
+
+        except json.JSONDecodeError:
+            return web.json_response(
+                {'error': 'Invalid JSON in request'},
+                status=400
+            )
+        except Exception as e:
+            logger.error(f"Error sending email batch: {e}")
+            return web.json_response(
+                {'error': 'Internal server error'},
+                status=500
+            )
+
+    @routes.post('/draft-emails:batch')
+    @idempotent
+    async def draft_emails_batch(self, request):
+        """Draft an array of emails; every item gets its own result"""
+        try:
+            data = await request.json()
+            try:
+                results, valid = self._validate_batch(data)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+
+            draft_ids = self.store.insert_many(DRAFTS, [email_record(data[index], 'draft')
+                                                        for index in valid])
+            for index, draft_id in zip(valid, draft_ids):
+                results[index] = {'index': index, 'success': True, 'draft_id': draft_id}
+
+            logger.info(f"Email draft batch: {len(valid)} drafted, {len(data) - len(valid)} invalid")
+            return self._batch_response(results)
+
+        except json.JSONDecodeError:
+            return web.json_response(
+                {'error': 'Invalid JSON in request'},
+                status=400
+            )
+        except Exception as e:
+            logger.error(f"Error drafting email batch: {e}")
+            return web.json_response(
+                {'error': 'Internal server error'},
+                status=500
+            )
+
+    @routes.get('/email-status/{email_id}')
+    async def email_status(self, request):
+        """Delivery status of a sent email"""
+        try:
+            email_id = int(request.match_info['email_id'])
+        except ValueError:
+            return web.json_response(
+                {'error': 'email_id must be an integer'},
+                status=400
+            )
+
+        record = self.store.get_many(EMAILS, [email_id]).get(email_id)
+        if record is None:
+            return web.json_response(
+                {'error': 'Email not found'},
+                status=404
+            )
+
+        return web.json_response({
+            'success': True,
+            'email_id': email_id,
+            'status': record['status'],
+            'attempts': record.get('attempts', 0),
+            'last_error': record.get('last_error'),
+            'sent_at': record.get('sent_at')
+        })
+
+    @routes.get('/delivery-queue')
+    async def delivery_queue(self, request):
+        """Counters for the SMTP delivery queue"""
+        if not self.delivery:
+            return web.json_response({'success': True, 'enabled': False})
+        return web.json_response(dict(self.delivery.snapshot(), success=True, enabled=True))
+
     @routes.post('/search-emails')
     async def search_emails(self, request):
         """Search through emails"""
         try:
             data = await request.json()
 
-            query = data.get('query', '').lower()
+            query = data.get('query', '')
             limit = data.get('limit', 10)
-
-            # Search through sent emails
-            results = []
-            for email in emails_sent:
-                if (query in email['to'].lower() or
-                    query in email['subject'].lower() or
-                    query in email['body'].lower()):
-                    results.append(email)
-                    if len(results) >= limit:
-                        break
+            cursor = data.get('cursor')
+            if (not isinstance(query, str) or not isinstance(limit, int) or limit < 1
+                    or not isinstance(cursor, (str, type(None)))):
+                return web.json_response(
+                    {'error': 'query and cursor must be strings and limit a positive integer'},
+                    status=400
+                )
+
+            # Matching and total_found come from the full-text index, never
+            # from a scan of the stored emails
+            page = self.store.search(EMAILS, query, min(limit, MAX_SEARCH_LIMIT), cursor)
+            records = self.store.get_many(EMAILS, [email_id for email_id, _ in page.hits])
+            results = [
+                dict(records[email_id], email_id=email_id, score=round(score, 4))
+                for email_id, score in page.hits if email_id in records
+            ]
 
             return web.json_response({
                 'success': True,
-                'results': results[:limit],
-                'total_found': len(results)
+                'results': results,
+                'total_found': page.total_found,
+                'next_cursor': page.next_cursor
             })
 
+        except QueryError as e:
+            return web.json_response(
+                {'error': str(e)},
+                status=400
+            )
         except json.JSONDecodeError:
             return web.json_response(
                 {'error': 'Invalid JSON in request'},
@@ -155,30 +459,91 @@ class EmailMCPServer:
                 status=500
             )
 
-    async def start_server(self, host='localhost', port=8000):
-        """Start the MCP server"""
-        app = web.Application()
-        app.add_routes(self.routes)
-
-        runner = web.AppRunner(app)
-        await runner.setup()
+    def _adopt_outbox(self) -> int:
+        """Re-queue outbox entries no live process is delivering; returns how many
+
+        An entry is taken over by swapping in our pid as its owner with
+        RecordStore.replace, so when several workers look at once each
+        entry is re-queued by exactly one of them.
+        """
+        pid = os.getpid()
+        pending = 0
+        after = None
+        while True:
+            entries = self.store.page(OUTBOX, OUTBOX_PAGE_SIZE, after)
+            if not entries:
+                break
+            after = entries[-1][0]
+            orphans = [(outbox_id, entry) for outbox_id, entry in entries
+                       if outbox_id not in self._delivering
+                       and not process_alive(entry.get('owner'), pid)]
+            records = self.store.get_many(EMAILS, [entry['email_id'] for _, entry in orphans])
+            for outbox_id, entry in orphans:
+                if not self.store.replace(OUTBOX, outbox_id, entry, dict(entry, owner=pid)):
+                    continue  # Another worker took it first
+                record = records.get(entry['email_id'])
+                if record is None:
+                    self.store.delete(OUTBOX, [outbox_id])
+                    continue
+                self._delivering.add(outbox_id)
+                self.delivery.submit((entry['email_id'], outbox_id), record, record.get('attempts', 0))
+                pending += 1
+        if pending:
+            logger.info(f"Re-queued {pending} undelivered email(s)")
+        return pending
+
+    async def _sweep_outbox(self):
+        """Adopt what stopped or crashed workers leave behind, e.g. after a rolling restart"""
+        while True:
+            await asyncio.sleep(OUTBOX_SWEEP_INTERVAL)
+            try:
+                self._adopt_outbox()
+            except Exception as e:
+                logger.error(f"Error re-queueing the outbox: {e}")
+
+    async def _start_delivery(self, app):
+        """Start the SMTP workers and re-queue whatever stopped workers left undelivered"""
+        await self.delivery.start()
+        if self.replay_outbox:
+            self._adopt_outbox()
+            self._sweeper = asyncio.create_task(self._sweep_outbox())
+
+    async def _stop_delivery(self, app):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        # Give queued mail a moment to go out; whatever is left stays in the
+        # outbox, and a live worker (or the next start) re-queues it once
+        # this process has exited
+        try:
+            await asyncio.wait_for(self.delivery.wait_idle(), DELIVERY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        await self.delivery.stop()
 
-        site = web.TCPSite(runner, host, port)
-        await site.start()
+    async def _close_store(self, app):
+        self.store.close()
 
-        logger.info(f"Email MCP Server running on http://{host}:{port}")
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.idempotency.middleware])
+        app.add_routes(self.routes)
+        if self.delivery:
+            app.on_startup.append(self._start_delivery)
+            app.on_cleanup.append(self._stop_delivery)
+        if self.owns_store:
+            app.on_cleanup.append(self._close_store)
+        return app
 
-        # Keep the server running
-        try:
-            await asyncio.Future()  # Run forever
-        except KeyboardInterrupt:
-            logger.info("Shutting down server...")
-            await runner.cleanup()
+    async def start_server(self, host='localhost', port=8000):
+        """Start the MCP server; runs until SIGINT/SIGTERM"""
+        logger.info(f"Email MCP Server starting on http://{host}:{port}")
+        await run_app(self.make_app(), host, port)
 
 # For standalone execution
-async def main():
-    server = EmailMCPServer()
-    await server.start_server()
+def main():
+    parser = argparse.ArgumentParser(description="Email MCP Server")
+    add_server_arguments(parser, default_port=8000)
+    args = parser.parse_args()
+    serve(lambda: EmailMCPServer().make_app(), args.host, args.port, args.workers)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
\ No newline at end of file
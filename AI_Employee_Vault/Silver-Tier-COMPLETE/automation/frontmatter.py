@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Frontmatter Index for Silver Tier AI Employee System
+Parses the `---` delimited header of vault markdown files and caches it.
+
+Task, plan and approval files all start with a YAML-style block such as:
+
+    ---
+    type: approval_request
+    action: send_email
+    priority: high
+    ---
+
+Only the header is read from disk, and a file is parsed again only when its
+mtime or size changes, so queries like "high-priority pending approvals"
+never read file bodies.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_frontmatter(text: str) -> Dict[str, str]:
+    """Parse the frontmatter block at the start of a markdown string"""
+    lines = text.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return {}
+    return _parse_lines(lines[1:])
+
+
+def _parse_lines(lines) -> Dict[str, str]:
+    meta = {}
+    for line in lines:
+        line = line.strip()
+        if line == "---":
+            break
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip():
+            continue
+        value = value.strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+            value = value[1:-1]
+        meta[key.strip()] = value
+    return meta
+
+
+def read_frontmatter(path: Path) -> Dict[str, str]:
+    """Read only the frontmatter lines of a file"""
+    with open(path, 'r') as f:
+        if f.readline().strip() != "---":
+            return {}
+        header = []
+        for line in f:
+            if line.strip() == "---":
+                break
+            header.append(line)
+        return _parse_lines(header)
+
+
+class FrontmatterIndex:
+    """Frontmatter cache keyed by path, invalidated by (mtime, size)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirs = {}  # directory -> {filename: ((mtime_ns, size), meta)}
+
+    def _lookup(self, path: Path, stat: os.stat_result) -> Dict[str, str]:
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._dirs.get(path.parent, {}).get(path.name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        meta = read_frontmatter(path)
+        with self._lock:
+            self._dirs.setdefault(path.parent, {})[path.name] = (version, meta)
+        return meta
+
+    def get(self, path: Path) -> Optional[Dict[str, str]]:
+        """Frontmatter for one file, or None if it no longer exists"""
+        path = Path(path)
+        try:
+            return self._lookup(path, path.stat())
+        except FileNotFoundError:
+            self.invalidate(path)
+            return None
+
+    def invalidate(self, path: Path):
+        path = Path(path)
+        with self._lock:
+            self._dirs.get(path.parent, {}).pop(path.name, None)
+
+    def scan(self, directory: Path, suffix: str = ".md") -> List[Tuple[Path, Dict[str, str]]]:
+        """(path, frontmatter) for every file in a directory; unchanged files come from cache"""
+        directory = Path(directory)
+        results = []
+        present = set()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(suffix) or not entry.is_file():
+                        continue
+                    path = directory / entry.name
+                    try:
+                        meta = self._lookup(path, entry.stat())
+                    except FileNotFoundError:
+                        continue
+                    present.add(entry.name)
+                    results.append((path, meta))
+        except FileNotFoundError:
+            pass
+
+        # Forget files that left the directory
+        with self._lock:
+            cached = self._dirs.get(directory, {})
+            for name in [n for n in cached if n not in present]:
+                del cached[name]
+        return results
+
+    def query(self, directory: Path, **filters: str) -> List[Tuple[Path, Dict[str, str]]]:
+        """Files in a directory whose frontmatter matches every key=value filter
+
+        e.g. index.query(PENDING_APPROVAL_DIR, priority="high", action="send_email")
+        """
+        return [
+            (path, meta) for path, meta in self.scan(directory)
+            if all(meta.get(key) == value for key, value in filters.items())
+        ]
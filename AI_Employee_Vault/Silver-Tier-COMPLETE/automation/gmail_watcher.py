@@ -7,9 +7,13 @@ Monitors Gmail for important emails and creates task files
 import os
 import time
 import json
+import sqlite3
+import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from audit_log import get_audit_log
 
 try:
     import google.auth
@@ -24,65 +28,192 @@ except ImportError:
 BASE_PATH = Path(__file__).parent.parent  # Go up one level to the main directory
 NEEDS_ACTION_DIR = BASE_PATH / "Needs_Action"
 LOGS_DIR = BASE_PATH / "Logs"
+STATE_DIR = BASE_PATH / ".state"  # Watcher bookkeeping, kept out of the Obsidian view
+BATCH_SIZE = 50  # Gmail allows up to 100 calls per batch; 50 avoids rate-limit errors
+UNREAD_QUERY = 'is:unread category:primary'  # Only unread primary emails
+UNREAD_PRIMARY_LABELS = ('INBOX', 'UNREAD', 'CATEGORY_PERSONAL')  # Label form of UNREAD_QUERY
+SYNC_MODES = ("incremental", "query")
+FETCH_ATTEMPTS = 5  # Polls a message that fails to fetch is retried on before it is given up
 # Ensure Logs folder exists
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
+audit_log = get_audit_log(LOGS_DIR)
 
 
 def log_action(action_type: str, target: str, approval_status: str, result: str):
     """Create structured JSON log entry (compliant with CLAUDE.md)"""
-    timestamp = datetime.now().isoformat()
-    log_entry = {
-        "timestamp": timestamp,
-        "action_type": action_type,
-        "target": target,
-        "approval_status": approval_status,
-        "result": result
-    }
-
-    log_file = LOGS_DIR / f"{datetime.now().strftime('%Y-%m-%d')}.json"
-
-    logs = []
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                logs = json.load(f)
-            except json.JSONDecodeError:
-                logs = []
+    audit_log.log_action(action_type, target, approval_status, result)
+
+
+class _MockRequest:
+    """Deferred call with the googleapiclient `.execute()` interface"""
+
+    def __init__(self, service, func, *args):
+        self.service = service
+        self.func = func
+        self.args = args
+
+    def execute(self):
+        self.service.http_requests += 1
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        return self.func(*self.args)
+
+
+class MockHttpError(Exception):
+    """Mimics googleapiclient.errors.HttpError (exposes resp.status)"""
+
+    class _Resp:
+        def __init__(self, status):
+            self.status = status
 
-    logs.append(log_entry)
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.resp = self._Resp(status)
 
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=2)
+
+class _MockBatch:
+    """Batch of requests sent as one HTTP round trip"""
+
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback or self.callback))
+
+    def execute(self):
+        self.service.http_requests += 1
+        if self.service.latency:
+            time.sleep(self.service.latency)
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.func(*request.args), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class MockGmailService:
+    """Offline stand-in for the Gmail API
+
+    With message_count=0 a new sample email shows up every ~120 seconds.
+    With message_count=N the inbox holds N unread messages, which is what
+    benchmark_gmail.py uses to simulate a heavy inbox. `latency` adds a
+    delay per HTTP round trip and `http_requests` counts them.
+
+    Every added message is also recorded as a history event, so
+    getProfile()/history().list() behave like the real incremental sync
+    API. Only the last `history_retention` events are kept; older start
+    IDs get a 404, which forces a full re-sync just like Gmail.
+    """
+
+    def __init__(self, message_count: int = 0, latency: float = 0.0, history_retention: int = 10000):
+        self.latency = latency
+        self.http_requests = 0
+        self.simulate_arrivals = message_count == 0
+        self.history_retention = history_retention
+        self.history_id = 1000
+        self.history_events = []  # (history_id, message stub), oldest first
+        self.messages_by_id = {}
+        for i in range(message_count):
+            self.add_message(f"mock_{i:08d}", f"Sample email {i} about business")
+
+    def add_message(self, message_id: str, snippet: str, sender: str = "mock.sender@example.com",
+                    subject: str = "Mock Email Subject"):
+        self.messages_by_id[message_id] = {
+            'id': message_id,
+            'threadId': message_id,
+            'snippet': snippet,
+            'labelIds': list(UNREAD_PRIMARY_LABELS),
+            'payload': {'headers': [
+                {'name': 'From', 'value': sender},
+                {'name': 'Subject', 'value': subject},
+            ]},
+        }
+        self.history_id += 1
+        self.history_events.append((self.history_id, {
+            'id': message_id, 'threadId': message_id, 'labelIds': list(UNREAD_PRIMARY_LABELS),
+        }))
+        if len(self.history_events) > self.history_retention:
+            del self.history_events[:len(self.history_events) - self.history_retention]
+
+    def _tick(self):
+        # Create a mock email every ~120 seconds when no fixed inbox was given
+        message_id = f"mock_email_{int(time.time() // 120)}"
+        if self.simulate_arrivals and time.time() % 120 < 10 and message_id not in self.messages_by_id:
+            self.add_message(message_id, 'Sample important email about business')
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def history(self):
+        return _MockHistory(self)
+
+    def getProfile(self, userId='me'):
+        return _MockRequest(self, lambda: {'emailAddress': 'me@example.com', 'historyId': str(self.history_id)})
+
+    def list(self, userId='me', q=None, maxResults=100, pageToken=None):
+        return _MockRequest(self, self._list, maxResults, pageToken)
+
+    def _list(self, max_results, page_token):
+        self._tick()
+        ids = list(reversed(self.messages_by_id))  # Newest first, like Gmail
+        start = int(page_token or 0)
+        page = ids[start:start + max_results]
+        response = {'messages': [{'id': i, 'threadId': i} for i in page],
+                    'resultSizeEstimate': len(ids)}
+        if start + max_results < len(ids):
+            response['nextPageToken'] = str(start + max_results)
+        return response
+
+    def get(self, userId='me', id=None, format=None, metadataHeaders=None):
+        return _MockRequest(self, self._get, id)
+
+    def _get(self, message_id):
+        if message_id not in self.messages_by_id:
+            raise KeyError(f"Message not found: {message_id}")
+        return self.messages_by_id[message_id]
+
+    def new_batch_http_request(self, callback=None):
+        return _MockBatch(self, callback)
+
+
+class _MockHistory:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId='me', startHistoryId=None, historyTypes=None, labelId=None,
+             maxResults=100, pageToken=None):
+        return _MockRequest(self.service, self._list, int(startHistoryId), maxResults, pageToken)
+
+    def _list(self, start_history_id, max_results, page_token):
+        self.service._tick()
+        events = self.service.history_events
+        if events and start_history_id < events[0][0] - 1:
+            raise MockHttpError(404, f"Requested entity was not found (historyId {start_history_id})")
+
+        newer = [e for e in events if e[0] > start_history_id]
+        start = int(page_token or 0)
+        page = newer[start:start + max_results]
+        response = {
+            'history': [{'id': str(h), 'messagesAdded': [{'message': m}]} for h, m in page],
+            'historyId': str(self.service.history_id),
+        }
+        if start + max_results < len(newer):
+            response['nextPageToken'] = str(start + max_results)
+        return response
 
 
-# If Google API is not available, use a mock implementation
 if not HAS_GOOGLE_API:
-    class MockGmailService:
-        def users(self):
-            return self
-
-        def messages(self):
-            return self
-
-        def list(self, userId='me', q=None, maxResults=10):
-            # Return mock response with some sample emails
-            return self
-
-        def execute(self):
-            # Return mock emails
-            return {
-                'messages': [
-                    {
-                        'id': f'mock_email_{int(time.time())}',
-                        'snippet': 'Sample important email about business'
-                    }
-                ] if time.time() % 120 < 10 else {}  # Create a mock email every ~120 seconds
-            }
-
-    def get_gmail_service():
+    def build_gmail_service():
         return MockGmailService()
 else:
-    def get_gmail_service():
+    def build_gmail_service():
         """Authenticate and return Gmail service object"""
         creds = None
         token_path = BASE_PATH / "token.json"
@@ -115,10 +246,109 @@ else:
         return build('gmail', 'v1', credentials=creds)
 
 
+_service = None
+
+
+def get_gmail_service():
+    """Return the cached Gmail service, building it on first use"""
+    global _service
+    if _service is None:
+        _service = build_gmail_service()
+    return _service
+
+
+def reset_gmail_service():
+    """Drop the cached service so the next call re-authenticates"""
+    global _service
+    _service = None
+
+
+class SeenMessageStore:
+    """Persistent set of Gmail message IDs that already produced a task,
+    plus the history ID checkpoint used by incremental sync"""
+
+    def __init__(self, db_path: Path):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_messages (id TEXT PRIMARY KEY, seen_at TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS failed_fetches (id TEXT PRIMARY KEY, attempts INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_history_id(self) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = 'history_id'").fetchone()
+        return row[0] if row else None
+
+    def set_history_id(self, history_id: str):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('history_id', ?)",
+                (str(history_id),),
+            )
+
+    def unseen(self, message_ids: List[str]) -> List[str]:
+        """Return the IDs that have not been seen, keeping their order"""
+        seen = set()
+        for i in range(0, len(message_ids), 500):
+            chunk = message_ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT id FROM seen_messages WHERE id IN ({placeholders})", chunk
+            )
+            seen.update(row[0] for row in rows)
+        return [m for m in message_ids if m not in seen]
+
+    def mark_seen(self, message_ids: List[str]):
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_messages (id, seen_at) VALUES (?, ?)",
+                [(m, now) for m in message_ids],
+            )
+            self.conn.executemany("DELETE FROM failed_fetches WHERE id = ?",
+                                  [(m,) for m in message_ids])
+
+    def failed_fetches(self) -> List[str]:
+        """IDs that failed to fetch on an earlier poll, to be retried"""
+        return [row[0] for row in self.conn.execute("SELECT id FROM failed_fetches ORDER BY rowid")]
+
+    def record_failed_fetches(self, message_ids: List[str]) -> List[str]:
+        """Count a failed fetch for each ID; returns the IDs that are now given up on"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO failed_fetches (id, attempts) VALUES (?, 1) "
+                "ON CONFLICT(id) DO UPDATE SET attempts = attempts + 1",
+                [(m,) for m in message_ids],
+            )
+            exhausted = [row[0] for row in self.conn.execute(
+                "SELECT id FROM failed_fetches WHERE attempts >= ?", (FETCH_ATTEMPTS,))]
+            self.conn.execute("DELETE FROM failed_fetches WHERE attempts >= ?", (FETCH_ATTEMPTS,))
+        return exhausted
+
+
+_seen_store = None
+
+
+def get_seen_store() -> SeenMessageStore:
+    global _seen_store
+    if _seen_store is None:
+        _seen_store = SeenMessageStore(STATE_DIR / "gmail_seen.sqlite3")
+    return _seen_store
+
+
 def create_task_from_email(email_data: Dict):
     """Create a task file from email data"""
     email_id = email_data.get('id', 'unknown')
     snippet = email_data.get('snippet', 'No content')
+    sender = email_data.get('from', 'mock.sender@example.com')
+    subject = email_data.get('subject', 'Mock Email Subject')
 
     # Create task filename
     task_filename = f"EMAIL_{email_id}.md"
@@ -131,17 +361,17 @@ def create_task_from_email(email_data: Dict):
     # Create task content with metadata
     task_content = f"""---
 type: email
-from: mock.sender@example.com
-subject: Mock Email Subject
+from: {sender}
+subject: {subject}
 priority: {priority}
 status: pending
 received_at: {datetime.now().isoformat()}
 ---
 
-# Email from mock.sender@example.com
+# Email from {sender}
 
 ## Subject
-Mock Email Subject
+{subject}
 
 ## Content Preview
 {snippet}
@@ -157,50 +387,175 @@ Please review this email and take appropriate action.
     print(f"Gmail Watcher: Created task {task_filename}")
 
 
-def check_new_emails():
-    """Check for new unread important emails"""
-    try:
-        service = get_gmail_service()
-
-        # Get list of messages
+def fetch_messages(service, message_ids: List[str]) -> List[Dict]:
+    """Fetch message metadata with batched requests (BATCH_SIZE per round trip)"""
+    fetched = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            print(f"Gmail Watcher: failed to fetch {request_id}: {exception}")
+            return
+        fetched[request_id] = response
+
+    for i in range(0, len(message_ids), BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for message_id in message_ids[i:i + BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(
+                    userId='me',
+                    id=message_id,
+                    format='metadata',
+                    metadataHeaders=['From', 'Subject']
+                ),
+                request_id=message_id
+            )
+        batch.execute()
+
+    # Keep list order; messages that failed to fetch are left out (see process_new_messages)
+    return [fetched[m] for m in message_ids if m in fetched]
+
+
+def _header(message: Dict, name: str, default: str) -> str:
+    for header in message.get('payload', {}).get('headers', []):
+        if header.get('name', '').lower() == name.lower():
+            return header.get('value', default)
+    return default
+
+
+def process_new_messages(service, seen_store: SeenMessageStore, message_ids: List[str]) -> int:
+    """Create one task per message that has not produced a task yet
+
+    Messages that failed to fetch on an earlier poll are retried first.
+    Messages that fail now are saved for the next poll before the caller
+    moves the history checkpoint past them.
+    """
+    retry_ids = seen_store.failed_fetches()
+    new_ids = seen_store.unseen(list(dict.fromkeys(retry_ids + message_ids)))
+    if not new_ids:
+        return 0
+
+    messages = fetch_messages(service, new_ids)
+    fetched_ids = {message['id'] for message in messages}
+    failed_ids = [m for m in new_ids if m not in fetched_ids]
+    if failed_ids:
+        for message_id in seen_store.record_failed_fetches(failed_ids):
+            print(f"Gmail Watcher: giving up on {message_id} after {FETCH_ATTEMPTS} failed fetches")
+            log_action("email_fetch", message_id, "auto", "failed: gave up")
+
+    created = 0
+    for message in messages:
+        # Create task if important
+        create_task_from_email({
+            'id': message['id'],
+            'snippet': message.get('snippet', ''),
+            'from': _header(message, 'From', 'mock.sender@example.com'),
+            'subject': _header(message, 'Subject', 'Mock Email Subject'),
+        })
+        seen_store.mark_seen([message['id']])
+        created += 1
+    return created
+
+
+def list_unread_ids(service, max_results: Optional[int] = None) -> List[str]:
+    """List unread primary message IDs, following every page unless max_results is set"""
+    message_ids = []
+    page_token = None
+    while True:
         results = service.users().messages().list(
             userId='me',
-            q='is:unread category:primary',  # Only unread primary emails
-            maxResults=10
+            q=UNREAD_QUERY,
+            maxResults=max_results or 500,
+            pageToken=page_token
+        ).execute()
+        message_ids.extend(msg['id'] for msg in results.get('messages', []))
+        page_token = results.get('nextPageToken')
+        if not page_token or max_results:
+            return message_ids
+
+
+def full_sync(service, seen_store: SeenMessageStore) -> int:
+    """Process every unread primary message, then checkpoint the history ID"""
+    # Take the checkpoint first so mail arriving mid-listing shows up in the next delta
+    history_id = service.users().getProfile(userId='me').execute()['historyId']
+    created = process_new_messages(service, seen_store, list_unread_ids(service))
+    seen_store.set_history_id(history_id)
+    return created
+
+
+def _is_not_found(error: Exception) -> bool:
+    return getattr(getattr(error, 'resp', None), 'status', None) == 404
+
+
+def history_delta(service, start_history_id: str):
+    """Message IDs added since start_history_id, and the new checkpoint"""
+    message_ids = []
+    page_token = None
+    while True:
+        results = service.users().history().list(
+            userId='me',
+            startHistoryId=start_history_id,
+            historyTypes=['messageAdded'],
+            maxResults=500,
+            pageToken=page_token
         ).execute()
+        for record in results.get('history', []):
+            for added in record.get('messagesAdded', []):
+                message = added['message']
+                if set(UNREAD_PRIMARY_LABELS).issubset(message.get('labelIds', [])):
+                    message_ids.append(message['id'])
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return message_ids, results['historyId']
+
+
+def incremental_sync(service, seen_store: SeenMessageStore) -> int:
+    """Fetch only what changed since the last checkpoint"""
+    start_history_id = seen_store.get_history_id()
+    if start_history_id is None:
+        return full_sync(service, seen_store)
 
-        messages = results.get('messages', [])
+    try:
+        message_ids, history_id = history_delta(service, start_history_id)
+    except Exception as e:
+        if not _is_not_found(e):
+            raise
+        # Checkpoint is older than Gmail's history retention
+        print("Gmail Watcher: history checkpoint expired, running full re-sync")
+        log_action("email_resync", "gmail", "auto", "history_expired")
+        return full_sync(service, seen_store)
 
-        for msg in messages:
-            # Get full message details
-            message = service.users().messages().get(
-                userId='me',
-                id=msg['id']
-            ).execute()
+    created = process_new_messages(service, seen_store, message_ids)
+    seen_store.set_history_id(history_id)
+    return created
 
-            # Extract relevant information (simplified)
-            snippet = message.get('snippet', '')
 
-            # Create task if important
-            create_task_from_email({
-                'id': msg['id'],
-                'snippet': snippet
-            })
+def check_new_emails(sync_mode: str = "incremental"):
+    """Check for new unread important emails"""
+    try:
+        service = get_gmail_service()
+        seen_store = get_seen_store()
+
+        if sync_mode == "incremental":
+            incremental_sync(service, seen_store)
+        else:
+            # Original behaviour: re-query the newest unread messages every poll
+            process_new_messages(service, seen_store, list_unread_ids(service, max_results=10))
 
     except Exception as e:
         print(f"Gmail Watcher Error: {e}")
         log_action("email_check", "gmail", "auto", f"failed: {str(e)}")
+        reset_gmail_service()
 
 
-def watch():
+def watch(sync_mode: str = "incremental"):
     """Main watch loop"""
-    print("Gmail Watcher running...")
+    print(f"Gmail Watcher running ({sync_mode} sync)...")
     log_action("watcher_start", "gmail_watcher", "auto", "started")
 
     while True:
         try:
             # Check for new emails every 30 seconds
-            check_new_emails()
+            check_new_emails(sync_mode)
             time.sleep(30)
         except KeyboardInterrupt:
             print("\nGmail Watcher stopped by user")
@@ -213,4 +568,7 @@ def watch():
 
 
 if __name__ == "__main__":
-    watch()
+    parser = argparse.ArgumentParser(description="Silver Tier Gmail Watcher")
+    parser.add_argument("--sync-mode", choices=SYNC_MODES, default="incremental",
+                        help="incremental: history-ID deltas; query: re-list newest unread each poll")
+    watch(parser.parse_args().sync_mode)
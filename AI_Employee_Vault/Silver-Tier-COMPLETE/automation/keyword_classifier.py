@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Keyword Classifier for Silver Tier AI Employee System
+Tags message text with keyword categories (invoice, urgent, payment, ...).
+
+All category patterns are compiled once into a single alternation of named
+groups, so one scan of a message reports every category it mentions. Each
+alternative sits inside a lookahead: the scan never consumes text, so
+overlapping matches (e.g. "proforma ... bill" is both an invoice and a
+payment) are all found, exactly as separate searches would find them.
+
+The scan only tries the alternation where a pattern can begin (a word
+boundary, or a "$"); an ungated lookahead was measured slower than the
+original five searches (benchmark_whatsapp_keywords.py). ASCII text, the
+common case, is lower-cased and scanned case-sensitively, which beats
+IGNORECASE; other text keeps IGNORECASE, since str.lower() can change its
+length (e.g. "İ") and match differently than the original searches did.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+# Category -> regex, matched case-insensitively. Every alternative must start
+# with \b or \$ (the scan only tries positions where one of those can match).
+KEYWORD_PATTERNS = {
+    'invoice': r'\binvoice\b|\b(?:pro)?forma.*bill\b|\bquote\b',
+    'urgent': r'\burgent\b|\basap\b|\bimmediate\b|\bcritical\b',
+    'payment': r'\bpaid\b|\bpayment\b|\bpay\b|\bbill\b|\bamount\b|\$\d+',
+    'meeting': r'\bmeet\b|\bcall\b|\bappointment\b|\bschedule\b',
+    'client': r'\bclient\b|\bcustomer\b|\bcontact\b'
+}
+
+
+class KeywordClassifier:
+    """Compiled keyword categories; classify() scans a message once"""
+
+    def __init__(self, patterns: Dict[str, str] = None):
+        patterns = patterns or KEYWORD_PATTERNS
+        self.categories = list(patterns)
+        alternation = "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns.items())
+        scan = f"(?=[\\w$])(?:\\b|(?=\\$))(?=(?:{alternation}))"
+        self._lowered = re.compile(scan)
+        self._ignorecase = re.compile(scan, re.IGNORECASE)
+
+    def classify(self, text: str) -> List[str]:
+        """Categories mentioned in `text`, in KEYWORD_PATTERNS order"""
+        found = set()
+        wanted = len(self.categories)
+        if text.isascii():
+            matches = self._lowered.finditer(text.lower())
+        else:
+            matches = self._ignorecase.finditer(text)
+        for match in matches:
+            found.add(match.lastgroup)
+            if len(found) == wanted:
+                break
+        return [name for name in self.categories if name in found]
+
+    def classify_many(self, texts: Iterable[str]) -> List[List[str]]:
+        """classify() for a list of messages, e.g. a chat's unread backlog"""
+        classify = self.classify
+        return [classify(text) for text in texts]
+
+
+_default_classifier = None
+
+
+def get_keyword_classifier() -> KeywordClassifier:
+    """Return the shared classifier built from KEYWORD_PATTERNS"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = KeywordClassifier()
+    return _default_classifier
+
+
+def detect_keywords(text: str) -> List[str]:
+    return get_keyword_classifier().classify(text)
@@ -4,25 +4,61 @@ LinkedIn MCP Server for Silver Tier AI Employee System
 Implements MCP protocol for LinkedIn operations
 """
 
-import asyncio
+import os
+import argparse
 import json
-from typing import Dict, Any
+from typing import Any, Optional
 from aiohttp import web
 import logging
 from datetime import datetime
 
+from mcp_idempotency import IDEMPOTENCY_KEYS, IDEMPOTENCY_INDEXES, IdempotencyCache, idempotent
+from mcp_storage import EQUALITY, RANGE, STATE_DIR, RecordStore, open_store
+from mcp_workers import add_server_arguments, run_app, serve
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 routes = web.RouteTableDef()
 
-# Mock LinkedIn post storage (in real implementation, this would connect to LinkedIn API)
-posts_published = []
+# Published posts and drafts are kept in a RecordStore (in real
+# implementation, publishing would go through the LinkedIn API)
+POSTS = 'posts'
+DRAFTS = 'post_drafts'
+DEFAULT_DB_PATH = STATE_DIR / "linkedin_mcp.sqlite3"
+POST_INDEXES = {'visibility': EQUALITY, 'timestamp': RANGE}  # /published-posts filters
+MAX_PAGE_SIZE = 100
+
+
+def post_url(post_id: int) -> str:
+    return f'https://linkedin.com/posts/mock-{post_id}'
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO 8601 query value to the form posts are stored with
+    (local time, no offset), so timestamps compare as strings"""
+    if value is None:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
 
 class LinkedInMCPServer:
-    def __init__(self):
-        self.routes = routes
+    def __init__(self, store: RecordStore = None):
+        # A store passed in belongs to the caller (e.g. the gateway's shared one)
+        self.owns_store = store is None
+        self.store = store or open_store(os.environ.get('MCP_STORAGE', 'sqlite'), DEFAULT_DB_PATH,
+                                         indexed={POSTS: POST_INDEXES,
+                                                  IDEMPOTENCY_KEYS: IDEMPOTENCY_INDEXES})
+        # Responses to requests sent with an Idempotency-Key, for replaying retries
+        self.idempotency = IdempotencyCache(self.store)
+        # The handlers below are methods; bind them to this instance so
+        # aiohttp can call handler(request)
+        self.routes = [web.route(r.method, r.path, r.handler.__get__(self), **r.kwargs)
+                       for r in routes]
 
     @routes.get('/health')
     async def health_check(self, request):
@@ -30,6 +66,7 @@ class LinkedInMCPServer:
         return web.json_response({'status': 'ok', 'service': 'linkedin-mcp'})
 
     @routes.post('/publish-post')
+    @idempotent
     async def publish_post(self, request):
         """Publish a LinkedIn post"""
         try:
@@ -56,19 +93,19 @@ class LinkedInMCPServer:
                 'content': post_content,
                 'visibility': visibility,
                 'timestamp': datetime.now().isoformat(),
-                'status': 'published',
-                'post_url': f'https://linkedin.com/posts/mock-{len(posts_published)+1}'
+                'status': 'published'
             }
 
-            posts_published.append(post_record)
+            # The URL is derived from the ID, which only exists after the insert
+            post_id = self.store.insert(POSTS, post_record)
 
             logger.info(f"LinkedIn post published: {post_title or post_content[:50]}...")
 
             return web.json_response({
                 'success': True,
                 'message': 'LinkedIn post published successfully',
-                'post_id': len(posts_published),
-                'post_url': post_record['post_url']
+                'post_id': post_id,
+                'post_url': post_url(post_id)
             })
 
         except json.JSONDecodeError:
@@ -84,6 +121,7 @@ class LinkedInMCPServer:
             )
 
     @routes.post('/draft-post')
+    @idempotent
     async def draft_post(self, request):
         """Draft a LinkedIn post (save as draft, don't publish)"""
         try:
@@ -106,12 +144,14 @@ class LinkedInMCPServer:
                 'status': 'draft'
             }
 
+            draft_id = self.store.insert(DRAFTS, draft_record)
+
             logger.info(f"LinkedIn post drafted: {draft_record['title'] or draft_record['content'][:50]}...")
 
             return web.json_response({
                 'success': True,
                 'message': 'LinkedIn post drafted successfully',
-                'draft_id': len(posts_published) + 1000  # Different ID space for drafts
+                'draft_id': draft_id  # Drafts have their own ID sequence
             })
 
         except json.JSONDecodeError:
@@ -128,26 +168,53 @@ class LinkedInMCPServer:
 
     @routes.get('/published-posts')
     async def get_published_posts(self, request):
-        """Get list of published posts"""
+        """Get list of published posts
+
+        Pages are keyed on post ID: pass the previous response's next_cursor
+        as `cursor` to continue. Optional filters: `visibility`, and
+        `since`/`until` (ISO 8601, until exclusive). `order=desc` lists the
+        newest posts first. The old `offset` parameter is rejected with a
+        400 rather than ignored, so a client paging with it can't loop over
+        the first page forever.
+        """
         try:
-            limit = int(request.query.get('limit', 10))
-            offset = int(request.query.get('offset', 0))
-
-            # Return paginated results
-            start_idx = offset
-            end_idx = offset + limit
-            paginated_posts = posts_published[start_idx:end_idx]
+            query = request.query
+            if 'offset' in query:
+                return web.json_response(
+                    {'error': 'offset is no longer supported; page with cursor '
+                              '(the previous response\'s next_cursor)'},
+                    status=400
+                )
+            limit = min(int(query.get('limit', 10)), MAX_PAGE_SIZE)
+            after = int(query['cursor']) if query.get('cursor') else None
+            order = query.get('order', 'asc')
+
+            if limit < 0 or (after is not None and after < 0) or order not in ('asc', 'desc'):
+                raise ValueError("limit and cursor must not be negative, order must be asc or desc")
+
+            equals = {'visibility': query['visibility']} if 'visibility' in query else None
+            since, until = parse_timestamp(query.get('since')), parse_timestamp(query.get('until'))
+            ranges = {'timestamp': (since, until)} if since or until else None
+
+            # One extra row tells whether another page follows
+            rows = self.store.page(POSTS, limit + 1, after, order == 'desc', equals, ranges)
+            paginated_posts = [
+                dict(post, post_id=post_id, post_url=post_url(post_id))
+                for post_id, post in rows[:limit]
+            ]
+            next_cursor = str(rows[limit - 1][0]) if limit and len(rows) > limit else None
 
             return web.json_response({
                 'success': True,
                 'posts': paginated_posts,
-                'total_count': len(posts_published),
-                'returned_count': len(paginated_posts)
+                'total_count': self.store.count(POSTS, equals, ranges),
+                'returned_count': len(paginated_posts),
+                'next_cursor': next_cursor
             })
 
         except ValueError:
             return web.json_response(
-                {'error': 'Invalid limit or offset parameter'},
+                {'error': 'Invalid limit, cursor, order, since or until parameter'},
                 status=400
             )
         except Exception as e:
@@ -157,30 +224,27 @@ class LinkedInMCPServer:
                 status=500
             )
 
-    async def start_server(self, host='localhost', port=8001):
-        """Start the MCP server"""
-        app = web.Application()
-        app.add_routes(self.routes)
-
-        runner = web.AppRunner(app)
-        await runner.setup()
-
-        site = web.TCPSite(runner, host, port)
-        await site.start()
+    async def _close_store(self, app):
+        self.store.close()
 
-        logger.info(f"LinkedIn MCP Server running on http://{host}:{port}")
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.idempotency.middleware])
+        app.add_routes(self.routes)
+        if self.owns_store:
+            app.on_cleanup.append(self._close_store)
+        return app
 
-        # Keep the server running
-        try:
-            await asyncio.Future()  # Run forever
-        except KeyboardInterrupt:
-            logger.info("Shutting down server...")
-            await runner.cleanup()
+    async def start_server(self, host='localhost', port=8001):
+        """Start the MCP server; runs until SIGINT/SIGTERM"""
+        logger.info(f"LinkedIn MCP Server starting on http://{host}:{port}")
+        await run_app(self.make_app(), host, port)
 
 # For standalone execution
-async def main():
-    server = LinkedInMCPServer()
-    await server.start_server()
+def main():
+    parser = argparse.ArgumentParser(description="LinkedIn MCP Server")
+    add_server_arguments(parser, default_port=8001)
+    args = parser.parse_args()
+    serve(lambda: LinkedInMCPServer().make_app(), args.host, args.port, args.workers)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
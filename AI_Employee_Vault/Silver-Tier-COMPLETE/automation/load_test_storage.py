@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Load test for the MCP record store
+Inserts synthetic sent emails (searchable, like the Email MCP server does)
+and reports resident memory as the store grows. With the SQLite backend RSS
+levels off once the page cache is warm, however many records are stored;
+"--backend list" shows the old unbounded list + in-memory index for contrast.
+
+Usage: python load_test_storage.py [--records N] [--backend sqlite|memory|list]
+                                   [--batch B] [--db PATH]
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+from mcp_storage import MemoryStore, SQLiteStore
+from search_index import SearchIndex
+from email_mcp_server import EMAILS, EMAIL_SEARCH_FIELDS
+
+WORDS = ["invoice", "payment", "meeting", "report", "quarterly", "update", "project", "client",
+         "schedule", "review", "contract", "proposal", "delivery", "budget", "team", "thanks"]
+
+
+def rss_mb() -> float:
+    """Current resident set size (not the peak) from /proc"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class ListStore:
+    """The servers' original storage: a module-level list, plus an index"""
+
+    def __init__(self):
+        self.records = []
+        self.index = SearchIndex(EMAIL_SEARCH_FIELDS)
+
+    def insert_many(self, collection, records):
+        for record in records:
+            self.records.append(record)
+            self.index.add(len(self.records), record)
+
+    def search(self, collection, query, limit=10):
+        return self.index.search(query, limit)
+
+    def close(self):
+        pass
+
+
+def make_email(rng, n):
+    return {
+        'to': f"contact{rng.randrange(50000)}@client{rng.randrange(500)}.com",
+        'subject': f"{rng.choice(WORDS).title()} #{n}",
+        'body': " ".join(rng.choices(WORDS, k=30)),
+        'timestamp': "2026-01-01T00:00:00",
+        'status': 'sent',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--backend", choices=("sqlite", "memory", "list"), default="sqlite")
+    parser.add_argument("--batch", type=int, default=1,
+                        help="records per write; 1 matches /send-email")
+    parser.add_argument("--db", type=Path, help="SQLite file (default: a temporary directory)")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    searchable = {EMAILS: EMAIL_SEARCH_FIELDS}
+    if args.backend == "sqlite":
+        store = SQLiteStore(args.db or Path(tmp_dir.name) / "load_test.sqlite3", searchable)
+    elif args.backend == "memory":
+        store = MemoryStore(searchable=searchable)
+    else:
+        store = ListStore()
+
+    rng = random.Random(42)
+    report_every = max(args.records // 10, args.batch)
+    baseline = rss_mb()
+    print(f"backend={args.backend} batch={args.batch} start RSS {baseline:.1f} MB")
+    print(f"{'records':>10} {'RSS MB':>8} {'inserts/s':>10} {'search ms':>10}")
+
+    samples = []
+    inserted = 0
+    start = window = time.perf_counter()
+    while inserted < args.records:
+        count = min(args.batch, args.records - inserted)
+        store.insert_many(EMAILS, [make_email(rng, inserted + i) for i in range(count)])
+        inserted += count
+
+        if inserted % report_every < count or inserted == args.records:
+            now = time.perf_counter()
+            rate = report_every / (now - window) if now > window else 0
+            window = now
+            query_start = time.perf_counter()
+            store.search(EMAILS, "contract client42*", 10)
+            search_ms = (time.perf_counter() - query_start) * 1000
+            rss = rss_mb()
+            samples.append(rss)
+            print(f"{inserted:>10} {rss:>8.1f} {rate:>10.0f} {search_ms:>10.1f}")
+
+    elapsed = time.perf_counter() - start
+    # Growth from the second sample (page cache warm) to the last
+    warm = samples[min(1, len(samples) - 1)]
+    print(f"{inserted} records in {elapsed:.1f}s; RSS growth after the first "
+          f"{report_every * 2} records: {samples[-1] - warm:+.1f} MB")
+    store.close()
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+MCP Client for Silver Tier AI Employee System
+Async helpers for calling the MCP servers over HTTP.
+
+EmailMCPClient.send_emails() / draft_emails() split any number of messages
+into batch requests, so a run over a few thousand recipients costs a
+handful of round trips instead of one per recipient. With `batch_window`
+set, single send_email() calls made around the same time are also sent
+together as one batch request.
+
+Every write takes an optional `idempotency_key`. Pass one derived from the
+task (e.g. its file name) and a retried call returns the first call's
+result instead of sending again; batches use "<key>:<chunk number>".
+
+Each client bounds its requests in flight, gives every request a timeout
+and keeps a circuit breaker: after BREAKER_FAILURES consecutive failures
+(timeouts, connection errors, 5xx) calls fail fast with MCPUnavailable for
+BREAKER_RESET seconds, then one trial request decides whether to close it.
+
+MCPServices is the blocking front end for threaded callers such as the
+orchestrator: one background event loop owns a single pooled keep-alive
+session shared by both services.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from mcp_idempotency import IDEMPOTENCY_HEADER
+
+logger = logging.getLogger(__name__)
+
+EMAIL_MCP_URL = os.environ.get("EMAIL_MCP_URL", "http://localhost:8000")  # .../email behind mcp_gateway
+LINKEDIN_MCP_URL = os.environ.get("LINKEDIN_MCP_URL", "http://localhost:8001")  # .../linkedin behind mcp_gateway
+DEFAULT_BATCH_SIZE = 200  # Messages per batch request (the server accepts up to 1000)
+DEFAULT_PARALLEL_BATCHES = 2  # Batch requests in flight at once
+DEFAULT_TIMEOUT = 10.0  # Seconds per request, connecting included
+DEFAULT_MAX_CONCURRENCY = 16  # Requests in flight per service
+CONNECTION_LIMIT = 64  # Pooled connections per session
+BREAKER_FAILURES = 5  # Consecutive failures that open a service's circuit
+BREAKER_RESET = 30.0  # Seconds an open circuit fails fast before a trial request
+
+
+class MCPError(Exception):
+    """Non-2xx response from an MCP server"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class MCPUnavailable(MCPError):
+    """The server could not be reached, timed out, or its circuit is open"""
+
+    def __init__(self, message: str):
+        super().__init__(503, message)
+
+
+class CircuitBreaker:
+    """Fails calls fast while a service keeps failing
+
+    Closed until `threshold` consecutive failures, then open. Once
+    `reset_timeout` has passed, allow() lets one trial call through (and
+    re-arms the timeout); its success closes the circuit again.
+    """
+
+    def __init__(self, name: str, threshold: int = BREAKER_FAILURES,
+                 reset_timeout: float = BREAKER_RESET):
+        self.name = name
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self.opened_at = time.monotonic()  # This call is the trial; others wait another period
+        return True
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logger.info(f"{self.name}: circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is None and self.failures >= self.threshold:
+            logger.warning(f"{self.name}: circuit open after {self.failures} failures")
+            self.opened_at = time.monotonic()
+        elif self.opened_at is not None:
+            self.opened_at = time.monotonic()  # Failed trial
+
+
+class MCPClient:
+    """Shared plumbing: pooled session, request timeout, bounded concurrency, circuit breaker"""
+
+    service = "mcp"
+
+    def __init__(self, base_url: str, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 session: Optional[aiohttp.ClientSession] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(self.service)
+        self._semaphore = None  # Created on first use, inside the running loop
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT))
+        return self._session
+
+    async def _post(self, path: str, payload, idempotency_key: Optional[str] = None) -> Dict:
+        if not self.breaker.allow():
+            raise MCPUnavailable(f"{self.service} circuit open after repeated failures")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {IDEMPOTENCY_HEADER: idempotency_key} if idempotency_key else None
+
+        try:
+            async with self._semaphore:
+                async with self._get_session().post(f"{self.base_url}{path}", json=payload, headers=headers,
+                                                    timeout=self.timeout) as response:
+                    try:
+                        body = await response.json(content_type=None)
+                    except ValueError:
+                        body = None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            raise MCPUnavailable(f"{self.service}: {type(e).__name__} {e}".strip()) from e
+
+        if response.status >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        if response.status >= 400 or body is None:
+            message = body.get("error", "") if isinstance(body, dict) else str(body)
+            raise MCPError(response.status, message)
+        return body
+
+
+class EmailMCPClient(MCPClient):
+    """Client for email_mcp_server; reuses one HTTP session for all calls"""
+
+    service = "email-mcp"
+
+    def __init__(self, base_url: str = EMAIL_MCP_URL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 parallel_batches: int = DEFAULT_PARALLEL_BATCHES,
+                 session: Optional[aiohttp.ClientSession] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, batch_window: float = 0.0):
+        super().__init__(base_url, timeout, max_concurrency, session)
+        self.batch_size = batch_size
+        self.parallel_batches = parallel_batches
+        self.batch_window = batch_window  # Seconds send_email() waits for company
+        self._pending: List[Tuple[Dict, asyncio.Future]] = []
+        self._flush_handle = None
+        self._flushes = set()
+
+    async def close(self):
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await super().close()
+
+    async def send_email(self, to: str, subject: str, body: str,
+                         idempotency_key: Optional[str] = None) -> Dict:
+        payload = {"to": to, "subject": subject, "body": body}
+        if self.batch_window <= 0:
+            return await self._post("/send-email", payload, idempotency_key)
+        if idempotency_key:
+            payload["idempotency_key"] = idempotency_key  # Honoured per item by the batch endpoint
+        return await self._coalesce(payload)
+
+    async def draft_email(self, to: str, subject: str, body: str,
+                          idempotency_key: Optional[str] = None) -> Dict:
+        return await self._post("/draft-email", {"to": to, "subject": subject, "body": body},
+                                idempotency_key)
+
+    async def _coalesce(self, item: Dict) -> Dict:
+        """Queue one email for the next /send-emails:batch request and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            task = asyncio.ensure_future(self._send_pending(pending))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _send_pending(self, pending: List[Tuple[Dict, asyncio.Future]]):
+        """Send queued emails as one batch; every queued future is resolved, whatever happens"""
+        error = MCPError(502, "no result for this email in the batch response")
+        try:
+            response = await self._post("/send-emails:batch", [item for item, _ in pending])
+            for (_, future), result in zip(pending, response["results"]):
+                if future.done():
+                    continue
+                if result["success"]:
+                    future.set_result({k: v for k, v in result.items() if k != "index"})
+                else:
+                    future.set_exception(MCPError(400, result.get("error", "")))
+        except MCPError as e:
+            error = e
+        except Exception as e:
+            # Malformed response (missing "results", ...) or an unexpected client error
+            error = MCPError(502, f"bad batch response: {type(e).__name__} {e}".strip())
+        finally:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def _batched(self, path: str, emails: List[Dict],
+                       idempotency_key: Optional[str] = None) -> List[Dict]:
+        """Post emails in chunks; results keep the caller's indexes"""
+        chunks = [emails[start:start + self.batch_size]
+                  for start in range(0, len(emails), self.batch_size)]
+        semaphore = asyncio.Semaphore(self.parallel_batches)
+
+        async def post(number, chunk):
+            async with semaphore:
+                return await self._post(path, chunk,
+                                        idempotency_key and f"{idempotency_key}:{number}")
+
+        responses = await asyncio.gather(*(post(number, chunk)
+                                           for number, chunk in enumerate(chunks)))
+
+        results = []
+        for offset, response in zip(range(0, len(emails), self.batch_size), responses):
+            for result in response["results"]:
+                results.append(dict(result, index=result["index"] + offset))
+        return results
+
+    async def send_emails(self, emails: List[Dict],
+                          idempotency_key: Optional[str] = None) -> List[Dict]:
+        """Send many emails; one result per input, in input order"""
+        return await self._batched("/send-emails:batch", emails, idempotency_key)
+
+    async def draft_emails(self, emails: List[Dict],
+                           idempotency_key: Optional[str] = None) -> List[Dict]:
+        """Draft many emails; one result per input, in input order"""
+        return await self._batched("/draft-emails:batch", emails, idempotency_key)
+
+
+class LinkedInMCPClient(MCPClient):
+    """Client for linkedin_mcp_server"""
+
+    service = "linkedin-mcp"
+
+    def __init__(self, base_url: str = LINKEDIN_MCP_URL,
+                 session: Optional[aiohttp.ClientSession] = None, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        super().__init__(base_url, timeout, max_concurrency, session)
+
+    async def publish_post(self, content: str, title: str = "", visibility: str = "PUBLIC",
+                           idempotency_key: Optional[str] = None) -> Dict:
+        return await self._post("/publish-post",
+                                {"content": content, "title": title, "visibility": visibility},
+                                idempotency_key)
+
+    async def draft_post(self, content: str, title: str = "", visibility: str = "PUBLIC",
+                         idempotency_key: Optional[str] = None) -> Dict:
+        return await self._post("/draft-post",
+                                {"content": content, "title": title, "visibility": visibility},
+                                idempotency_key)
+
+
+class MCPServices:
+    """Blocking access to both MCP servers for threaded callers
+
+    A background thread runs an event loop that owns one pooled keep-alive
+    session; calls from any thread are scheduled onto it, so all threads
+    share connections, concurrency limits and circuit breakers. Create one
+    per process (a forked copy's loop thread does not exist).
+
+    A blocking call gives up with MCPUnavailable after `call_timeout`
+    seconds (default: twice the request timeout plus the batch window, so
+    time queued behind the concurrency limit is allowed for), whatever
+    happens on the loop.
+    """
+
+    def __init__(self, email_url: str = EMAIL_MCP_URL, linkedin_url: str = LINKEDIN_MCP_URL,
+                 timeout: float = DEFAULT_TIMEOUT, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 batch_window: float = 0.0, call_timeout: Optional[float] = None):
+        self.call_timeout = call_timeout or 2 * timeout + batch_window
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-client", daemon=True)
+        self._thread.start()
+
+        async def connect():
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONNECTION_LIMIT))
+            email = EmailMCPClient(email_url, session=session, timeout=timeout,
+                                   max_concurrency=max_concurrency, batch_window=batch_window)
+            linkedin = LinkedInMCPClient(linkedin_url, session=session, timeout=timeout,
+                                         max_concurrency=max_concurrency)
+            return session, email, linkedin
+
+        self._session, self.email, self.linkedin = self._call(connect())
+
+    def _call(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout=self.call_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise MCPUnavailable(f"no response within {self.call_timeout:g} s") from None
+
+    def send_email(self, to: str, subject: str, body: str,
+                   idempotency_key: Optional[str] = None) -> Dict:
+        return self._call(self.email.send_email(to, subject, body, idempotency_key))
+
+    def publish_post(self, content: str, title: str = "", visibility: str = "PUBLIC",
+                     idempotency_key: Optional[str] = None) -> Dict:
+        return self._call(self.linkedin.publish_post(content, title, visibility, idempotency_key))
+
+    def breakers(self) -> Dict[str, str]:
+        """Circuit state per service, e.g. {"email-mcp": "closed"}"""
+        return {client.service: client.breaker.state for client in (self.email, self.linkedin)}
+
+    def close(self):
+        async def disconnect():
+            await self.email.close()
+            await self.linkedin.close()
+            await self._session.close()
+
+        self._call(disconnect())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+MCP Gateway for Silver Tier AI Employee System
+Serves the Email and LinkedIn MCP servers from one process, event loop and port.
+
+Each server is mounted as an aiohttp sub-app with its usual routes:
+
+    http://localhost:8000/email/send-email
+    http://localhost:8000/linkedin/publish-post
+
+Both share one listening socket (and its keep-alive connections) and one
+RecordStore, so a deployment carries a single SQLite connection and page
+cache instead of one per server. Running email_mcp_server.py and
+linkedin_mcp_server.py as separate processes still works as before.
+--workers N runs N identical gateway processes on the port (see mcp_workers).
+
+Usage: python mcp_gateway.py [--host HOST] [--port PORT] [--workers N]
+"""
+
+import os
+import argparse
+import logging
+from aiohttp import web
+
+from email_mcp_server import EMAILS, EMAIL_SEARCH_FIELDS, EmailMCPServer
+from linkedin_mcp_server import POSTS, POST_INDEXES, LinkedInMCPServer
+from mcp_idempotency import IDEMPOTENCY_KEYS, IDEMPOTENCY_INDEXES
+from mcp_storage import STATE_DIR, RecordStore, open_store
+from mcp_workers import add_server_arguments, run_app, serve
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8000
+DEFAULT_DB_PATH = STATE_DIR / "mcp_gateway.sqlite3"
+EMAIL_PREFIX = '/email'
+LINKEDIN_PREFIX = '/linkedin'
+
+
+def open_gateway_store() -> RecordStore:
+    """One store holding every collection of both servers"""
+    return open_store(os.environ.get('MCP_STORAGE', 'sqlite'), DEFAULT_DB_PATH,
+                      searchable={EMAILS: EMAIL_SEARCH_FIELDS},
+                      indexed={POSTS: POST_INDEXES, IDEMPOTENCY_KEYS: IDEMPOTENCY_INDEXES})
+
+
+def build_gateway(store: RecordStore = None) -> web.Application:
+    """Root app with both servers mounted; closes the store on cleanup"""
+    store = store or open_gateway_store()
+    email_server = EmailMCPServer(store)
+    linkedin_server = LinkedInMCPServer(store)
+
+    async def health_check(request):
+        """Health check endpoint"""
+        return web.json_response({
+            'status': 'ok',
+            'service': 'mcp-gateway',
+            'mounts': {'email-mcp': EMAIL_PREFIX, 'linkedin-mcp': LINKEDIN_PREFIX}
+        })
+
+    async def close_store(app):
+        store.close()
+
+    app = web.Application()
+    app.router.add_get('/health', health_check)
+    # Sub-app startup/cleanup hooks (e.g. the SMTP delivery queue) run with the root app's
+    app.add_subapp(EMAIL_PREFIX, email_server.make_app())
+    app.add_subapp(LINKEDIN_PREFIX, linkedin_server.make_app())
+    app.on_cleanup.append(close_store)
+    return app
+
+
+async def start_gateway(host='localhost', port=DEFAULT_PORT):
+    """Start the gateway; runs until SIGINT/SIGTERM"""
+    logger.info(f"MCP Gateway starting on http://{host}:{port} "
+                f"(email at {EMAIL_PREFIX}, LinkedIn at {LINKEDIN_PREFIX})")
+    await run_app(build_gateway(), host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_server_arguments(parser, default_port=DEFAULT_PORT)
+    args = parser.parse_args()
+    serve(build_gateway, args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+MCP Idempotency for Silver Tier AI Employee System
+Replays stored responses for retried write requests.
+
+A caller that may retry a write (the orchestrator re-running a _FAILED
+task, for instance) sends an `Idempotency-Key` header. The first response
+for that key is stored; a later request to the same endpoint with the same
+key gets the stored response back, marked `Idempotent-Replayed: true`,
+and the handler does not run again, so nothing is sent or published twice.
+
+- Handlers opt in with @idempotent; IdempotencyCache.middleware does the rest.
+- Responses live in the server's RecordStore (collection "idempotency_keys"),
+  so they survive restarts and are shared by all workers of a server.
+- The cache is bounded: at most `capacity` keys, least recently used
+  evicted first, and an entry expires `ttl` seconds after it was stored.
+- 5xx responses are not stored; retrying them does the work again.
+- Reusing a key with a different request body is rejected with 422.
+  Bodies are compared as parsed JSON, so key order and spacing don't count.
+- A request arriving while the first one with its key is still running
+  (in the same process) waits for it and then gets its response.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from mcp_storage import EQUALITY, RecordStore
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEYS = 'idempotency_keys'
+IDEMPOTENCY_INDEXES = {'key': EQUALITY}  # Pass to open_store(indexed=...)
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+DEFAULT_CAPACITY = 10000  # Keys kept per store
+DEFAULT_TTL = 24 * 3600  # Seconds a stored response stays valid
+MAX_KEY_LENGTH = 255
+
+
+def payload_fingerprint(payload: Any) -> str:
+    """Hash of a JSON payload, independent of key order and spacing"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def body_fingerprint(body: bytes) -> str:
+    try:
+        return payload_fingerprint(json.loads(body))
+    except ValueError:
+        return hashlib.sha256(body).hexdigest()
+
+
+def scoped_key(method: str, path: str, key: str) -> str:
+    """Keys are per endpoint: the same key on two endpoints is two entries"""
+    return f'{method} {path} {key}'
+
+
+def idempotent(handler):
+    """Mark a route handler as honouring Idempotency-Key"""
+    handler.idempotent = True
+    return handler
+
+
+class IdempotencyCache:
+    """Stored responses keyed by endpoint + Idempotency-Key, LRU + TTL bounded
+
+    Entries are ordered by store ID, oldest use first: a hit moves its
+    entry to a new ID (RecordStore.move_to_end, one write, so a worker
+    looking the key up at the same moment still finds it), and eviction
+    drops the lowest IDs.
+    """
+
+    def __init__(self, store: RecordStore, capacity: int = DEFAULT_CAPACITY,
+                 ttl: float = DEFAULT_TTL):
+        self.store = store
+        self.capacity = capacity
+        self.ttl = ttl
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """The live entry for `key`, marked as just used; None if absent or expired"""
+        while True:
+            rows = self.store.page(IDEMPOTENCY_KEYS, 1, descending=True, equals={'key': key})
+            if not rows:
+                return None
+            entry_id, entry = rows[0]
+            if entry['expires'] <= time.time():
+                self.store.delete(IDEMPOTENCY_KEYS, [entry_id])
+                return None
+            if self.store.move_to_end(IDEMPOTENCY_KEYS, entry_id) is not None:
+                return entry
+            # Another worker moved it between our read and our move; read it again
+
+    def save(self, key: str, fingerprint: str, response: web.Response):
+        self.save_many([(key, fingerprint, response.status, response.content_type,
+                         response.body.decode('utf-8'))])
+
+    def save_many(self, entries: List[Tuple[str, str, int, str, str]]):
+        """Store (key, fingerprint, status, content type, body text) responses in one write"""
+        now = time.time()
+        self.store.insert_many(IDEMPOTENCY_KEYS, [{
+            'key': key,
+            'fingerprint': fingerprint,
+            'status': status,
+            'content_type': content_type,
+            'body': body,
+            'created': now,
+            'expires': now + self.ttl
+        } for key, fingerprint, status, content_type, body in entries])
+        excess = self.store.count(IDEMPOTENCY_KEYS) - self.capacity
+        if excess > 0:
+            oldest = self.store.page(IDEMPOTENCY_KEYS, excess)
+            self.store.delete(IDEMPOTENCY_KEYS, [entry_id for entry_id, _ in oldest])
+
+    @staticmethod
+    def _replay(entry: Dict, fingerprint: str) -> web.Response:
+        if entry['fingerprint'] != fingerprint:
+            return web.json_response(
+                {'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'},
+                status=422
+            )
+        return web.Response(status=entry['status'], text=entry['body'],
+                            content_type=entry['content_type'],
+                            headers={REPLAYED_HEADER: 'true'})
+
+    @staticmethod
+    def _storable(response) -> bool:
+        return (isinstance(response, web.Response) and response.status < 500
+                and isinstance(response.body, bytes))
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or not getattr(request.match_info.handler, 'idempotent', False):
+            return await handler(request)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return web.json_response(
+                {'error': f'{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters'},
+                status=400
+            )
+
+        key = scoped_key(request.method, request.path, key)
+        fingerprint = body_fingerprint(await request.read())
+
+        # Duplicates that arrive while the first request runs wait for its result
+        while key in self._in_flight:
+            await asyncio.shield(self._in_flight[key])
+        entry = self.lookup(key)
+        if entry is not None:
+            logger.info(f"Replaying stored response for {key}")
+            return self._replay(entry, fingerprint)
+
+        done = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            response = await handler(request)
+            if self._storable(response):
+                try:
+                    self.save(key, fingerprint, response)
+                except Exception as e:
+                    # The work is done; a retry would repeat it, but the caller
+                    # still gets this response
+                    logger.error(f"Could not store response for {key}: {e}")
+            return response
+        finally:
+            del self._in_flight[key]
+            done.set_result(None)
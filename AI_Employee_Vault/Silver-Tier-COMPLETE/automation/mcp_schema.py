@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Request Schemas for Silver Tier AI Employee System
+Validators for MCP server payloads, compiled once at import time.
+
+compile_schema() turns a field table into a closure over flat tuples, so
+checking each item of a 1000-message batch is a handful of isinstance()
+calls with no per-request schema interpretation.
+"""
+
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Type, Union
+
+
+class Field(NamedTuple):
+    type: Union[Type, Tuple[Type, ...]]
+    required: bool = True
+    max_length: Optional[int] = None
+
+
+def compile_schema(fields: Dict[str, Field]) -> Callable[[Any], Optional[str]]:
+    """Build validate(item) -> error message, or None when the item is valid"""
+    required = tuple(name for name, field in fields.items() if field.required)
+    checks = tuple(
+        (name, field.type, field.max_length,
+         " or ".join(t.__name__ for t in (field.type if isinstance(field.type, tuple) else (field.type,))))
+        for name, field in fields.items()
+    )
+
+    def validate(item: Any) -> Optional[str]:
+        if not isinstance(item, dict):
+            return "Item must be a JSON object"
+        for name in required:
+            if name not in item:
+                return f"Missing required field: {name}"
+        for name, types, max_length, type_names in checks:
+            if name not in item:
+                continue
+            value = item[name]
+            if not isinstance(value, types):
+                return f"Field {name} must be {type_names}"
+            if max_length is not None and len(value) > max_length:
+                return f"Field {name} is longer than {max_length} characters"
+        return None
+
+    return validate
@@ -0,0 +1,735 @@
+#!/usr/bin/env python3
+"""
+MCP Storage for Silver Tier AI Employee System
+Record storage shared by the Email and LinkedIn MCP servers.
+
+Records are JSON objects kept in named collections ("emails", "email_drafts",
+"posts", ...). Each collection hands out its own monotonic integer IDs.
+
+- SQLiteStore (default): one WAL-mode database per server under .state/.
+  IDs come from AUTOINCREMENT, so they are never reused, even after a
+  restart or a deleted row. Searchable collections get an FTS5 index and
+  indexed fields a B-tree index on the JSON value. Memory stays bounded by
+  SQLite's page cache however many records exist.
+- MemoryStore: keeps the newest `max_records` per collection. Useful for
+  tests and demos; nothing survives a restart.
+
+`indexed` maps a collection to {field: EQUALITY or RANGE}. page() and
+count() can filter on those fields (exact match, or a [low, high) range)
+and page by ID instead of offset, so every page costs the same however
+deep it is. Record counts, overall and per EQUALITY value, are maintained
+on every write rather than counted on read.
+
+open_store() picks a backend from a spec string; the servers read it from
+the MCP_STORAGE environment variable ("sqlite", "sqlite:/path/to.db",
+"memory" or "memory:50000").
+"""
+
+import re
+import json
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from search_index import SearchIndex, SearchPage, parse_query, encode_cursor, decode_cursor
+
+BASE_PATH = Path(__file__).parent.parent  # Go up one level to the main directory
+STATE_DIR = BASE_PATH / ".state"  # Server bookkeeping, kept out of the Obsidian view
+DEFAULT_MEMORY_LIMIT = 10000  # Records kept per collection by MemoryStore
+SQLITE_CACHE_KB = 8192  # Page cache per connection; the store's memory ceiling
+
+COLLECTION_NAME = re.compile(r"[a-z][a-z0-9_]*$")  # Collection names become table names
+FIELD_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*$")  # Indexed fields become JSON paths
+
+EQUALITY = "equality"  # Index kind: exact-match filters, counted per value
+RANGE = "range"  # Index kind: [low, high) filters
+
+Filters = Optional[Dict[str, Any]]
+
+try:
+    _probe = sqlite3.connect(":memory:")
+    _probe.execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+    _probe.close()
+    HAS_FTS5 = True
+except sqlite3.OperationalError:
+    HAS_FTS5 = False
+
+
+def value_key(value: Any) -> str:
+    """How an EQUALITY value is keyed in the per-value counts"""
+    return json.dumps(value)
+
+
+class RecordStore:
+    """Interface shared by the storage backends
+
+    `searchable` maps a collection name to {field: weight}; only those
+    collections support search(). `indexed` maps a collection name to
+    {field: EQUALITY or RANGE}; page() and count() filter on those fields.
+    """
+
+    def __init__(self, searchable: Dict[str, Dict[str, float]] = None,
+                 indexed: Dict[str, Dict[str, str]] = None):
+        self.searchable = dict(searchable or {})
+        self.indexed = {name: dict(fields) for name, fields in (indexed or {}).items()}
+        for fields in self.indexed.values():
+            for field, kind in fields.items():
+                if not FIELD_NAME.match(field) or kind not in (EQUALITY, RANGE):
+                    raise ValueError(f"Invalid index: {field} ({kind})")
+
+    @staticmethod
+    def _check(collection: str):
+        if not COLLECTION_NAME.match(collection):
+            raise ValueError(f"Invalid collection name: {collection}")
+
+    def _check_filters(self, collection: str, equals: Filters, ranges: Filters):
+        fields = self.indexed.get(collection, {})
+        for field in equals or ():
+            if fields.get(field) != EQUALITY:
+                raise ValueError(f"{collection}.{field} has no {EQUALITY} index")
+        for field in ranges or ():
+            if fields.get(field) != RANGE:
+                raise ValueError(f"{collection}.{field} has no {RANGE} index")
+
+    def _equality_fields(self, collection: str) -> List[str]:
+        return [f for f, kind in self.indexed.get(collection, {}).items() if kind == EQUALITY]
+
+    def insert(self, collection: str, record: Dict) -> int:
+        return self.insert_many(collection, [record])[0]
+
+    def insert_many(self, collection: str, records: List[Dict]) -> List[int]:
+        """Store records in one write; returns their IDs in order"""
+        raise NotImplementedError
+
+    def insert_linked(self, collection: str, records: List[Dict], linked_collection: str,
+                      link: Callable[[int, Dict], Dict]) -> Tuple[List[int], List[int]]:
+        """insert_many() into `collection`, plus link(id, record) for each record
+        into `linked_collection`, in one write; returns both lists of IDs
+
+        Either both sets of records are stored or neither is, e.g. an email
+        and the outbox entry that gets it delivered.
+        """
+        raise NotImplementedError
+
+    def get_many(self, collection: str, ids: Iterable[int]) -> Dict[int, Dict]:
+        raise NotImplementedError
+
+    def update(self, collection: str, record_id: int, record: Dict) -> bool:
+        """Replace a stored record; False if it doesn't exist
+
+        Searchable fields must keep their values: the search index is not
+        rewritten.
+        """
+        raise NotImplementedError
+
+    def replace(self, collection: str, record_id: int, expected: Dict, record: Dict) -> bool:
+        """update(), but only if the record still equals `expected`; False otherwise
+
+        A compare-and-set: when several processes race to claim the same
+        record, exactly one of them succeeds.
+        """
+        raise NotImplementedError
+
+    def delete(self, collection: str, ids: Iterable[int]) -> int:
+        """Remove records; returns how many existed"""
+        raise NotImplementedError
+
+    def move_to_end(self, collection: str, record_id: int) -> Optional[int]:
+        """Give a record the next ID in one write; returns it, or None if the record is gone
+
+        page() runs in ID order, so this makes the record the newest without
+        a moment where other readers (or workers) can't find it.
+        """
+        raise NotImplementedError
+
+    def count(self, collection: str, equals: Filters = None, ranges: Filters = None) -> int:
+        """Number of records matching the filters (see page())
+
+        No filters, or a single EQUALITY filter, reads a maintained counter.
+        """
+        raise NotImplementedError
+
+    def page(self, collection: str, limit: int, after: Optional[int] = None,
+             descending: bool = False, equals: Filters = None,
+             ranges: Filters = None) -> List[Tuple[int, Dict]]:
+        """Up to `limit` (id, record) pairs in ID order, continuing past ID `after`
+
+        `equals` is {field: value} and `ranges` is {field: (low, high)} with
+        low inclusive, high exclusive and None for an open end; both only
+        accept fields indexed for that kind of filter.
+        """
+        raise NotImplementedError
+
+    def search(self, collection: str, query: str, limit: int = 10,
+               cursor: Optional[str] = None) -> SearchPage:
+        """Ranked full-text search; see search_index for the query syntax"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStore(RecordStore):
+    """Bounded in-process store; the oldest records are evicted first"""
+
+    def __init__(self, max_records: int = DEFAULT_MEMORY_LIMIT,
+                 searchable: Dict[str, Dict[str, float]] = None,
+                 indexed: Dict[str, Dict[str, str]] = None):
+        super().__init__(searchable, indexed)
+        self.max_records = max_records
+        self._records = {}  # collection -> OrderedDict(id -> record)
+        self._ids = {}  # collection -> sorted list of stored IDs
+        self._last_id = {}
+        self._indexes = {name: SearchIndex(fields) for name, fields in self.searchable.items()}
+        # collection -> field -> value_key -> sorted IDs (EQUALITY)
+        # or field -> sorted [(value, id)] (RANGE)
+        self._field_indexes = {
+            name: {field: {} if kind == EQUALITY else [] for field, kind in fields.items()}
+            for name, fields in self.indexed.items()
+        }
+        self._lock = threading.Lock()
+
+    def _index_fields(self, collection: str, record_id: int, record: Dict):
+        for field, entries in self._field_indexes.get(collection, {}).items():
+            value = record.get(field)
+            if isinstance(entries, dict):
+                insort(entries.setdefault(value_key(value), []), record_id)
+            elif value is not None:
+                insort(entries, (value, record_id))
+
+    def _unindex_fields(self, collection: str, record_id: int, record: Dict):
+        for field, entries in self._field_indexes.get(collection, {}).items():
+            value = record.get(field)
+            if isinstance(entries, dict):
+                ids = entries[value_key(value)]
+                del ids[bisect_left(ids, record_id)]
+            elif value is not None:
+                del entries[bisect_left(entries, (value, record_id))]
+
+    def _discard(self, collection: str, record_id: int, record: Dict):
+        self._unindex_fields(collection, record_id, record)
+        index = self._indexes.get(collection)
+        if index is not None:
+            index.remove(record_id, record)
+
+    def insert_many(self, collection: str, records: List[Dict]) -> List[int]:
+        self._check(collection)
+        with self._lock:
+            return self._insert(collection, records)
+
+    def insert_linked(self, collection: str, records: List[Dict], linked_collection: str,
+                      link: Callable[[int, Dict], Dict]) -> Tuple[List[int], List[int]]:
+        self._check(collection)
+        self._check(linked_collection)
+        with self._lock:
+            # IDs are handed out in order, so the linked records can be built
+            # (and fail) before anything is stored
+            first = self._last_id.get(collection, 0) + 1
+            linked = [link(first + i, record) for i, record in enumerate(records)]
+            return self._insert(collection, records), self._insert(linked_collection, linked)
+
+    def _insert(self, collection: str, records: List[Dict]) -> List[int]:
+        """insert_many(); caller holds _lock"""
+        stored = self._records.setdefault(collection, OrderedDict())
+        stored_ids = self._ids.setdefault(collection, [])
+        index = self._indexes.get(collection)
+        ids = []
+        for record in records:
+            record_id = self._last_id.get(collection, 0) + 1
+            self._last_id[collection] = record_id
+            stored[record_id] = record
+            stored_ids.append(record_id)
+            self._index_fields(collection, record_id, record)
+            if index is not None:
+                index.add(record_id, record)
+            ids.append(record_id)
+
+        while len(stored) > self.max_records:
+            old_id, old_record = stored.popitem(last=False)
+            del stored_ids[0]
+            self._discard(collection, old_id, old_record)
+        return ids
+
+    def get_many(self, collection: str, ids: Iterable[int]) -> Dict[int, Dict]:
+        stored = self._records.get(collection, {})
+        return {i: stored[i] for i in ids if i in stored}
+
+    def update(self, collection: str, record_id: int, record: Dict) -> bool:
+        with self._lock:
+            stored = self._records.get(collection, {})
+            old = stored.get(record_id)
+            if old is None:
+                return False
+            self._unindex_fields(collection, record_id, old)
+            self._index_fields(collection, record_id, record)
+            stored[record_id] = record
+            return True
+
+    def replace(self, collection: str, record_id: int, expected: Dict, record: Dict) -> bool:
+        with self._lock:
+            stored = self._records.get(collection, {})
+            if record_id not in stored or stored[record_id] != expected:
+                return False
+            self._unindex_fields(collection, record_id, expected)
+            self._index_fields(collection, record_id, record)
+            stored[record_id] = record
+            return True
+
+    def delete(self, collection: str, ids: Iterable[int]) -> int:
+        with self._lock:
+            stored = self._records.get(collection, {})
+            stored_ids = self._ids.get(collection, [])
+            removed = 0
+            for record_id in ids:
+                record = stored.pop(record_id, None)
+                if record is None:
+                    continue
+                del stored_ids[bisect_left(stored_ids, record_id)]
+                self._discard(collection, record_id, record)
+                removed += 1
+            return removed
+
+    def move_to_end(self, collection: str, record_id: int) -> Optional[int]:
+        with self._lock:
+            stored = self._records.get(collection, {})
+            record = stored.pop(record_id, None)
+            if record is None:
+                return None
+            stored_ids = self._ids[collection]
+            del stored_ids[bisect_left(stored_ids, record_id)]
+            self._discard(collection, record_id, record)
+
+            new_id = self._last_id[collection] + 1
+            self._last_id[collection] = new_id
+            stored[new_id] = record
+            stored_ids.append(new_id)
+            self._index_fields(collection, new_id, record)
+            index = self._indexes.get(collection)
+            if index is not None:
+                index.add(new_id, record)
+            return new_id
+
+    def _candidates(self, collection: str, equals: Filters, ranges: Filters) -> List[int]:
+        """Sorted IDs that may match: the narrowest index for the filters"""
+        indexes = self._field_indexes.get(collection, {})
+        if equals:
+            return min((indexes[field].get(value_key(value), []) for field, value in equals.items()),
+                       key=len)
+        if ranges:
+            field, (low, high) = next(iter(ranges.items()))
+            entries = indexes[field]
+            start = bisect_left(entries, (low,)) if low is not None else 0
+            end = bisect_left(entries, (high,)) if high is not None else len(entries)
+            return sorted(record_id for _, record_id in entries[start:end])
+        return self._ids.get(collection, [])
+
+    @staticmethod
+    def _matches(record: Dict, equals: Filters, ranges: Filters) -> bool:
+        for field, value in (equals or {}).items():
+            if record.get(field) != value:
+                return False
+        for field, (low, high) in (ranges or {}).items():
+            value = record.get(field)
+            if value is None or (low is not None and value < low) or (high is not None and value >= high):
+                return False
+        return True
+
+    def count(self, collection: str, equals: Filters = None, ranges: Filters = None) -> int:
+        self._check_filters(collection, equals, ranges)
+        with self._lock:
+            if not ranges and len(equals or ()) <= 1:
+                return len(self._candidates(collection, equals, None))
+            stored = self._records.get(collection, {})
+            return sum(1 for record_id in self._candidates(collection, equals, ranges)
+                       if self._matches(stored[record_id], equals, ranges))
+
+    def page(self, collection: str, limit: int, after: Optional[int] = None,
+             descending: bool = False, equals: Filters = None,
+             ranges: Filters = None) -> List[Tuple[int, Dict]]:
+        self._check_filters(collection, equals, ranges)
+        with self._lock:
+            stored = self._records.get(collection, {})
+            candidates = self._candidates(collection, equals, ranges)
+            if descending:
+                end = bisect_left(candidates, after) if after is not None else len(candidates)
+                positions = range(end - 1, -1, -1)
+            else:
+                start = bisect_right(candidates, after) if after is not None else 0
+                positions = range(start, len(candidates))
+
+            results = []
+            for position in positions:
+                if len(results) >= limit:
+                    break
+                record = stored[candidates[position]]
+                if self._matches(record, equals, ranges):
+                    results.append((candidates[position], record))
+            return results
+
+    def search(self, collection: str, query: str, limit: int = 10,
+               cursor: Optional[str] = None) -> SearchPage:
+        with self._lock:
+            return self._indexes[collection].search(query, limit, cursor)
+
+
+class SQLiteStore(RecordStore):
+    """Durable store: WAL-mode SQLite, FTS5 for searchable collections"""
+
+    def __init__(self, db_path: Path, searchable: Dict[str, Dict[str, float]] = None,
+                 indexed: Dict[str, Dict[str, str]] = None):
+        super().__init__(searchable, indexed)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # One connection, serialized by a lock; sqlite3 caches the prepared
+        # statement for each SQL string, so the SQL below is built once per
+        # collection and reused
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False,
+                                     cached_statements=256)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+        with self._conn:
+            # Record counts per collection (field '') and per EQUALITY value
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS _record_counts (collection TEXT NOT NULL, "
+                "field TEXT NOT NULL, value TEXT NOT NULL, n INTEGER NOT NULL, "
+                "PRIMARY KEY (collection, field, value)) WITHOUT ROWID"
+            )
+        self._lock = threading.Lock()
+        self._sql = {}  # collection -> prepared SQL strings
+        self._fallback_indexes = {}  # collection -> SearchIndex when FTS5 is missing
+
+    def _statements(self, collection: str) -> Dict[str, str]:
+        sql = self._sql.get(collection)
+        if sql is not None:
+            return sql
+
+        self._check(collection)
+        table = f'"{collection}"'
+        sql = {
+            "insert": f"INSERT INTO {table} (data) VALUES (?)",
+            "get_many": f"SELECT id, data FROM {table} WHERE id IN (SELECT value FROM json_each(?))",
+            "update": f"UPDATE {table} SET data = ? WHERE id = ?",
+            "replace": f"UPDATE {table} SET data = ? WHERE id = ? AND data = ?",
+            "get": f"SELECT data FROM {table} WHERE id = ?",
+            "delete": f"DELETE FROM {table} WHERE id = ?",
+            "count": f"SELECT count(*) FROM {table}",
+            "recent": f"SELECT id FROM {table} WHERE id < ? ORDER BY id DESC LIMIT ?",
+            "all": f"SELECT id, data FROM {table} ORDER BY id",
+        }
+        with self._conn:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL)"
+            )
+            # Expression indexes; the rowid in every index entry lets a
+            # filtered page seek straight to "value = ? AND id > ?"
+            for field in self.indexed.get(collection, {}):
+                self._conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{collection}__{field}" '
+                    f"ON {table} ({self._field_expr(field)})"
+                )
+            # Each counted field has a marker row (value ''); a missing one
+            # means a new collection or a newly counted field, so recount
+            markers = ["", *self._equality_fields(collection)]
+            if any(self._read_count(collection, field, "") is None for field in markers):
+                self._conn.execute("DELETE FROM _record_counts WHERE collection = ?", (collection,))
+                records = [json.loads(data) for _, data in self._conn.execute(sql["all"])]
+                self._add_counts(collection, records, 1)
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO _record_counts (collection, field, value, n) VALUES (?, ?, '', 0)",
+                    [(collection, field) for field in markers],
+                )
+
+        fields = self.searchable.get(collection)
+        if fields and HAS_FTS5:
+            fts = f'"{collection}_fts"'
+            columns = ", ".join(f'"{field}"' for field in fields)
+            weights = ", ".join(repr(float(w)) for w in fields.values())
+            with self._conn:
+                # Contentless: the text lives in the records table already
+                self._conn.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+                    "content='', tokenize='unicode61 remove_diacritics 0')"
+                )
+            sql.update({
+                "fts_insert": f"INSERT INTO {fts} (rowid, {columns}) "
+                              f"VALUES (?, {', '.join('?' for _ in fields)})",
+                # Contentless tables forget the indexed text, so a delete
+                # must repeat the values that were inserted
+                "fts_delete": f"INSERT INTO {fts} ({fts}, rowid, {columns}) "
+                              f"VALUES ('delete', ?, {', '.join('?' for _ in fields)})",
+                "fts_count": f"SELECT count(*) FROM {fts} WHERE {fts} MATCH ?",
+                "fts_first": f"SELECT rowid, bm25({fts}, {weights}) AS rank FROM {fts} "
+                             f"WHERE {fts} MATCH ? ORDER BY rank, rowid DESC LIMIT ?",
+                "fts_after": f"SELECT rowid, rank FROM (SELECT rowid, bm25({fts}, {weights}) AS rank "
+                             f"FROM {fts} WHERE {fts} MATCH ?) "
+                             f"WHERE rank > ? OR (rank = ? AND rowid < ?) "
+                             f"ORDER BY rank, rowid DESC LIMIT ?",
+            })
+        self._sql[collection] = sql
+        return sql
+
+    @staticmethod
+    def _field_expr(field: str) -> str:
+        # Filters must repeat this exact expression for SQLite to use the index
+        return f"json_extract(data, '$.{field}')"
+
+    def _read_count(self, collection: str, field: str, value: str) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT n FROM _record_counts WHERE collection = ? AND field = ? AND value = ?",
+            (collection, field, value),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _add_counts(self, collection: str, records: List[Dict], sign: int, total: bool = True):
+        """Adjust the maintained counts by `sign` for each record (call inside a transaction)"""
+        deltas = Counter()
+        if total:
+            deltas["", ""] = sign * len(records)
+        for field in self._equality_fields(collection):
+            for record in records:
+                deltas[field, value_key(record.get(field))] += sign
+        self._conn.executemany(
+            "INSERT INTO _record_counts (collection, field, value, n) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (collection, field, value) DO UPDATE SET n = n + excluded.n",
+            [(collection, field, value, n) for (field, value), n in deltas.items() if n],
+        )
+
+    def _filter_sql(self, after: Optional[int], descending: bool,
+                    equals: Filters, ranges: Filters) -> Tuple[str, list]:
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("id < ?" if descending else "id > ?")
+            params.append(after)
+        for field, value in (equals or {}).items():
+            clauses.append(f"{self._field_expr(field)} = ?")
+            params.append(value)
+        for field, (low, high) in (ranges or {}).items():
+            if low is not None:
+                clauses.append(f"{self._field_expr(field)} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{self._field_expr(field)} < ?")
+                params.append(high)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def insert_many(self, collection: str, records: List[Dict]) -> List[int]:
+        with self._lock:
+            sql = self._statements(collection)
+            with self._conn:
+                ids = self._insert(collection, sql, records)
+            self._index_inserted(collection, ids, records)
+            return ids
+
+    def insert_linked(self, collection: str, records: List[Dict], linked_collection: str,
+                      link: Callable[[int, Dict], Dict]) -> Tuple[List[int], List[int]]:
+        with self._lock:
+            # Before the transaction: creating a table commits
+            sql = self._statements(collection)
+            linked_sql = self._statements(linked_collection)
+            with self._conn:
+                ids = self._insert(collection, sql, records)
+                linked = [link(record_id, record) for record_id, record in zip(ids, records)]
+                linked_ids = self._insert(linked_collection, linked_sql, linked)
+            self._index_inserted(collection, ids, records)
+            self._index_inserted(linked_collection, linked_ids, linked)
+            return ids, linked_ids
+
+    def _insert(self, collection: str, sql: Dict[str, str], records: List[Dict]) -> List[int]:
+        """insert_many()'s statements; caller holds _lock, inside a transaction"""
+        fields = self.searchable.get(collection)
+        ids = []
+        for record in records:
+            cursor = self._conn.execute(sql["insert"], (json.dumps(record),))
+            ids.append(cursor.lastrowid)
+            if "fts_insert" in sql:
+                self._conn.execute(
+                    sql["fts_insert"],
+                    (cursor.lastrowid, *(str(record.get(f, "")) for f in fields)),
+                )
+        self._add_counts(collection, records, 1)
+        return ids
+
+    def _index_inserted(self, collection: str, ids: List[int], records: List[Dict]):
+        """Add committed records to the fallback search index, if the collection has one"""
+        index = self._fallback_indexes.get(collection)
+        if index is not None:
+            for record_id, record in zip(ids, records):
+                index.add(record_id, record)
+
+    def get_many(self, collection: str, ids: Iterable[int]) -> Dict[int, Dict]:
+        with self._lock:
+            sql = self._statements(collection)
+            rows = self._conn.execute(sql["get_many"], (json.dumps(list(ids)),))
+            return {record_id: json.loads(data) for record_id, data in rows}
+
+    def update(self, collection: str, record_id: int, record: Dict) -> bool:
+        with self._lock:
+            sql = self._statements(collection)
+            with self._conn:
+                old = None
+                if self._equality_fields(collection):
+                    row = self._conn.execute(sql["get"], (record_id,)).fetchone()
+                    old = json.loads(row[0]) if row else None
+                cursor = self._conn.execute(sql["update"], (json.dumps(record), record_id))
+                if old is not None:
+                    self._add_counts(collection, [old], -1, total=False)
+                    self._add_counts(collection, [record], 1, total=False)
+            return cursor.rowcount > 0
+
+    def replace(self, collection: str, record_id: int, expected: Dict, record: Dict) -> bool:
+        with self._lock:
+            sql = self._statements(collection)
+            with self._conn:
+                # Stored text is json.dumps(record), so equal records compare equal as text
+                cursor = self._conn.execute(sql["replace"],
+                                            (json.dumps(record), record_id, json.dumps(expected)))
+                if cursor.rowcount and self._equality_fields(collection):
+                    self._add_counts(collection, [expected], -1, total=False)
+                    self._add_counts(collection, [record], 1, total=False)
+            return cursor.rowcount > 0
+
+    def delete(self, collection: str, ids: Iterable[int]) -> int:
+        with self._lock:
+            sql = self._statements(collection)
+            fields = self.searchable.get(collection)
+            index = self._fallback_indexes.get(collection)
+            removed = []
+            with self._conn:
+                for record_id in ids:
+                    row = self._conn.execute(sql["get"], (record_id,)).fetchone()
+                    if row is None:
+                        continue
+                    self._conn.execute(sql["delete"], (record_id,))
+                    record = json.loads(row[0])
+                    removed.append(record)
+                    if "fts_delete" in sql:
+                        self._conn.execute(
+                            sql["fts_delete"],
+                            (record_id, *(str(record.get(f, "")) for f in fields)),
+                        )
+                    if index is not None:
+                        index.remove(record_id, record)
+                self._add_counts(collection, removed, -1)
+            return len(removed)
+
+    def move_to_end(self, collection: str, record_id: int) -> Optional[int]:
+        with self._lock:
+            sql = self._statements(collection)
+            fields = self.searchable.get(collection)
+            row = self._conn.execute(sql["get"], (record_id,)).fetchone()
+            if row is None:
+                return None
+            record = json.loads(row[0])
+            with self._conn:
+                # Delete first: it takes the write lock, and finding nothing to
+                # delete means another process moved the record since the read
+                if self._conn.execute(sql["delete"], (record_id,)).rowcount == 0:
+                    return None
+                new_id = self._conn.execute(sql["insert"], (row[0],)).lastrowid
+                if "fts_insert" in sql:
+                    values = [str(record.get(f, "")) for f in fields]
+                    self._conn.execute(sql["fts_delete"], (record_id, *values))
+                    self._conn.execute(sql["fts_insert"], (new_id, *values))
+
+            index = self._fallback_indexes.get(collection)
+            if index is not None:
+                index.remove(record_id, record)
+                index.add(new_id, record)
+            return new_id
+
+    def count(self, collection: str, equals: Filters = None, ranges: Filters = None) -> int:
+        self._check_filters(collection, equals, ranges)
+        with self._lock:
+            sql = self._statements(collection)
+            if not ranges and len(equals or ()) <= 1:
+                field, value = next(iter(equals.items())) if equals else ("", None)
+                count = self._read_count(collection, field, value_key(value) if field else "")
+                return count or 0
+            where, params = self._filter_sql(None, False, equals, ranges)
+            return self._conn.execute(sql["count"] + where, params).fetchone()[0]
+
+    def page(self, collection: str, limit: int, after: Optional[int] = None,
+             descending: bool = False, equals: Filters = None,
+             ranges: Filters = None) -> List[Tuple[int, Dict]]:
+        self._check_filters(collection, equals, ranges)
+        where, params = self._filter_sql(after, descending, equals, ranges)
+        with self._lock:
+            table = f'"{collection}"'
+            self._statements(collection)
+            rows = self._conn.execute(
+                f"SELECT id, data FROM {table}{where} ORDER BY id{' DESC' if descending else ''} LIMIT ?",
+                (*params, limit),
+            )
+            return [(record_id, json.loads(data)) for record_id, data in rows]
+
+    def search(self, collection: str, query: str, limit: int = 10,
+               cursor: Optional[str] = None) -> SearchPage:
+        fields = self.searchable[collection]
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            sql = self._statements(collection)
+            if "fts_insert" not in sql:
+                return self._fallback_index(collection, sql).search(query, limit, cursor)
+
+            terms = parse_query(query, fields)
+            if not terms:
+                return self._recent(collection, sql, limit, after)
+
+            match = " AND ".join(
+                (f"{{{t.fields[0]}}} : " if len(t.fields) == 1 else "")
+                + f'"{t.token}"' + ("*" if t.prefix else "")
+                for t in terms
+            )
+            total = self._conn.execute(sql["fts_count"], (match,)).fetchone()[0]
+            if after is None:
+                rows = self._conn.execute(sql["fts_first"], (match, limit + 1)).fetchall()
+            else:
+                rank, neg_id = after
+                rows = self._conn.execute(sql["fts_after"],
+                                          (match, rank, rank, -neg_id, limit + 1)).fetchall()
+
+        # bm25() is "lower is better"; report it as a positive score
+        hits = [(rowid, -rank) for rowid, rank in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][1], -rows[limit - 1][0]) if len(rows) > limit else None
+        return SearchPage(hits, total, next_cursor)
+
+    def _recent(self, collection: str, sql: Dict[str, str], limit: int,
+                after: Optional[Tuple[float, int]]) -> SearchPage:
+        before = -after[1] if after else (1 << 63) - 1
+        ids = [row[0] for row in self._conn.execute(sql["recent"], (before, limit + 1))]
+        total = self._read_count(collection, "", "") or 0
+        hits = [(record_id, 0.0) for record_id in ids[:limit]]
+        next_cursor = encode_cursor(-0.0, -ids[limit - 1]) if len(ids) > limit else None
+        return SearchPage(hits, total, next_cursor)
+
+    def _fallback_index(self, collection: str, sql: Dict[str, str]) -> SearchIndex:
+        """In-memory index for SQLite builds without FTS5 (not memory-bounded)"""
+        index = self._fallback_indexes.get(collection)
+        if index is None:
+            index = SearchIndex(self.searchable[collection])
+            for record_id, data in self._conn.execute(sql["all"]):
+                index.add(record_id, json.loads(data))
+            self._fallback_indexes[collection] = index
+        return index
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_store(spec: str, default_path: Path,
+               searchable: Dict[str, Dict[str, float]] = None,
+               indexed: Dict[str, Dict[str, str]] = None) -> RecordStore:
+    """Build a store from "sqlite[:path]" or "memory[:max_records]" """
+    backend, _, arg = (spec or "sqlite").partition(":")
+    if backend == "sqlite":
+        return SQLiteStore(Path(arg) if arg else default_path, searchable, indexed)
+    if backend == "memory":
+        return MemoryStore(int(arg) if arg else DEFAULT_MEMORY_LIMIT, searchable, indexed)
+    raise ValueError(f"Unknown storage backend: {spec}")
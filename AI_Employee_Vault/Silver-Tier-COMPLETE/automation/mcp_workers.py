@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+MCP Workers for Silver Tier AI Employee System
+Serves an MCP aiohttp app from one process or from N pre-forked workers.
+
+With --workers N > 1 a supervisor opens N listening sockets on the same
+port with SO_REUSEPORT, so the kernel spreads incoming connections across
+them, and forks one worker per socket. Workers share no memory; they
+share state through the storage backend, so this needs the SQLite store
+(MCP_STORAGE=memory would give each worker its own data).
+
+Supervisor signals:
+- SIGHUP: rolling restart. Each worker is replaced in turn: the new one
+  starts accepting on the same socket before the old one stops, so
+  connections waiting in the socket's queue are not dropped, and the old
+  one finishes its in-flight requests (up to GRACEFUL_TIMEOUT) before
+  exiting. Workers are forked, not re-executed, so code changes need a
+  full restart.
+- SIGTERM / SIGINT: stop every worker gracefully, then exit.
+A worker that dies unexpectedly is replaced after RESPAWN_DELAY.
+
+Every worker builds the same app. Work that must survive a worker (the
+email outbox) is owned per worker in the store, so live workers can take
+over what a stopped or crashed one left, whichever generation they are.
+"""
+
+import os
+import sys
+import time
+import select
+import signal
+import socket
+import asyncio
+import logging
+import traceback
+from typing import Callable, Dict, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+GRACEFUL_TIMEOUT = 30  # Seconds a stopping worker may spend on in-flight requests
+READY_TIMEOUT = 30  # Seconds a new worker gets to start listening
+KEEPALIVE_DRAIN = 1.0  # Seconds a retiring worker keeps answering on open connections
+LISTEN_BACKLOG = 128
+RESPAWN_DELAY = 1.0  # Pause before replacing a crashed worker
+HAS_REUSEPORT = hasattr(socket, "SO_REUSEPORT") and hasattr(os, "fork")
+
+AppFactory = Callable[[], web.Application]  # Builds a worker's app
+
+
+def add_server_arguments(parser, default_port: int):
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=default_port)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes sharing the port (SO_REUSEPORT)')
+
+
+def listen_socket(host: str, port: int) -> socket.socket:
+    """A listening TCP socket that other processes can bind alongside"""
+    family, kind, proto, _, address = socket.getaddrinfo(
+        host, port, type=socket.SOCK_STREAM, flags=socket.AI_PASSIVE)[0]
+    sock = socket.socket(family, kind, proto)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(address)
+    sock.listen(LISTEN_BACKLOG)
+    return sock
+
+
+async def run_app(app: web.Application, host: str, port: int, sock: socket.socket = None,
+                  on_ready: Callable[[], None] = None):
+    """Serve `app` until SIGTERM/SIGINT, then drain and clean up
+
+    With `sock` (a worker's share of the port) the app accepts on that
+    socket instead of binding host:port itself.
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    @web.middleware
+    async def close_when_stopping(request, handler):
+        response = await handler(request)
+        if stop.is_set():
+            # Before the response is prepared, so it carries "Connection: close"
+            response.force_close()
+        return response
+
+    app.middlewares.append(close_when_stopping)
+    runner = web.AppRunner(app, shutdown_timeout=GRACEFUL_TIMEOUT)
+    await runner.setup()
+    try:
+        site = web.SockSite(runner, sock) if sock else web.TCPSite(runner, host, port)
+        await site.start()
+        logger.info(f"Listening on http://{host}:{port} (pid {os.getpid()})")
+        if on_ready:
+            on_ready()
+        await stop.wait()
+        logger.info(f"Shutting down (pid {os.getpid()})...")
+        if sock:
+            # Stop accepting; the supervisor and our replacement keep the
+            # socket open. Closing idle keep-alive connections outright races
+            # with clients sending on them, so first let busy ones finish
+            # with "Connection: close"
+            await site.stop()
+            await asyncio.sleep(KEEPALIVE_DRAIN)
+    finally:
+        # Stops accepting, waits for in-flight requests, then runs on_cleanup hooks
+        await runner.cleanup()
+
+
+class Supervisor:
+    """Pre-forks `workers` processes serving app_factory's app on one port"""
+
+    def __init__(self, app_factory: AppFactory, host: str, port: int, workers: int):
+        self.app_factory = app_factory
+        self.host = host
+        self.port = port
+        self.size = workers
+        self.sockets: Dict[int, socket.socket] = {}  # slot -> its listening socket
+        self.slots: Dict[int, int] = {}  # slot -> pid of the worker serving it
+        self.retiring = set()  # pids told to stop; reaped without respawn
+        self._restart = False
+        self._stopping = False
+
+    def _spawn(self, slot: int) -> Optional[int]:
+        """Fork a worker; returns its pid once it listens, None if it failed to start"""
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            self._worker(slot, ready_write)
+
+        os.close(ready_write)
+        try:
+            readable, _, _ = select.select([ready_read], [], [], READY_TIMEOUT)
+            started = bool(readable) and os.read(ready_read, 1) == b"1"
+        finally:
+            os.close(ready_read)
+        if not started:
+            logger.error(f"Worker {slot} (pid {pid}) did not start")
+            self._kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+        self.slots[slot] = pid
+        return pid
+
+    def _worker(self, slot: int, ready_write: int):
+        """Body of a forked worker; never returns"""
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        for other, sock in self.sockets.items():
+            if other != slot:
+                sock.close()
+        code = 0
+        try:
+            def ready():
+                os.write(ready_write, b"1")
+                os.close(ready_write)
+
+            asyncio.run(run_app(self.app_factory(), self.host, self.port,
+                                sock=self.sockets[slot], on_ready=ready))
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    @staticmethod
+    def _kill(pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        """Collect exited workers; replace those that weren't told to stop"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            slot = next((s for s, p in self.slots.items() if p == pid), None)
+            if slot is None:
+                continue
+            del self.slots[slot]
+            if not self._stopping:
+                logger.warning(f"Worker {slot} (pid {pid}) exited with status {status}; restarting")
+                time.sleep(RESPAWN_DELAY)
+                self._spawn(slot)
+
+    def _rolling_restart(self):
+        logger.info("Rolling restart of all workers")
+        for slot in range(self.size):
+            old = self.slots.get(slot)
+            if self._spawn(slot) is None:
+                if old is not None:
+                    self.slots[slot] = old  # Keep the old worker serving
+                continue
+            if old is not None:
+                self.retiring.add(old)
+                self._kill(old, signal.SIGTERM)
+
+    def run(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_restart", True))
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *_: setattr(self, "_stopping", True))
+
+        for slot in range(self.size):
+            self.sockets[slot] = listen_socket(self.host, self.port)
+        for slot in range(self.size):
+            if self._spawn(slot) is None:
+                self._stopping = True
+                break
+        if not self._stopping:
+            logger.info(f"{len(self.slots)} workers serving http://{self.host}:{self.port} "
+                        f"(supervisor pid {os.getpid()})")
+
+        while not self._stopping:
+            time.sleep(0.2)
+            self._reap()
+            if self._restart:
+                self._restart = False
+                self._rolling_restart()
+
+        for pid in [*self.slots.values(), *self.retiring]:
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+        for pid in [*self.slots.values(), *self.retiring]:
+            while time.monotonic() < deadline:
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0]:
+                        break
+                except ChildProcessError:
+                    break
+                time.sleep(0.1)
+            else:
+                logger.warning(f"Worker pid {pid} did not stop in time; killing it")
+                self._kill(pid, signal.SIGKILL)
+        for sock in self.sockets.values():
+            sock.close()
+        logger.info("All workers stopped")
+
+
+def serve(app_factory: AppFactory, host: str, port: int, workers: int = 1):
+    """Run in this process (workers=1) or under a pre-fork Supervisor"""
+    if workers > 1 and not HAS_REUSEPORT:
+        logger.warning("SO_REUSEPORT/fork unavailable on this platform; using one worker")
+        workers = 1
+    if workers > 1 and os.environ.get('MCP_STORAGE', 'sqlite').startswith('memory'):
+        raise SystemExit("MCP_STORAGE=memory keeps data per process; use sqlite with --workers")
+
+    if workers <= 1:
+        asyncio.run(run_app(app_factory(), host, port))
+    else:
+        Supervisor(app_factory, host, port, workers).run()
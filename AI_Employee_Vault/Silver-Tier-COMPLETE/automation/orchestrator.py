@@ -5,13 +5,27 @@ Coordinates between watchers, Claude reasoning, approval workflow, and MCP serve
 """
 
 import os
+import errno
 import time
 import shutil
-import json
 from datetime import datetime
 from pathlib import Path
 import subprocess
 import threading
+import queue
+import heapq
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from vault_watcher import start_watcher
+from approved_actions import email_request, linkedin_request, request_key, task_identity
+from audit_log import get_audit_log, reset_shared_logs
+from dashboard import DashboardState, DashboardEvents, directory_mtimes
+from task_classifier import classify_task
+from frontmatter import FrontmatterIndex
+from mcp_client import MCPError, MCPServices
+from task_journal import TaskJournal
 
 BASE_PATH = Path(__file__).parent.parent  # Go up one level to the main directory
 NEEDS_ACTION_DIR = BASE_PATH / "Needs_Action"
@@ -21,106 +35,151 @@ APPROVED_DIR = BASE_PATH / "Approved"
 DONE_DIR = BASE_PATH / "Done"
 REJECTED_DIR = BASE_PATH / "Rejected"
 LOGS_DIR = BASE_PATH / "Logs"
+PROCESSING_DIR = BASE_PATH / "Processing"  # Files claimed by a pool worker
 DASHBOARD_FILE = BASE_PATH / "Dashboard.md"
+JOURNAL_DIR = BASE_PATH / ".state" / "journal"  # Write-ahead log of task transitions
+
+STAGE_DIRS = {"needs_action": NEEDS_ACTION_DIR, "approved": APPROVED_DIR}
+EXECUTION_MODES = ("serial", "thread", "process")
+PRIORITY_RANK = {"urgent": 0, "critical": 0, "high": 0, "medium": 1, "normal": 1, "low": 2}
+RETRY_DELAY = 5  # Seconds before a task that failed is queued again, doubled per failure
+RETRY_MAX_DELAY = 300
+RETRY_LIMIT = 5  # Failures before a task is left for a human
 
 class Orchestrator:
-    def __init__(self):
+    def __init__(self, watcher_backend="auto", poll_interval=10, execution_mode="serial",
+                 max_workers=None, max_in_flight=None, dashboard=None, mcp_settings=None):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+
         self.running = True
+        self.watcher_backend = watcher_backend  # "auto", "inotify" or "poll"
+        self.poll_interval = poll_interval
+        self.execution_mode = execution_mode  # "serial", "thread" or "process"
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.max_workers * 2  # Per stage
+        self.executor = None
+        self.needs_action_queue = queue.Queue()
+        self.approved_queue = queue.Queue()
+        self.watcher = None
+        self.audit_log = get_audit_log(LOGS_DIR)
+        self.journal = TaskJournal(JOURNAL_DIR)
+        self.frontmatter = FrontmatterIndex()
+        self.mcp_settings = mcp_settings or {}  # MCPServices keyword arguments
+        self.mcp = None  # Connected on first approved email/post
+        self._mcp_lock = threading.Lock()
+        self._retry_counts = {}  # path -> failures so far, for tasks waiting to be retried
+        self._retry_lock = threading.Lock()
+        self.dashboard = dashboard or DashboardState(
+            {
+                "Needs_Action": NEEDS_ACTION_DIR,
+                "Plans": PLANS_DIR,
+                "Pending_Approval": PENDING_APPROVAL_DIR,
+                "Approved": APPROVED_DIR,
+                "Done": DONE_DIR,
+                "Logs": LOGS_DIR,
+            },
+            done_dir=DONE_DIR,
+            logs_dir=LOGS_DIR,
+            dashboard_file=DASHBOARD_FILE,
+            urgent_approvals=self.urgent_approvals,
+        )
+
+    def start_watcher(self):
+        """Start the vault watcher that feeds the Needs_Action/Approved queues"""
+        self.watcher = start_watcher(
+            {
+                NEEDS_ACTION_DIR: self.needs_action_queue,
+                APPROVED_DIR: self.approved_queue,
+            },
+            backend=self.watcher_backend,
+            interval=self.poll_interval,
+        )
+        print(f"Watching vault with {type(self.watcher).__name__}")
+
+    def _next_event(self, events):
+        """Block until a queued file still exists, or return None on timeout"""
+        try:
+            path = events.get(timeout=1)
+        except queue.Empty:
+            return None
+        # Duplicate events (initial scan + notify) are dropped once the first one moved the file
+        return path if path.exists() else None
+
+    def _retry_later(self, events, path, error):
+        """Queue a task that failed (and is still in place) again after a backoff
+
+        The watcher only reports a file once, so without this a task whose
+        processing raised would wait for the next restart. After RETRY_LIMIT
+        failures the task is left where it is and shown on the dashboard.
+        """
+        if not path.exists():
+            return
+        with self._retry_lock:
+            failures = self._retry_counts.get(path, 0) + 1
+            if failures >= RETRY_LIMIT:
+                self._retry_counts.pop(path, None)
+            else:
+                self._retry_counts[path] = failures
+        if failures >= RETRY_LIMIT:
+            print(f"Giving up on {path.name} after {failures} failures")
+            self.update_dashboard_with_failure(path.name, f"gave up after {failures} attempts: {error}")
+            return
+        delay = min(RETRY_DELAY * 2 ** (failures - 1), RETRY_MAX_DELAY)
+        print(f"Retrying {path.name} in {delay:g} s (failure {failures} of {RETRY_LIMIT})")
+        self._requeue_later(events, path, delay)
+
+    @staticmethod
+    def _requeue_later(events, path, delay):
+        """Put a path back on its queue after `delay` seconds"""
+        timer = threading.Timer(delay, events.put, (path,))
+        timer.daemon = True
+        timer.start()
+
+    def _retry_done(self, path):
+        with self._retry_lock:
+            self._retry_counts.pop(path, None)
 
     def log_action(self, action_type, target, approval_status, result):
         """Create structured log entry"""
-        timestamp = datetime.now().isoformat()
-        log_entry = {
-            "timestamp": timestamp,
-            "action_type": action_type,
-            "target": target,
-            "approval_status": approval_status,
-            "result": result
-        }
-
-        log_date = datetime.now().strftime("%Y-%m-%d")
-        log_file = LOGS_DIR / f"{log_date}.json"
-
-        # Read existing logs or create new list
-        logs = []
-        if log_file.exists():
-            with open(log_file, 'r') as f:
-                try:
-                    logs = json.load(f)
-                except json.JSONDecodeError:
-                    logs = []
-
-        logs.append(log_entry)
-
-        with open(log_file, 'w') as f:
-            json.dump(logs, f, indent=2)
+        return self.audit_log.log_action(action_type, target, approval_status, result)
 
     def update_dashboard(self):
-        """Update Dashboard.md with current system status"""
-        pending_tasks = len(list(NEEDS_ACTION_DIR.glob("*.md")))
-        pending_approval = len(list(PENDING_APPROVAL_DIR.glob("*.md")))
-        approved_tasks = len(list(APPROVED_DIR.glob("*.md")))
-        completed_today = len([f for f in DONE_DIR.glob("*.md")
-                              if f.stat().st_mtime > datetime.now().timestamp() - 86400])
-
-        dashboard_content = f"""# AI Employee Dashboard
-
-## System Status
-- **Last Updated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- **System Status**: {'RUNNING' if self.running else 'STOPPED'}
-
-## Task Metrics
-- **Pending Tasks**: {pending_tasks}
-- **Pending Approval**: {pending_approval}
-- **Approved Tasks**: {approved_tasks}
-- **Completed Today**: {completed_today}
-
-## Recent Activity
-"""
-
-        # Add recent log entries
-        log_files = list(LOGS_DIR.glob("*.json"))
-        if log_files:
-            latest_log = max(log_files, key=lambda x: x.stat().st_mtime)
-            try:
-                with open(latest_log, 'r') as f:
-                    logs = json.load(f)
-                    recent_logs = logs[-5:] if len(logs) >= 5 else logs  # Last 5 entries
-
-                    for log in recent_logs:
-                        dashboard_content += f"- {log['timestamp']}: {log['action_type']} ({log['result']})\n"
-            except (json.JSONDecodeError, KeyError):
-                dashboard_content += "- No recent activity logs available\n"
-        else:
-            dashboard_content += "- No recent activity logs available\n"
-
-        dashboard_content += f"""
-## Directories Status
-- Needs_Action: {pending_tasks} items
-- Plans: {len(list(PLANS_DIR.glob('*.md')))} items
-- Pending_Approval: {pending_approval} items
-- Approved: {approved_tasks} items
-- Done: {len(list(DONE_DIR.glob('*.md')))} items
-- Logs: {len(list(LOGS_DIR.glob('*')))} items
-
-*Dashboard automatically updated by Orchestrator*
-"""
-
-        with open(DASHBOARD_FILE, 'w') as f:
-            f.write(dashboard_content)
-
-    def trigger_claude(self, task_file):
+        """Update Dashboard.md with current system status (only rewritten when it changes)"""
+        self.audit_log.flush()
+        self.dashboard.render(self.running)
+
+    def _move(self, src_path, dst_path):
+        """Move a vault file and keep the dashboard counters in step"""
+        src_dir, dst_dir = Path(src_path).parent, Path(dst_path).parent
+        before = directory_mtimes(src_dir, dst_dir)
+        shutil.move(src_path, dst_path)
+        self.dashboard.record_move(src_dir, dst_dir, before)
+
+    def trigger_claude(self, task_file, task_path=None):
         """Trigger Claude to process a task file"""
         print(f"Triggering Claude to process: {task_file}")
 
         # Create a plan file based on the task
-        task_path = NEEDS_ACTION_DIR / task_file
+        task_path = task_path or NEEDS_ACTION_DIR / task_file
         plan_filename = f"PLAN_{task_file.replace('.md', '')}.md"
         plan_path = PLANS_DIR / plan_filename
 
         with open(task_path, 'r') as f:
             task_content = f.read()
 
+        # Check if this requires approval (keyword rules in task_classifier)
+        classification = classify_task(task_content)
+        approval_filename = f"ACTION_{task_file.replace('.md', '')}.md"
+        approval_path = PENDING_APPROVAL_DIR / approval_filename
+
+        # Journal the transition first; a crash before its end is rolled back on restart
+        source_path = NEEDS_ACTION_DIR / task_file
+        outputs = [plan_path, approval_path] if classification.requires_approval else [plan_path]
+        txn = self.journal.begin(task_file, "needs_action", source_path,
+                                 claimed=task_path if task_path != source_path else None,
+                                 outputs=outputs)
+
         # Create a basic plan structure (CLAUDE.md compliant format)
         plan_content = f"""---
 created: {datetime.now().strftime('%Y-%m-%d')}
@@ -141,29 +200,17 @@ Process task: {task_file}
 - [ ] Submit for approval if needed
 """
 
+        before = directory_mtimes(PLANS_DIR)
         with open(plan_path, 'w') as f:
             f.write(plan_content)
+        self.dashboard.record_created(PLANS_DIR, before)
 
-        # Check if this requires approval (basic heuristic)
-        requires_approval = any(word in task_content.lower() for word in ['email', 'send', 'payment', 'post', 'linkedin'])
-
-        if requires_approval:
-            # Create proper approval file (CLAUDE.md compliant format)
-            approval_filename = f"ACTION_{task_file.replace('.md', '')}.md"
-            approval_path = PENDING_APPROVAL_DIR / approval_filename
-            
+        if classification.requires_approval:
             # Determine action type and priority
-            if 'email' in task_content.lower():
-                action_type = 'send_email'
-            elif 'linkedin' in task_content.lower() or 'post' in task_content.lower():
-                action_type = 'linkedin_post'
-            elif 'payment' in task_content.lower():
-                action_type = 'payment'
-            else:
-                action_type = 'general_action'
-            
-            priority = 'high' if any(word in task_content.lower() for word in ['urgent', 'asap', 'critical']) else 'medium'
+            action_type = classification.action_type
+            priority = classification.priority
 
+            # Create proper approval file (CLAUDE.md compliant format)
             approval_content = f"""---
 type: approval_request
 action: {action_type}
@@ -185,64 +232,262 @@ Task requires human approval before execution per Silver Tier HITL policy.
 [HUMAN: Move this file to /Approved/ to execute, or /Rejected/ to cancel]
 """
             
+            before = directory_mtimes(PENDING_APPROVAL_DIR)
             with open(approval_path, 'w') as f:
                 f.write(approval_content)
+            self.dashboard.record_created(PENDING_APPROVAL_DIR, before)
             
             # Move original task to Done (approval file tracks the action)
             done_path = DONE_DIR / task_file
-            shutil.move(task_path, done_path)
+            self._move(task_path, done_path)
+
+            self.journal.end(txn, "pending_approval")
 
             # Log the action
             self.log_action("task_processing", str(task_file), "requires_approval", "moved_to_pending")
         else:
             # Move directly to done (for non-sensitive tasks)
             done_path = DONE_DIR / task_file
-            shutil.move(task_path, done_path)
+            self._move(task_path, done_path)
+
+            self.journal.end(txn, "done")
 
             # Log the action
             self.log_action("task_processing", str(task_file), "auto_approved", "completed")
 
     def monitor_needs_action(self):
-        """Monitor Needs_Action directory for new files"""
+        """Process files queued by the watcher for the Needs_Action directory"""
+        if self.executor is not None:
+            return self._dispatch("needs_action", self.needs_action_queue)
+
         while self.running:
             try:
-                task_files = list(NEEDS_ACTION_DIR.glob("*.md"))
-
-                for task_file in task_files:
-                    try:
-                        self.trigger_claude(task_file.name)
-                    except Exception as e:
-                        print(f"Error processing {task_file}: {e}")
+                task_file = self._next_event(self.needs_action_queue)
+                if task_file is None:
+                    continue
 
-                time.sleep(10)  # Check every 10 seconds
+                try:
+                    self.trigger_claude(task_file.name)
+                    self._retry_done(task_file)
+                except Exception as e:
+                    print(f"Error processing {task_file}: {e}")
+                    self._retry_later(self.needs_action_queue, task_file, e)
             except Exception as e:
                 print(f"Error monitoring Needs_Action: {e}")
                 time.sleep(10)
 
     def monitor_approved(self):
-        """Monitor Approved directory for files to process with MCP servers"""
+        """Process files queued by the watcher for the Approved directory"""
+        if self.executor is not None:
+            return self._dispatch("approved", self.approved_queue)
+
         while self.running:
             try:
-                approved_files = list(APPROVED_DIR.glob("*.md"))
+                approved_file = self._next_event(self.approved_queue)
+                if approved_file is None:
+                    continue
 
-                for approved_file in approved_files:
-                    try:
-                        self.execute_approved_task(approved_file.name)
-                    except Exception as e:
-                        print(f"Error executing {approved_file}: {e}")
-
-                time.sleep(10)  # Check every 10 seconds
+                try:
+                    self.execute_approved_task(approved_file.name)
+                    self._retry_done(approved_file)
+                except Exception as e:
+                    print(f"Error executing {approved_file}: {e}")
+                    # Usually moved to Needs_Action as _FAILED; retried only if still here
+                    self._retry_later(self.approved_queue, approved_file, e)
             except Exception as e:
                 print(f"Error monitoring Approved: {e}")
                 time.sleep(10)
 
-    def execute_approved_task(self, filename):
+    def start_pool(self):
+        """Create the worker pool for thread/process execution modes"""
+        if self.execution_mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix="orchestrator-worker")
+        elif self.execution_mode == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                initializer=_process_worker_init,
+                                                initargs=(self.mcp_settings,))
+        if self.executor is not None:
+            print(f"Processing tasks with {self.max_workers} {self.execution_mode} workers "
+                  f"(max {self.max_in_flight} in flight per stage)")
+
+    def recover_transitions(self):
+        """Resolve transitions a crashed run began but did not end, from the journal alone
+
+        A task that already reached its destination is left there. Any other
+        goes back to its source directory, minus the files the transition
+        had written, so the watcher's initial scan runs it again.
+        """
+        unfinished = self.journal.unfinished()
+        for record in unfinished:
+            src = Path(record["src"])
+            claimed = Path(record["claimed"]) if record["claimed"] else None
+            current = claimed if claimed is not None and claimed.exists() else src
+            if not current.exists():
+                continue  # Moved on before the crash; only its end record was lost
+            for output in record["outputs"]:
+                Path(output).unlink(missing_ok=True)
+            if current != src:
+                os.rename(current, src)
+            print(f"Rolled back unfinished {record['stage']} transition: {record['task']}")
+        self.journal.discard_recovered()
+        return len(unfinished)
+
+    def recover_claims(self):
+        """Return files left in Processing/ by a crashed run to their source directory"""
+        for stage in STAGE_DIRS:
+            claim_dir = PROCESSING_DIR / stage
+            if not claim_dir.exists():
+                continue
+            for claimed in claim_dir.glob("*.md"):
+                if self._unclaim(claimed, stage) is not None:
+                    print(f"Recovered unfinished task: {claimed.name}")
+
+    def _unclaim(self, claimed, stage):
+        """Move a claimed file back to its stage directory; returns its path there
+
+        None if the file has already moved on (to Done, or to Needs_Action
+        as _FAILED), or if a new file of the same name has arrived meanwhile;
+        that one is not replaced, and the claim waits for the next restart.
+        """
+        source_dir = STAGE_DIRS[stage]
+        path = source_dir / claimed.name
+        before = directory_mtimes(claimed.parent, source_dir)
+        try:
+            _move_no_replace(claimed, path)
+        except FileNotFoundError:
+            return None
+        except FileExistsError:
+            print(f"Leaving {claimed.name} in {claimed.parent}: "
+                  f"a new file of that name is in {source_dir.name}")
+            return None
+        except OSError as e:
+            print(f"Leaving {claimed.name} in {claimed.parent}: {e}")
+            return None
+        self.dashboard.record_move(claimed.parent, source_dir, before)
+        return path
+
+    def _task_priority(self, path):
+        """Priority rank from a task's frontmatter (lower rank runs first)"""
+        return self._priority_rank(self.frontmatter.get(path) or {})
+
+    @staticmethod
+    def _priority_rank(meta):
+        return PRIORITY_RANK.get(meta.get("priority", "").lower(), PRIORITY_RANK["normal"])
+
+    def urgent_approvals(self):
+        """Names of high/urgent-priority files waiting in Pending_Approval, for the dashboard
+
+        Served from the frontmatter index; only new or changed files are read.
+        """
+        return sorted(path.name for path, meta in self.frontmatter.scan(PENDING_APPROVAL_DIR)
+                      if self._priority_rank(meta) == PRIORITY_RANK["high"])
+
+    def _claim(self, path, stage):
+        """Atomically move a file into Processing/<stage>/; None if someone else got it
+
+        Raises FileExistsError while a file of the same name is still in
+        flight, rather than replacing its claim.
+        """
+        claim_dir = PROCESSING_DIR / stage
+        claimed = claim_dir / path.name
+        before = directory_mtimes(path.parent, claim_dir)
+        try:
+            _move_no_replace(path, claimed)
+        except FileNotFoundError:
+            return None
+        finally:
+            self.frontmatter.invalidate(path)
+        self.dashboard.record_move(path.parent, claim_dir, before)
+        return claimed
+
+    def _dispatch(self, stage, events):
+        """Feed a stage's events to the pool, highest priority first, bounded in flight"""
+        (PROCESSING_DIR / stage).mkdir(parents=True, exist_ok=True)
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        ready = []  # heap of (priority rank, arrival order, path)
+        order = itertools.count()
+        queued = set()
+
+        while self.running:
+            try:
+                # Drain everything that has arrived so a burst is ordered as a whole
+                try:
+                    path = events.get(timeout=0.05 if ready else 1)
+                    while True:
+                        if path not in queued:
+                            queued.add(path)
+                            heapq.heappush(ready, (self._task_priority(path), next(order), path))
+                        path = events.get_nowait()
+                except queue.Empty:
+                    pass
+
+                while ready and slots.acquire(blocking=False):
+                    _, _, path = heapq.heappop(ready)
+                    queued.discard(path)
+                    try:
+                        claimed = self._claim(path, stage)
+                    except FileExistsError:
+                        # A same-named task is in flight. Not a failure: look
+                        # again later, without counting toward RETRY_LIMIT
+                        print(f"Not claiming {path.name} yet: a task with that name is in flight")
+                        self._requeue_later(events, path, RETRY_DELAY)
+                        claimed = None
+                    except OSError as e:
+                        # E.g. EXDEV with Processing/ on another mount: keep the
+                        # task queued instead of dropping it until a restart
+                        print(f"Could not claim {path.name}: {e}")
+                        self._retry_later(events, path, e)
+                        claimed = None
+                    if claimed is None:
+                        slots.release()
+                        continue
+                    self._submit(stage, claimed, slots, events)
+            except Exception as e:
+                print(f"Error dispatching {stage}: {e}")
+                time.sleep(1)
+
+    def _submit(self, stage, claimed, slots, stage_events):
+        if self.execution_mode == "process":
+            future = self.executor.submit(_process_worker_run, stage, str(claimed))
+        else:
+            future = self.executor.submit(self.run_stage, stage, claimed)
+
+        def done(future):
+            slots.release()
+            try:
+                events = future.result()
+                if events is not None:
+                    events.replay(self.dashboard)
+            except Exception as e:
+                print(f"Error processing {claimed.name}: {e}")
+                # Back to its stage directory, then retried like in serial mode
+                path = self._unclaim(claimed, stage)
+                if path is not None:
+                    self._retry_later(stage_events, path, e)
+                return
+            self._retry_done(STAGE_DIRS[stage] / claimed.name)
+
+        future.add_done_callback(done)
+
+    def run_stage(self, stage, claimed):
+        """Run one claimed file through its stage handler"""
+        if stage == "needs_action":
+            self.trigger_claude(claimed.name, task_path=claimed)
+        else:
+            self.execute_approved_task(claimed.name, approved_path=claimed)
+
+    def execute_approved_task(self, filename, approved_path=None):
         """Execute an approved task using MCP server"""
         print(f"Executing approved task: {filename}")
 
-        approved_path = APPROVED_DIR / filename
+        source_path = APPROVED_DIR / filename
+        approved_path = approved_path or source_path
         done_path = DONE_DIR / filename
         failed_path = NEEDS_ACTION_DIR / f"{filename.replace('.md', '_FAILED.md')}"
+        # Re-run on restart if the process dies mid-call; the idempotency key stops a double send
+        txn = self.journal.begin(filename, "approved", source_path,
+                                 claimed=approved_path if approved_path != source_path else None)
 
         try:
             # Simulate MCP server execution based on file type
@@ -250,24 +495,24 @@ Task requires human approval before execution per Silver Tier HITL policy.
                 content = f.read()
 
             # Determine action type and execute accordingly
-            if 'linkedin' in content.lower() or 'post' in content.lower():
-                action_result = self.execute_linkedin_post(content)
-                action_type = "linkedin_post"
-            elif 'email' in content.lower() or 'send' in content.lower():
-                action_result = self.execute_email(content)
-                action_type = "email_send"
+            action_type = classify_task(content).execute_type
+            if action_type == "linkedin_post":
+                action_result = self.execute_linkedin_post(content, filename)
+            elif action_type == "email_send":
+                action_result = self.execute_email(content, filename)
             else:
                 action_result = "completed"
-                action_type = "general_task"
 
             if action_result == "success":
                 # Move to Done directory
-                shutil.move(approved_path, done_path)
+                self._move(approved_path, done_path)
+                self.journal.end(txn, "done")
                 # Log the action
                 self.log_action(action_type, filename, "approved", action_result)
             else:
                 # Handle failure - move to Needs_Action with _FAILED suffix
-                shutil.move(approved_path, failed_path)
+                self._move(approved_path, failed_path)
+                self.journal.end(txn, "failed")
                 self.log_action(action_type, filename, "approved", f"failed: {action_result}")
                 self.update_dashboard_with_failure(filename, action_result)
 
@@ -275,46 +520,62 @@ Task requires human approval before execution per Silver Tier HITL policy.
             # Handle exception - move to Needs_Action with _FAILED suffix
             error_msg = str(e)
             if approved_path.exists():
-                shutil.move(approved_path, failed_path)
+                self._move(approved_path, failed_path)
+                self.journal.end(txn, "failed")
             self.log_action("task_execution", filename, "approved", f"failed: {error_msg}")
             self.update_dashboard_with_failure(filename, error_msg)
             raise  # Re-raise for monitor_approved to catch
 
     def update_dashboard_with_failure(self, filename: str, error: str):
         """Update dashboard with failure notice (CLAUDE.md error handling)"""
-        # Add failure notice to dashboard
-        current_content = DASHBOARD_FILE.read_text() if DASHBOARD_FILE.exists() else "# AI Employee Dashboard\n"
-        
-        failure_notice = f"\n## ⚠️ Failed Tasks\n- **{filename}**: {error}\n"
-        
-        if "⚠️ Failed Tasks" not in current_content:
-            current_content += failure_notice
-            DASHBOARD_FILE.write_text(current_content)
-
-    def execute_linkedin_post(self, content):
-        """Simulate LinkedIn post execution (would connect to MCP server in real implementation)"""
+        self.dashboard.record_failure(filename, error)
+        if isinstance(self.dashboard, DashboardState):
+            self.update_dashboard()
+
+    def mcp_services(self):
+        """The shared MCP client (one pooled session for all workers of this process)"""
+        with self._mcp_lock:
+            if self.mcp is None:
+                self.mcp = MCPServices(**self.mcp_settings)
+            return self.mcp
+
+    def execute_linkedin_post(self, content, filename):
+        """Publish an approved post through the LinkedIn MCP server"""
         print("Executing LinkedIn post...")
         try:
-            # In real implementation, this would call an MCP server to post to LinkedIn
-            # For now, simulate success
+            post = linkedin_request(content)
+            # Keyed on the task, so a re-approved _FAILED task is not published twice
+            key = request_key("post", task_identity(content, filename), post)
+            result = self.mcp_services().publish_post(**post, idempotency_key=key)
+            print(f"LinkedIn post published: {result.get('post_url')}")
             return "success"
-        except Exception as e:
+        except MCPError as e:
             return f"failed: {str(e)}"
 
-    def execute_email(self, content):
-        """Simulate email execution (would connect to MCP server in real implementation)"""
+    def execute_email(self, content, filename):
+        """Send an approved email through the Email MCP server"""
         print("Executing email send...")
         try:
-            # In real implementation, this would call an MCP server to send email
-            # For now, simulate success
+            try:
+                email = email_request(content)
+            except ValueError as e:
+                return f"failed: {e}"
+            key = request_key("email", task_identity(content, filename), email)
+            result = self.mcp_services().send_email(**email, idempotency_key=key)
+            print(f"Email to {email['to']} {result.get('status', 'sent')} (id {result.get('email_id')})")
             return "success"
-        except Exception as e:
+        except MCPError as e:
             return f"failed: {str(e)}"
 
     def run(self):
         """Start the orchestrator"""
         print("Starting AI Employee Orchestrator...")
 
+        self.recover_transitions()
+        self.recover_claims()
+        self.start_pool()
+        self.start_watcher()
+
         # Start monitoring threads
         needs_action_thread = threading.Thread(target=self.monitor_needs_action, daemon=True)
         approved_thread = threading.Thread(target=self.monitor_approved, daemon=True)
@@ -333,7 +594,89 @@ Task requires human approval before execution per Silver Tier HITL policy.
         except KeyboardInterrupt:
             print("\nShutting down orchestrator...")
             self.running = False
+            self.watcher.stop()
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+            if self.mcp is not None:
+                self.mcp.close()
+            self.journal.close()
+
+# Filesystem errors meaning "no hard links here" (FAT/exFAT, some network mounts)
+NO_HARD_LINKS = {errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK}
+
+
+def _move_no_replace(src, dst):
+    """Move a file, raising FileExistsError instead of replacing an existing dst
+
+    link() fails on an existing target where rename() would silently
+    replace it. If src disappears after the link, the move still stands.
+    Where hard links aren't supported, falls back to checking dst and then
+    rename() (not atomic: a file appearing at dst in between is replaced).
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno not in NO_HARD_LINKS:
+            raise
+        if os.path.lexists(dst):
+            raise FileExistsError(errno.EEXIST, "File exists", str(dst)) from e
+        os.rename(src, dst)
+        return
+    try:
+        os.unlink(src)
+    except FileNotFoundError:
+        pass
+
+
+_worker = None
+
+
+def _process_worker_init(mcp_settings):
+    """Build one Orchestrator per pool process; it reports dashboard changes back instead of rendering
+
+    A forked worker starts without the parent's audit log (see
+    audit_log.reset_shared_logs), so the Orchestrator opens its own, with a
+    flusher thread and an unheld lock.
+    """
+    global _worker
+    reset_shared_logs()
+    _worker = Orchestrator(dashboard=DashboardEvents(), mcp_settings=mcp_settings)
+
+
+def _process_worker_run(stage, claimed):
+    _worker.dashboard = DashboardEvents()
+    try:
+        _worker.run_stage(stage, Path(claimed))
+    finally:
+        _worker.audit_log.flush()
+    return _worker.dashboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Silver Tier AI Employee Orchestrator")
+    parser.add_argument("--execution-mode", choices=EXECUTION_MODES, default="serial",
+                        help="Process tasks inline (serial) or on a thread/process pool")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Pool size (default: number of CPUs)")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Maximum claimed tasks per stage (default: 2 x workers)")
+    parser.add_argument("--watcher", choices=("auto", "inotify", "poll"), default="auto",
+                        help="Vault watcher backend")
+    parser.add_argument("--mcp-timeout", type=float, default=10.0,
+                        help="Seconds per MCP server request")
+    parser.add_argument("--mcp-batch-window", type=float, default=0.0,
+                        help="Seconds to gather concurrent approved emails into one batch request")
+    args = parser.parse_args()
+
+    orchestrator = Orchestrator(
+        watcher_backend=args.watcher,
+        execution_mode=args.execution_mode,
+        max_workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        mcp_settings={"timeout": args.mcp_timeout, "batch_window": args.mcp_batch_window},
+    )
+    orchestrator.run()
+
 
 if __name__ == "__main__":
-    orchestrator = Orchestrator()
-    orchestrator.run()
\ No newline at end of file
+    main()
@@ -2,8 +2,13 @@
 """
 Main Runner for Silver Tier AI Employee System
 Starts all required components: orchestrator, MCP servers, and scheduler
+
+By default each MCP server runs as its own process (ports 8000 and 8001).
+With --gateway both are served by a single mcp_gateway.py process on port
+8000, under /email and /linkedin.
 """
 
+import argparse
 import subprocess
 import sys
 import signal
@@ -29,6 +34,12 @@ def start_linkedin_mcp_server():
     linkedin_mcp_process = subprocess.Popen([sys.executable, "linkedin_mcp_server.py"])
     return linkedin_mcp_process
 
+def start_mcp_gateway():
+    """Start the MCP gateway process (email and LinkedIn in one)"""
+    print("Starting MCP Gateway...")
+    gateway_process = subprocess.Popen([sys.executable, "mcp_gateway.py"])
+    return gateway_process
+
 def start_scheduler():
     """Start the scheduler process"""
     print("Starting Scheduler...")
@@ -37,8 +48,18 @@ def start_scheduler():
 
 def main():
     """Main function to start all components"""
+    parser = argparse.ArgumentParser(description="Start the Silver Tier AI Employee System")
+    parser.add_argument("--gateway", action="store_true",
+                        help="serve both MCP servers from one gateway process")
+    args = parser.parse_args()
+
     print("Starting Silver Tier AI Employee System...")
 
+    if args.gateway:
+        # Point the orchestrator's MCP client at the gateway's mounts
+        os.environ.setdefault("EMAIL_MCP_URL", "http://localhost:8000/email")
+        os.environ.setdefault("LINKEDIN_MCP_URL", "http://localhost:8000/linkedin")
+
     processes = []
 
     try:
@@ -47,15 +68,21 @@ def main():
         processes.append(("Orchestrator", orchestrator_proc))
         time.sleep(2)  # Give it time to start
 
-        # Start email MCP server
-        email_mcp_proc = start_email_mcp_server()
-        processes.append(("Email MCP Server", email_mcp_proc))
-        time.sleep(2)  # Give it time to start
-
-        # Start LinkedIn MCP server
-        linkedin_mcp_proc = start_linkedin_mcp_server()
-        processes.append(("LinkedIn MCP Server", linkedin_mcp_proc))
-        time.sleep(2)  # Give it time to start
+        if args.gateway:
+            # Start both MCP servers in one process
+            gateway_proc = start_mcp_gateway()
+            processes.append(("MCP Gateway", gateway_proc))
+            time.sleep(2)  # Give it time to start
+        else:
+            # Start email MCP server
+            email_mcp_proc = start_email_mcp_server()
+            processes.append(("Email MCP Server", email_mcp_proc))
+            time.sleep(2)  # Give it time to start
+
+            # Start LinkedIn MCP server
+            linkedin_mcp_proc = start_linkedin_mcp_server()
+            processes.append(("LinkedIn MCP Server", linkedin_mcp_proc))
+            time.sleep(2)  # Give it time to start
 
         # Start scheduler
         scheduler_proc = start_scheduler()
@@ -85,6 +112,8 @@ def main():
                             proc = start_email_mcp_server()
                         elif name == "LinkedIn MCP Server":
                             proc = start_linkedin_mcp_server()
+                        elif name == "MCP Gateway":
+                            proc = start_mcp_gateway()
                         elif name == "Scheduler":
                             proc = start_scheduler()
 
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Search Index for Silver Tier AI Employee System
+Incremental inverted index behind the Email MCP server's /search-emails.
+
+Records are tokenized once when they are added. A query only touches the
+posting lists of its own terms, so matching, counting and ranking cost
+grows with the number of hits, not with the number of records stored.
+
+Query syntax (terms are ANDed):
+
+    invoice            token in any field
+    inv*               prefix: any token starting with "inv"
+    subject:invoice    token in one field (subject:inv* works too)
+    to:john@acme.com   field value, tokenized like the field itself
+"""
+
+import re
+import math
+import heapq
+import base64
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")  # Runs of letters/digits, like SQLite FTS5's unicode61
+BM25_K1 = 1.2  # Term-frequency saturation: the 5th "invoice" adds little
+PROBE_SOURCES_LIMIT = 8  # Above this many posting lists, merge a term instead of probing
+
+
+class QueryError(ValueError):
+    """Malformed query or pagination cursor"""
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class Term(NamedTuple):
+    fields: Tuple[str, ...]
+    token: str
+    prefix: bool
+
+
+class SearchPage(NamedTuple):
+    hits: List[Tuple[int, float]]  # (doc_id, score), best first
+    total_found: int
+    next_cursor: Optional[str]
+
+
+def parse_query(query: str, fields: Sequence[str]) -> List[Term]:
+    """Split a query into terms; `field:` only narrows to one of `fields`"""
+    fields = tuple(fields)
+    terms = []
+    for part in query.split():
+        term_fields = fields
+        field, sep, value = part.partition(":")
+        if sep and field.lower() in fields:
+            term_fields = (field.lower(),)
+            part = value
+
+        prefix = part.endswith("*")
+        tokens = tokenize(part)
+        for i, token in enumerate(tokens):
+            # `acme.co*` is acme AND co*: only the last token is a prefix
+            terms.append(Term(term_fields, token, prefix and i == len(tokens) - 1))
+    return terms
+
+
+class SearchIndex:
+    """Field-aware inverted index with prefix search and BM25-style ranking"""
+
+    def __init__(self, field_weights: Dict[str, float]):
+        self.field_weights = dict(field_weights)
+        self.fields = tuple(field_weights)
+        # field -> token -> {doc_id: term frequency}
+        self._postings = {field: {} for field in self.fields}
+        # field -> sorted token list, for prefix lookups with bisect
+        self._vocabulary = {field: [] for field in self.fields}
+        self._doc_ids = []  # ascending; IDs are handed out monotonically
+
+    def __len__(self):
+        return len(self._doc_ids)
+
+    # -- indexing ---------------------------------------------------------
+
+    def add(self, doc_id: int, record: Dict):
+        """Index one record; doc_id must be larger than any added before"""
+        if self._doc_ids and doc_id <= self._doc_ids[-1]:
+            raise ValueError(f"doc_id {doc_id} is not increasing")
+
+        for field in self.fields:
+            counts = {}
+            for token in tokenize(record.get(field, "")):
+                counts[token] = counts.get(token, 0) + 1
+
+            postings = self._postings[field]
+            for token, tf in counts.items():
+                docs = postings.get(token)
+                if docs is None:
+                    docs = postings[token] = {}
+                    insort(self._vocabulary[field], token)
+                docs[doc_id] = tf
+
+        self._doc_ids.append(doc_id)
+
+    def remove(self, doc_id: int, record: Dict):
+        """Drop a record that was added with the same field values"""
+        index = bisect_left(self._doc_ids, doc_id)
+        if index == len(self._doc_ids) or self._doc_ids[index] != doc_id:
+            return
+        del self._doc_ids[index]
+
+        for field in self.fields:
+            postings = self._postings[field]
+            for token in set(tokenize(record.get(field, ""))):
+                docs = postings.get(token)
+                if docs is None:
+                    continue
+                docs.pop(doc_id, None)
+                if not docs:
+                    del postings[token]
+                    vocabulary = self._vocabulary[field]
+                    del vocabulary[bisect_left(vocabulary, token)]
+
+    # -- querying ---------------------------------------------------------
+
+    def parse(self, query: str) -> List[Term]:
+        return parse_query(query, self.fields)
+
+    def _tokens(self, field: str, term: Term) -> Iterable[str]:
+        if not term.prefix:
+            return (term.token,) if term.token in self._postings[field] else ()
+        vocabulary = self._vocabulary[field]
+        start = bisect_left(vocabulary, term.token)
+        end = bisect_left(vocabulary, term.token + "\U0010ffff", start)
+        return vocabulary[start:end]
+
+    def _sources(self, term: Term) -> List[Tuple[float, Dict[int, int]]]:
+        """(field weight, posting list) for every token the term covers"""
+        return [
+            (self.field_weights[field], self._postings[field][token])
+            for field in term.fields
+            for token in self._tokens(field, term)
+        ]
+
+    @staticmethod
+    def _merge(sources: List[Tuple[float, Dict[int, int]]]) -> Dict[int, float]:
+        """doc_id -> field-weighted, saturated term frequency"""
+        weighted = {}
+        for weight, docs in sources:
+            for doc_id, tf in docs.items():
+                weighted[doc_id] = weighted.get(doc_id, 0.0) + weight * tf / (tf + BM25_K1)
+        return weighted
+
+    @staticmethod
+    def _weight(sources: List[Tuple[float, Dict[int, int]]], doc_id: int) -> float:
+        weighted = 0.0
+        for weight, docs in sources:
+            tf = docs.get(doc_id)
+            if tf:
+                weighted += weight * tf / (tf + BM25_K1)
+        return weighted
+
+    def search(self, query: str, limit: int = 10, cursor: Optional[str] = None) -> SearchPage:
+        """One page of matches, ranked by relevance (newest first on ties)
+
+        An empty query matches every record, newest first.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        terms = self.parse(query)
+        if not terms:
+            return self._recent(limit, after)
+
+        # Only the rarest term's postings are walked; the other terms are
+        # probed per candidate, so a common token like "com" costs lookups,
+        # not a merge of its whole posting list
+        total_docs = len(self._doc_ids)
+        candidates = sorted(
+            ((sum(len(docs) for _, docs in sources), sources)
+             for sources in map(self._sources, terms)),
+            key=lambda candidate: candidate[0],
+        )
+        if candidates[0][0] == 0:
+            return SearchPage([], 0, None)
+
+        def idf(df):
+            return math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+        rarest = self._merge(candidates[0][1])
+        others = []
+        for size, sources in candidates[1:]:
+            if len(sources) > PROBE_SOURCES_LIMIT:
+                # Broad prefix: one merge beats many probes per candidate
+                merged = self._merge(sources)
+                others.append((idf(len(merged)), [(1.0, merged)], True))
+            else:
+                others.append((idf(min(size, total_docs)), sources, False))
+
+        rarest_idf = idf(len(rarest))
+        scored = []
+        for doc_id, weight in rarest.items():
+            score = rarest_idf * weight
+            for term_idf, sources, merged in others:
+                other = sources[0][1].get(doc_id) if merged else self._weight(sources, doc_id)
+                if not other:
+                    break
+                score += term_idf * other
+            else:
+                scored.append((-score, -doc_id))
+
+        return self._page(scored, len(scored), limit, after)
+
+    def _recent(self, limit: int, after: Optional[Tuple[float, int]]) -> SearchPage:
+        end = len(self._doc_ids)
+        if after is not None:
+            end = bisect_left(self._doc_ids, -after[1])
+        start = max(0, end - limit)
+        hits = [(doc_id, 0.0) for doc_id in reversed(self._doc_ids[start:end])]
+        next_cursor = encode_cursor(-0.0, -hits[-1][0]) if start > 0 and hits else None
+        return SearchPage(hits, len(self._doc_ids), next_cursor)
+
+    @staticmethod
+    def _page(keys: Sequence[Tuple[float, int]], total: int, limit: int,
+              after: Optional[Tuple[float, int]]) -> SearchPage:
+        if after is not None:
+            keys = [key for key in keys if key > after]
+        page = heapq.nsmallest(limit + 1, keys)
+        has_more = len(page) > limit
+        hits = [(-doc_id, -score) for score, doc_id in page[:limit]]
+        next_cursor = encode_cursor(*page[limit - 1]) if has_more else None
+        return SearchPage(hits, total, next_cursor)
+
+
+# A cursor is the sort key of the last hit on its page: (-score, -doc_id).
+# Recency paging (empty query) stays exact while records arrive. Ranked
+# scores move a little as new records change term rarity, so a hit near a
+# page boundary can shift pages if the index changes between requests.
+
+def encode_cursor(neg_score: float, neg_doc_id: int) -> str:
+    raw = f"{float(neg_score)!r}:{int(neg_doc_id)}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        score, doc_id = raw.split(":")
+        return float(score), int(doc_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise QueryError(f"Invalid cursor: {cursor}") from e
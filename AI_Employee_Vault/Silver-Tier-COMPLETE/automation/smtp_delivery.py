@@ -0,0 +1,485 @@
+#!/usr/bin/env python3
+"""
+SMTP Delivery for Silver Tier AI Employee System
+Asynchronous outbound mail queue used by the Email MCP server.
+
+- SMTPClient speaks ESMTP over asyncio streams. When the server advertises
+  PIPELINING (RFC 2920), the envelope of a message (MAIL, RCPT, DATA) is
+  sent as one write, and each message body goes out together with the next
+  message's envelope. A run of N messages then costs about N+1 round trips
+  instead of 4N.
+- DeliveryQueue runs `pool_size` workers. Each owns one persistent
+  connection, drains up to `pipeline_depth` queued messages per round and
+  closes its connection after `idle_timeout` without work.
+- 4xx replies, timeouts and dropped connections are retried with
+  exponential backoff and jitter; 5xx replies fail the message for good.
+- A token bucket per recipient domain caps how fast any one domain
+  receives mail. A message that finds the bucket empty is scheduled for
+  later and doesn't hold up a worker.
+
+Delivery is at-least-once: if a connection drops after the server accepted
+a message but before its reply arrived, that message is sent again.
+"""
+
+import os
+import re
+import ssl
+import time
+import base64
+import random
+import asyncio
+import logging
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+from email.utils import getaddresses
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENDER = "ai-employee@localhost"
+DEFAULT_POOL_SIZE = 4  # Persistent connections (one per worker)
+DEFAULT_PIPELINE_DEPTH = 20  # Messages sent per connection round
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_DOMAIN_RATE = 5.0  # Messages per second per recipient domain
+DEFAULT_DOMAIN_BURST = 20
+BACKOFF_BASE = 1.0  # Seconds before the first retry; doubles per attempt
+BACKOFF_MAX = 300.0
+
+DOT_STUFF = re.compile(rb"^\.", re.MULTILINE)
+
+
+class SMTPReply(NamedTuple):
+    code: int
+    text: str
+
+
+class SMTPError(Exception):
+    """Negative SMTP reply; 4xx codes are transient, 5xx permanent"""
+
+    def __init__(self, code: int, text: str):
+        super().__init__(f"{code} {text}")
+        self.code = code
+        self.text = text
+
+    @property
+    def transient(self) -> bool:
+        return 400 <= self.code < 500
+
+
+class SMTPConnectionError(SMTPError):
+    """Connection could not be used (refused, dropped, timed out)"""
+
+    def __init__(self, text: str):
+        super().__init__(421, text)
+
+
+class OutgoingMessage(NamedTuple):
+    sender: str
+    recipients: List[str]
+    data: bytes  # RFC 5322 message with CRLF line endings
+
+    @property
+    def domain(self) -> str:
+        return self.recipients[0].rpartition("@")[2].lower() if self.recipients else ""
+
+
+def build_message(record: Dict, sender: str) -> OutgoingMessage:
+    """Turn an email record (to/subject/body) into an SMTP-ready message"""
+    message = EmailMessage(policy=SMTP_POLICY)
+    message["From"] = sender
+    message["To"] = record["to"]
+    message["Subject"] = record["subject"]
+    message.set_content(record["body"])
+    recipients = [address for _, address in getaddresses([record["to"]]) if address]
+    return OutgoingMessage(sender, recipients, message.as_bytes())
+
+
+class SMTPClient:
+    """One ESMTP connection; send_messages() pipelines when allowed"""
+
+    def __init__(self, host: str, port: int = 25, username: str = None, password: str = None,
+                 starttls: bool = False, timeout: float = 30, local_hostname: str = "localhost"):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.local_hostname = local_hostname
+        self.extensions = {}
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    @property
+    def pipelining(self) -> bool:
+        return "pipelining" in self.extensions
+
+    async def connect(self):
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise SMTPConnectionError(f"connect to {self.host}:{self.port} failed: {e}") from e
+
+        self._expect(await self._read_reply(), 220)
+        await self._ehlo()
+        if self.starttls:
+            if "starttls" not in self.extensions:
+                raise SMTPError(530, "server does not offer STARTTLS")
+            self._expect(await self._command(b"STARTTLS"), 220)
+            await self._writer.start_tls(ssl.create_default_context(), server_hostname=self.host)
+            await self._ehlo()
+        if self.username and self.password:
+            token = base64.b64encode(f"\0{self.username}\0{self.password}".encode()).decode()
+            self._expect(await self._command(f"AUTH PLAIN {token}".encode()), 235)
+
+    async def _ehlo(self):
+        reply = await self._command(f"EHLO {self.local_hostname}".encode())
+        self._expect(reply, 250)
+        self.extensions = {}
+        for line in reply.text.splitlines()[1:]:
+            keyword, _, params = line.partition(" ")
+            self.extensions[keyword.lower()] = params
+
+    @staticmethod
+    def _expect(reply: SMTPReply, code: int):
+        if reply.code != code:
+            raise SMTPError(reply.code, reply.text)
+
+    async def _read_reply(self) -> SMTPReply:
+        lines = []
+        try:
+            while True:
+                line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+                if not line:
+                    raise SMTPConnectionError("connection closed by server")
+                lines.append(line[4:].decode(errors="replace").rstrip("\r\n"))
+                if line[3:4] != b"-":
+                    return SMTPReply(int(line[:3]), "\n".join(lines))
+        except asyncio.TimeoutError as e:
+            raise SMTPConnectionError("timed out waiting for reply") from e
+        except ValueError as e:
+            raise SMTPConnectionError(f"malformed reply: {lines[-1:]}") from e
+
+    async def _write(self, data: bytes):
+        try:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), self.timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise SMTPConnectionError(f"write failed: {e}") from e
+
+    async def _command(self, line: bytes) -> SMTPReply:
+        await self._write(line + b"\r\n")
+        return await self._read_reply()
+
+    @staticmethod
+    def _envelope(message: OutgoingMessage) -> bytes:
+        lines = [f"MAIL FROM:<{message.sender}>"]
+        lines += [f"RCPT TO:<{recipient}>" for recipient in message.recipients]
+        lines.append("DATA")
+        return "".join(line + "\r\n" for line in lines).encode()
+
+    @staticmethod
+    def _payload(message: OutgoingMessage) -> bytes:
+        data = DOT_STUFF.sub(b"..", message.data)
+        if not data.endswith(b"\r\n"):
+            data += b"\r\n"
+        return data + b".\r\n"
+
+    async def _read_envelope(self, message: OutgoingMessage) -> Optional[SMTPError]:
+        """Read the MAIL/RCPT/DATA replies; None means the server wants the body"""
+        replies = [await self._read_reply() for _ in range(len(message.recipients) + 2)]
+        mail, rcpts, data = replies[0], replies[1:-1], replies[-1]
+        if data.code == 354:
+            return None
+        for reply in [mail, *rcpts, data]:
+            if reply.code >= 400:
+                return SMTPError(reply.code, reply.text)
+        return SMTPError(data.code, data.text)
+
+    async def send_messages(self, messages: List[OutgoingMessage], results: List[Optional[SMTPError]]):
+        """Send messages (each with at least one recipient) in order,
+        appending None (accepted) or an SMTPError per message to `results`
+
+        Raises SMTPConnectionError if the connection fails; `results` then
+        holds the outcomes of the messages finished before that.
+        """
+        pipelined = self.pipelining
+        if pipelined and messages:
+            await self._write(self._envelope(messages[0]))
+
+        for index, message in enumerate(messages):
+            following = messages[index + 1] if pipelined and index + 1 < len(messages) else None
+
+            if pipelined:
+                error = await self._read_envelope(message)
+            else:
+                error = None
+                for line in self._envelope(message).splitlines():
+                    reply = await self._command(line)
+                    if reply.code >= 400 or (line == b"DATA" and reply.code != 354):
+                        error = SMTPError(reply.code, reply.text)
+                        break
+
+            if error is None:
+                # Body of this message, then (pipelined) the next envelope in the same write
+                await self._write(self._payload(message) + (self._envelope(following) if following else b""))
+                final = await self._read_reply()
+                results.append(None if final.code == 250 else SMTPError(final.code, final.text))
+            else:
+                # No DATA phase happened: reset the transaction before the next one
+                await self._write(b"RSET\r\n" + (self._envelope(following) if following else b""))
+                await self._read_reply()
+                results.append(error)
+
+    async def close(self):
+        if self._writer is None:
+            return
+        try:
+            if not self._writer.is_closing():
+                await asyncio.wait_for(self._command(b"QUIT"), 5)
+        except (SMTPError, OSError, asyncio.TimeoutError):
+            pass
+        finally:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token; returns how many seconds until it may be used"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class DeliveryJob:
+    __slots__ = ("job_id", "message", "attempts", "reserved")
+
+    def __init__(self, job_id, message: OutgoingMessage):
+        self.job_id = job_id
+        self.message = message
+        self.attempts = 0
+        self.reserved = False  # Holds a rate-limit token for its next send
+
+
+class DeliveryQueue:
+    """Pooled, pipelined, rate-limited SMTP delivery with retries
+
+    on_result(job_id, status, attempts, error) is called with status
+    "sent", "retrying" or "failed".
+    """
+
+    def __init__(self, client_factory: Callable[[], SMTPClient],
+                 on_result: Callable[[object, str, int, Optional[str]], None] = None,
+                 sender: str = DEFAULT_SENDER, pool_size: int = DEFAULT_POOL_SIZE,
+                 pipeline_depth: int = DEFAULT_PIPELINE_DEPTH,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, domain_rate: float = DEFAULT_DOMAIN_RATE,
+                 domain_burst: int = DEFAULT_DOMAIN_BURST, domain_limits: Dict[str, float] = None,
+                 idle_timeout: float = 60, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        self.client_factory = client_factory
+        self.on_result = on_result
+        self.sender = sender
+        self.pool_size = pool_size
+        self.pipeline_depth = pipeline_depth
+        self.max_attempts = max_attempts
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.domain_limits = domain_limits or {}  # domain -> messages/second override
+        self.idle_timeout = idle_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue = None
+        self._workers = []
+        self._buckets = {}
+        self._timers = set()
+        self._outstanding = 0
+        self._idle = None
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "deferred": 0}
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [asyncio.create_task(self._worker(n)) for n in range(self.pool_size)]
+
+    async def stop(self):
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def wait_idle(self):
+        """Return once every submitted message is sent or has failed for good"""
+        await self._idle.wait()
+
+    def snapshot(self) -> Dict:
+        return dict(self.stats, queued=self._queue.qsize() if self._queue else 0,
+                    outstanding=self._outstanding, workers=len(self._workers))
+
+    # -- submission -------------------------------------------------------
+
+    def submit(self, job_id, record: Dict, attempts: int = 0):
+        """Queue an email record (to/subject/body) for delivery"""
+        self.submit_message(job_id, build_message(record, self.sender), attempts)
+
+    def submit_message(self, job_id, message: OutgoingMessage, attempts: int = 0):
+        """Queue a message; `attempts` counts tries already made (e.g. before a restart)"""
+        self._outstanding += 1
+        self._idle.clear()
+        job = DeliveryJob(job_id, message)
+        job.attempts = attempts
+        if not message.recipients:
+            self._finish(job, "failed", "550 no valid recipient address")
+        else:
+            self._queue.put_nowait(job)
+
+    def _later(self, delay: float, job: DeliveryJob):
+        timer = None
+
+        def fire():
+            self._timers.discard(timer)
+            self._queue.put_nowait(job)
+
+        timer = asyncio.get_running_loop().call_later(delay, fire)
+        self._timers.add(timer)
+
+    def _finish(self, job: DeliveryJob, status: str, error: Optional[str]):
+        self.stats[status] += 1
+        self._outstanding -= 1
+        if self._outstanding == 0:
+            self._idle.set()
+        self._report(job, status, error)
+
+    def _report(self, job: DeliveryJob, status: str, error: Optional[str]):
+        if self.on_result is None:
+            return
+        try:
+            self.on_result(job.job_id, status, job.attempts, error)
+        except Exception as e:
+            logger.error(f"Delivery status callback failed for {job.job_id}: {e}")
+
+    def _retry_or_fail(self, job: DeliveryJob, error: SMTPError):
+        if error.transient and job.attempts < self.max_attempts:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1))
+            delay *= random.uniform(0.5, 1.0)  # Jitter so retries don't arrive in lockstep
+            self.stats["retried"] += 1
+            self._report(job, "retrying", str(error))
+            self._later(delay, job)
+        else:
+            self._finish(job, "failed", str(error))
+
+    # -- rate limiting ----------------------------------------------------
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rate = self.domain_limits.get(domain, self.domain_rate)
+            bucket = self._buckets[domain] = TokenBucket(rate, self.domain_burst)
+        return bucket
+
+    def _admit(self, job: DeliveryJob) -> bool:
+        """True if the job may be sent now; otherwise it is scheduled for later"""
+        if job.reserved or not self.domain_rate:
+            job.reserved = False
+            return True
+        delay = self._bucket(job.message.domain).reserve()
+        if delay <= 0:
+            return True
+        job.reserved = True
+        self.stats["deferred"] += 1
+        self._later(delay, job)
+        return False
+
+    # -- workers ----------------------------------------------------------
+
+    def _take_round(self, first: DeliveryJob) -> List[DeliveryJob]:
+        jobs = [first]
+        while len(jobs) < self.pipeline_depth and not self._queue.empty():
+            jobs.append(self._queue.get_nowait())
+        return [job for job in jobs if self._admit(job)]
+
+    async def _worker(self, number: int):
+        client = None
+        getter = None  # Kept across idle timeouts so a dequeued job is never dropped
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(self._queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=self.idle_timeout if client else None)
+                if not done:
+                    await client.close()
+                    client = None
+                    continue
+                jobs = self._take_round(getter.result())
+                getter = None
+                if not jobs:
+                    continue
+
+                for job in jobs:
+                    job.attempts += 1
+                results = []
+                try:
+                    if client is None or not client.connected:
+                        client = self.client_factory()
+                        await client.connect()
+                    await client.send_messages([job.message for job in jobs], results)
+                except (SMTPError, OSError) as e:
+                    # Connection-level failure: unfinished jobs are retried
+                    logger.warning(f"SMTP worker {number}: {e}")
+                    if client is not None:
+                        await client.close()
+                    client = None
+                    error = e if isinstance(e, SMTPError) and e.transient else SMTPConnectionError(str(e))
+                    results += [error] * (len(jobs) - len(results))
+
+                for job, error in zip(jobs, results):
+                    if error is None:
+                        self._finish(job, "sent", None)
+                    else:
+                        self._retry_or_fail(job, error)
+        finally:
+            if getter is not None:
+                getter.cancel()
+            if client is not None:
+                await client.close()
+
+
+def delivery_from_env(on_result=None) -> Optional[DeliveryQueue]:
+    """DeliveryQueue configured from SMTP_* / EMAIL_* variables, or None"""
+    host = os.environ.get("SMTP_HOST")
+    if not host:
+        return None
+    port = int(os.environ.get("SMTP_PORT", 25))
+    username = os.environ.get("EMAIL_USERNAME")
+    password = os.environ.get("EMAIL_PASSWORD")
+    starttls = os.environ.get("SMTP_STARTTLS", "").lower() in ("1", "true", "yes")
+    return DeliveryQueue(
+        lambda: SMTPClient(host, port, username, password, starttls),
+        on_result,
+        sender=os.environ.get("EMAIL_SENDER") or username or DEFAULT_SENDER,
+        pool_size=int(os.environ.get("SMTP_POOL_SIZE", DEFAULT_POOL_SIZE)),
+        domain_rate=float(os.environ.get("SMTP_DOMAIN_RATE", DEFAULT_DOMAIN_RATE)),
+    )
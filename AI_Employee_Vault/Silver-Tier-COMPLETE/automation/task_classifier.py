@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Task Classifier for Silver Tier AI Employee System
+Rule-table keyword routing shared by trigger_claude and execute_approved_task.
+
+The task text is lower-cased once. Each rule table (action, execution route,
+priority, approval) is then resolved in order, and every keyword is searched
+for at most once per task no matter how many tables mention it. Tables stop
+at their first matching rule, so most tasks never look for every keyword.
+
+A combined regex alternation was measured as well (benchmark_classifier.py)
+and was slower than even the original repeated scans: CPython's substring
+search outruns the regex engine on plain literals, so keywords are checked
+with `in` on the lowered text.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Sequence, Tuple
+
+# Rules are checked in order; the first rule with any matching keyword wins.
+# Keywords match anywhere in the text, case-insensitively.
+DEFAULT_RULES = {
+    # Planning: which approval request to raise for a new task
+    "actions": [
+        ("send_email", ["email"]),
+        ("linkedin_post", ["linkedin", "post"]),
+        ("payment", ["payment"]),
+    ],
+    "default_action": "general_action",
+
+    # Execution: which MCP server handles an approved task
+    "execute_actions": [
+        ("linkedin_post", ["linkedin", "post"]),
+        ("email_send", ["email", "send"]),
+    ],
+    "default_execute_action": "general_task",
+
+    "priorities": [
+        ("high", ["urgent", "asap", "critical"]),
+    ],
+    "default_priority": "medium",
+
+    "approval_keywords": ["email", "send", "payment", "post", "linkedin"],
+}
+
+
+class Classification(NamedTuple):
+    action_type: str
+    execute_type: str
+    priority: str
+    requires_approval: bool
+    keywords: FrozenSet[str]  # Keywords confirmed present while resolving the rules
+
+
+class TaskClassifier:
+    """Compiled rule table; classify() lower-cases the text once"""
+
+    def __init__(self, rules: Dict = None):
+        rules = rules or DEFAULT_RULES
+        self.actions = self._compile(rules["actions"])
+        self.default_action = rules["default_action"]
+        self.execute_actions = self._compile(rules["execute_actions"])
+        self.default_execute_action = rules["default_execute_action"]
+        self.priorities = self._compile(rules["priorities"])
+        self.default_priority = rules["default_priority"]
+        self.approval_keywords = tuple(k.lower() for k in rules["approval_keywords"])
+
+    @staticmethod
+    def _compile(table: Sequence[Tuple[str, Iterable[str]]]) -> List[Tuple[str, Tuple[str, ...]]]:
+        return [(name, tuple(k.lower() for k in keywords)) for name, keywords in table]
+
+    def classify(self, text: str) -> Classification:
+        lowered = text.lower()
+        seen = {}
+
+        def present(keyword):
+            hit = seen.get(keyword)
+            if hit is None:
+                hit = seen[keyword] = keyword in lowered
+            return hit
+
+        def first(table, default):
+            for name, keywords in table:
+                for keyword in keywords:
+                    if present(keyword):
+                        return name
+            return default
+
+        action_type = first(self.actions, self.default_action)
+        execute_type = first(self.execute_actions, self.default_execute_action)
+        priority = first(self.priorities, self.default_priority)
+        requires_approval = any(present(k) for k in self.approval_keywords)
+        return Classification(
+            action_type,
+            execute_type,
+            priority,
+            requires_approval,
+            frozenset(k for k, hit in seen.items() if hit),
+        )
+
+
+_default_classifier = None
+
+
+def get_classifier() -> TaskClassifier:
+    """Return the shared classifier built from DEFAULT_RULES"""
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = TaskClassifier()
+    return _default_classifier
+
+
+def classify_task(text: str) -> Classification:
+    return get_classifier().classify(text)
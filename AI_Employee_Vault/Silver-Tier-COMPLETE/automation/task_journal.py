@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Task Journal for Silver Tier AI Employee System
+Write-ahead journal of task transitions, so a crash mid-transition can be
+undone or finished on restart without rescanning the vault.
+
+A transition (Needs_Action -> Plans -> Pending_Approval/Done, or
+Approved -> Done/Failed) touches several files. Before the first of them
+the orchestrator appends a durable `begin` record naming the task, where it
+was and which files the transition writes; once the task has reached its
+destination it appends an `end` record. On restart only transitions with a
+`begin` and no `end` need looking at, and only their own files.
+
+- Records are JSON lines. `begin` waits for fsync, `end` does not: a lost
+  `end` only means recovery checks a transition that had in fact finished.
+- fsyncs are batched: while one thread syncs, others append behind it and
+  the next sync covers all of them (group commit).
+- Each process writes its own segment file, so pool processes never share
+  one. A segment is replaced once it grows past `max_segment_bytes`; the new
+  one starts with the transitions still open, so the journal on disk stays
+  proportional to recent transitions, not to the vault.
+"""
+
+import os
+import json
+import time
+import itertools
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_SEGMENT_BYTES = 256 * 1024  # About 1000 transitions
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class TaskJournal:
+    """Append-only transition journal for one process, with group-committed fsync"""
+
+    def __init__(self, journal_dir: Path, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.journal_dir = Path(journal_dir)
+        self.max_segment_bytes = max_segment_bytes
+
+        self._lock = threading.Lock()
+        self._synced = threading.Condition(self._lock)
+        self._ids = itertools.count(1)
+        self._prefix = None  # Per process; set on first write (and again after a fork)
+        self._segments = itertools.count(1)
+        self._fd = None
+        self._path = None
+        self._size = 0
+        self._open = {}  # txn -> begin record
+        self._written = 0  # Records handed to the OS
+        self._durable = 0  # Records covered by a finished fsync
+        self._syncing = False
+
+    # -- writing ----------------------------------------------------------
+
+    def begin(self, task: str, stage: str, src: Path, claimed: Optional[Path] = None,
+              outputs: List[Path] = ()) -> str:
+        """Durably record that `task` is about to leave `stage`; returns the transaction ID
+
+        `src` is where the task file sits in its stage directory, `claimed`
+        where a pool worker moved it (Processing/), `outputs` the files the
+        transition creates.
+        """
+        with self._lock:
+            self._ensure_segment()
+            txn = f"{self._prefix}-{next(self._ids)}"
+            record = {
+                "txn": txn,
+                "op": "begin",
+                "task": task,
+                "stage": stage,
+                "src": str(src),
+                "claimed": str(claimed) if claimed else None,
+                "outputs": [str(path) for path in outputs],
+                "time": time.time(),
+            }
+            self._open[txn] = record
+            self._sync_locked(self._append_locked(record))
+        return txn
+
+    def end(self, txn: str, result: str):
+        """Record that a transition reached its destination (`result`: done, failed, ...)"""
+        with self._lock:
+            if self._open.pop(txn, None) is None:
+                return
+            self._append_locked({"txn": txn, "op": "end", "result": result})
+            if self._size > self.max_segment_bytes and not self._syncing:
+                self._roll_locked()
+
+    def _ensure_segment(self):
+        if self._prefix != os.getpid():
+            # New process (or a forked pool worker): never append to the parent's segment
+            self._prefix = os.getpid()
+            self._fd = None
+            self._open = {}
+            self._written = self._durable = 0
+            self._syncing = False
+        if self._fd is None:
+            self.journal_dir.mkdir(parents=True, exist_ok=True)
+            self._fd, self._path = self._new_segment()
+
+    def _new_segment(self):
+        name = f"{self._prefix}-{time.time_ns()}-{next(self._segments)}{SEGMENT_SUFFIX}"
+        path = self.journal_dir / name
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = 0
+        return fd, path
+
+    def _append_locked(self, record: Dict) -> int:
+        data = (json.dumps(record) + "\n").encode()
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+            self._size += written
+        self._written += 1
+        return self._written
+
+    def _sync_locked(self, seq: int):
+        """Wait until record `seq` is on disk, syncing for everyone if nobody else is"""
+        while self._durable < seq:
+            if self._syncing:
+                self._synced.wait()
+                continue
+            self._syncing = True
+            target, fd = self._written, self._fd
+            self._lock.release()
+            try:
+                os.fsync(fd)
+            finally:
+                self._lock.acquire()
+                self._syncing = False
+                self._synced.notify_all()
+            self._durable = max(self._durable, target)
+
+    def _roll_locked(self):
+        """Start a new segment holding only the open transitions, then drop the old one"""
+        old_fd, old_path = self._fd, self._path
+        self._fd, self._path = self._new_segment()
+        for record in self._open.values():
+            self._append_locked(record)
+        os.fsync(self._fd)
+        _fsync_dir(self.journal_dir)
+        self._durable = self._written
+        os.close(old_fd)
+        os.unlink(old_path)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None and self._prefix == os.getpid():
+                os.close(self._fd)
+            self._fd = None
+
+    # -- recovery ---------------------------------------------------------
+
+    def segments(self) -> List[Path]:
+        try:
+            return sorted(self.journal_dir.glob(f"*{SEGMENT_SUFFIX}"))
+        except FileNotFoundError:
+            return []
+
+    def unfinished(self) -> List[Dict]:
+        """`begin` records without an `end`, across the segments of every process"""
+        begun = {}
+        ended = set()
+        for segment in self.segments():
+            if segment == self._path:
+                continue
+            with open(segment, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn final line from a crash
+                    if record.get("op") == "begin":
+                        begun[record["txn"]] = record
+                    elif record.get("op") == "end":
+                        ended.add(record["txn"])
+        return [record for txn, record in begun.items() if txn not in ended]
+
+    def discard_recovered(self):
+        """Delete the segments left by earlier runs once their transitions are resolved"""
+        for segment in self.segments():
+            if segment != self._path:
+                segment.unlink(missing_ok=True)
+        _fsync_dir(self.journal_dir)
+
+
+def _fsync_dir(path: Path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Not supported for directories on every platform
+    finally:
+        os.close(fd)
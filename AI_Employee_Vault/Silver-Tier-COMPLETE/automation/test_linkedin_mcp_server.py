@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the LinkedIn MCP server's /published-posts listing
+Run with: python -m pytest test_linkedin_mcp_server.py (or python test_linkedin_mcp_server.py)
+
+Every test runs against both storage backends.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from aiohttp.test_utils import AioHTTPTestCase
+
+from linkedin_mcp_server import POST_INDEXES, POSTS, LinkedInMCPServer
+from mcp_idempotency import IDEMPOTENCY_INDEXES, IDEMPOTENCY_KEYS
+from mcp_storage import MemoryStore, SQLiteStore
+
+INDEXES = {POSTS: POST_INDEXES, IDEMPOTENCY_KEYS: IDEMPOTENCY_INDEXES}
+
+
+class PublishedPostsTest(AioHTTPTestCase):
+    """Five posts, one a day from 2026-01-01; the even IDs are CONNECTIONS_ONLY"""
+
+    def make_store(self):
+        return MemoryStore(indexed=INDEXES)
+
+    async def get_application(self):
+        self.store = self.make_store()
+        self.addCleanup(self.store.close)
+        self.store.insert_many(POSTS, [{
+            'title': f'Post {day}',
+            'content': 'Hello',
+            'visibility': 'CONNECTIONS_ONLY' if day % 2 == 0 else 'PUBLIC',
+            'timestamp': f'2026-01-0{day}T09:00:00',
+            'status': 'published',
+        } for day in range(1, 6)])
+        return LinkedInMCPServer(self.store).make_app()
+
+    async def list_posts(self, **params):
+        response = await self.client.get('/published-posts', params=params)
+        return response.status, await response.json()
+
+    async def all_pages(self, **params):
+        ids, cursor = [], None
+        while True:
+            page_params = dict(params, cursor=cursor) if cursor else params
+            status, data = await self.list_posts(**page_params)
+            self.assertEqual(status, 200)
+            ids += [post['post_id'] for post in data['posts']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                return ids, data['total_count']
+
+    async def test_cursor_pages_through_every_post_once(self):
+        self.assertEqual(await self.all_pages(limit='2'), ([1, 2, 3, 4, 5], 5))
+
+    async def test_last_page_has_no_cursor(self):
+        status, data = await self.list_posts(limit='5')
+        self.assertEqual(data['returned_count'], 5)
+        self.assertIsNone(data['next_cursor'])
+
+    async def test_desc_order_pages_newest_first(self):
+        self.assertEqual(await self.all_pages(limit='2', order='desc'), ([5, 4, 3, 2, 1], 5))
+
+    async def test_filters_apply_to_pages_and_total(self):
+        self.assertEqual(await self.all_pages(limit='1', visibility='PUBLIC'), ([1, 3, 5], 3))
+        self.assertEqual(await self.all_pages(limit='1', since='2026-01-02', until='2026-01-04'),
+                         ([2, 3], 2))
+        self.assertEqual(await self.all_pages(limit='1', order='desc', visibility='CONNECTIONS_ONLY',
+                                              since='2026-01-03'), ([4], 1))
+
+    async def test_offset_is_rejected(self):
+        status, data = await self.list_posts(offset='2')
+        self.assertEqual(status, 400)
+        self.assertIn('cursor', data['error'])
+
+    async def test_bad_parameters_are_rejected(self):
+        for params in ({'order': 'sideways'}, {'limit': '-1'}, {'cursor': 'abc'},
+                       {'cursor': '-3'}, {'since': 'yesterday'}):
+            with self.subTest(params=params):
+                status, _ = await self.list_posts(**params)
+                self.assertEqual(status, 400)
+
+    async def test_published_post_is_listed_last(self):
+        response = await self.client.post('/publish-post', json={'content': 'New'})
+        post_id = (await response.json())['post_id']
+        ids, total = await self.all_pages(limit='4')
+        self.assertEqual((ids[-1], total), (post_id, 6))
+
+
+class SQLitePublishedPostsTest(PublishedPostsTest):
+
+    def make_store(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return SQLiteStore(Path(tmp.name) / "linkedin.sqlite3", indexed=INDEXES)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for Idempotency-Key handling in the MCP servers
+Run with: python -m pytest test_mcp_idempotency.py (or python test_mcp_idempotency.py)
+"""
+
+import time
+import unittest
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import AioHTTPTestCase
+
+import mcp_idempotency
+from mcp_idempotency import (IDEMPOTENCY_HEADER, IDEMPOTENCY_INDEXES, IDEMPOTENCY_KEYS,
+                             REPLAYED_HEADER, IdempotencyCache, idempotent)
+from mcp_storage import MemoryStore
+
+
+def make_store():
+    return MemoryStore(indexed={IDEMPOTENCY_KEYS: IDEMPOTENCY_INDEXES})
+
+
+class MiddlewareTest(AioHTTPTestCase):
+    """POST /send counts the times it really ran; /fail always answers 500"""
+
+    async def get_application(self):
+        self.calls = 0
+        self.cache = IdempotencyCache(make_store())
+
+        @idempotent
+        async def send(request):
+            self.calls += 1
+            data = await request.json()
+            return web.json_response({'sent': data['to'], 'call': self.calls})
+
+        @idempotent
+        async def fail(request):
+            self.calls += 1
+            return web.json_response({'error': 'SMTP down'}, status=500)
+
+        app = web.Application(middlewares=[self.cache.middleware])
+        app.router.add_post('/send', send)
+        app.router.add_post('/fail', fail)
+        return app
+
+    async def post(self, path, key, body):
+        headers = {IDEMPOTENCY_HEADER: key} if key is not None else {}
+        response = await self.client.post(path, json=body, headers=headers)
+        return response, await response.json()
+
+    async def test_retry_replays_the_first_response(self):
+        first, first_body = await self.post('/send', 'k1', {'to': 'a@example.com'})
+        retry, retry_body = await self.post('/send', 'k1', {'to': 'a@example.com'})
+        self.assertEqual(self.calls, 1)
+        self.assertEqual((retry.status, retry_body), (first.status, first_body))
+        self.assertEqual(retry.headers.get(REPLAYED_HEADER), 'true')
+        self.assertIsNone(first.headers.get(REPLAYED_HEADER))
+
+    async def test_same_body_in_another_key_order_is_a_replay(self):
+        await self.post('/send', 'k1', {'to': 'a@example.com', 'subject': 'Hi'})
+        retry = await self.client.post('/send', data='{"subject": "Hi",  "to": "a@example.com"}',
+                                       headers={IDEMPOTENCY_HEADER: 'k1'})
+        self.assertEqual(retry.headers.get(REPLAYED_HEADER), 'true')
+        self.assertEqual(self.calls, 1)
+
+    async def test_different_body_with_the_same_key_is_rejected(self):
+        await self.post('/send', 'k1', {'to': 'a@example.com'})
+        response, body = await self.post('/send', 'k1', {'to': 'b@example.com'})
+        self.assertEqual(response.status, 422)
+        self.assertIn(IDEMPOTENCY_HEADER, body['error'])
+        self.assertEqual(self.calls, 1)
+
+    async def test_requests_without_a_key_always_run(self):
+        for _ in range(2):
+            await self.post('/send', None, {'to': 'a@example.com'})
+        self.assertEqual(self.calls, 2)
+
+    async def test_server_errors_are_not_stored(self):
+        for _ in range(2):
+            response, _ = await self.post('/fail', 'k1', {})
+            self.assertEqual(response.status, 500)
+        self.assertEqual(self.calls, 2)
+
+    async def test_invalid_key_is_rejected(self):
+        response, _ = await self.post('/send', 'x' * 256, {'to': 'a@example.com'})
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.calls, 0)
+
+    async def test_expired_entry_runs_again(self):
+        await self.post('/send', 'k1', {'to': 'a@example.com'})
+        with mock.patch.object(mcp_idempotency.time, 'time', return_value=time.time() + self.cache.ttl + 1):
+            response, body = await self.post('/send', 'k1', {'to': 'a@example.com'})
+        self.assertEqual((self.calls, body['call']), (2, 2))
+        self.assertIsNone(response.headers.get(REPLAYED_HEADER))
+
+
+class EvictionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = IdempotencyCache(make_store(), capacity=3)
+
+    def save(self, *keys):
+        self.cache.save_many([(key, 'fp', 200, 'application/json', '{}') for key in keys])
+
+    def test_least_recently_used_key_is_evicted(self):
+        self.save('a', 'b', 'c')
+        self.assertIsNotNone(self.cache.lookup('a'))  # 'b' is now the least recently used
+        self.save('d')
+        self.assertIsNone(self.cache.lookup('b'))
+        for key in ('a', 'c', 'd'):
+            self.assertIsNotNone(self.cache.lookup(key), key)
+
+    def test_store_never_holds_more_than_capacity(self):
+        self.save(*'abcdefg')
+        self.assertEqual(self.cache.store.count(IDEMPOTENCY_KEYS), 3)
+        self.assertEqual([key for key in 'abcdefg' if self.cache.lookup(key)], ['e', 'f', 'g'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the search index behind /search-emails
+Run with: python -m pytest test_search_index.py (or python test_search_index.py)
+"""
+
+import unittest
+
+from search_index import QueryError, SearchIndex, Term, decode_cursor, encode_cursor, parse_query
+
+FIELDS = {"subject": 2.0, "body": 1.0, "to": 1.0}
+
+
+class ParseQueryTest(unittest.TestCase):
+
+    def test_terms_cover_every_field(self):
+        self.assertEqual(parse_query("Invoice", FIELDS),
+                         [Term(("subject", "body", "to"), "invoice", False)])
+
+    def test_field_prefix_narrows_to_one_field(self):
+        self.assertEqual(parse_query("Subject:inv*", FIELDS), [Term(("subject",), "inv", True)])
+
+    def test_unknown_field_is_part_of_the_text(self):
+        self.assertEqual([term.token for term in parse_query("cc:john", FIELDS)], ["cc", "john"])
+
+    def test_only_the_last_token_of_a_value_is_a_prefix(self):
+        self.assertEqual(parse_query("to:acme.co*", FIELDS),
+                         [Term(("to",), "acme", False), Term(("to",), "co", True)])
+
+    def test_punctuation_only_query_has_no_terms(self):
+        self.assertEqual(parse_query("  -- ", FIELDS), [])
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex(FIELDS)
+        self.records = {}
+        for doc_id, (subject, body, to) in enumerate([
+            ("Invoice 42", "Please pay the invoice", "john@acme.com"),
+            ("Meeting", "Agenda attached", "mary@acme.com"),
+            ("Invoices overdue", "Second reminder", "john@acme.com"),
+            ("Lunch", "Invoice? No, lunch", "team@example.org"),
+        ], start=1):
+            self.records[doc_id] = {"subject": subject, "body": body, "to": to}
+            self.index.add(doc_id, self.records[doc_id])
+
+    def ids(self, query, **kwargs):
+        return [doc_id for doc_id, _ in self.index.search(query, **kwargs).hits]
+
+    def test_terms_are_anded(self):
+        self.assertEqual(sorted(self.ids("invoice john")), [1])
+
+    def test_prefix_and_field_terms(self):
+        self.assertEqual(sorted(self.ids("subject:invoice*")), [1, 3])
+        self.assertEqual(sorted(self.ids("to:john@acme.com")), [1, 3])
+
+    def test_subject_match_outranks_body_match(self):
+        self.assertEqual(self.ids("lunch"), [4])
+        self.assertEqual(self.ids("invoice")[0], 1)
+
+    def test_ids_must_increase(self):
+        with self.assertRaises(ValueError):
+            self.index.add(2, {"subject": "late"})
+
+    def test_cursor_pages_through_every_hit_once(self):
+        for query in ("", "acme", "inv*"):
+            with self.subTest(query=query):
+                expected = self.ids(query, limit=10)
+                seen, cursor = [], None
+                while True:
+                    page = self.index.search(query, limit=1, cursor=cursor)
+                    self.assertEqual(page.total_found, len(expected))
+                    seen += [doc_id for doc_id, _ in page.hits]
+                    cursor = page.next_cursor
+                    if cursor is None:
+                        break
+                self.assertEqual(seen, expected)
+
+    def test_empty_query_is_newest_first(self):
+        self.assertEqual(self.ids(""), [4, 3, 2, 1])
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(-1.25, -7)), (-1.25, -7))
+        self.assertEqual(decode_cursor(encode_cursor(-0.0, -3)), (-0.0, -3))
+
+    def test_malformed_cursor_is_a_query_error(self):
+        for cursor in ("not-a-cursor", "", "%%%", encode_cursor(-1, -2)[:-2] + "!!"):
+            with self.subTest(cursor=cursor), self.assertRaises(QueryError):
+                decode_cursor(cursor)
+
+    def test_remove_forgets_postings_and_vocabulary(self):
+        self.index.remove(1, self.records[1])
+        self.index.remove(3, self.records[3])
+        self.assertEqual(self.ids("subject:inv*"), [])
+        self.assertEqual(self.ids("invoice"), [4])
+        self.assertEqual(self.ids(""), [4, 2])
+        self.assertEqual(len(self.index), 2)
+        self.assertNotIn("invoices", self.index._vocabulary["subject"])
+
+    def test_remove_unknown_id_is_ignored(self):
+        self.index.remove(99, {"subject": "Invoice"})
+        self.assertEqual(len(self.index), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
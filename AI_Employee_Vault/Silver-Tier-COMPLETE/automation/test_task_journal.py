@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the task transition journal's crash recovery
+Run with: python -m pytest test_task_journal.py (or python test_task_journal.py)
+
+A "crash" is a journal that is closed without ending its transitions,
+optionally with half a record at the end of its segment; a new TaskJournal
+on the same directory plays the restarted orchestrator.
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from task_journal import TaskJournal
+
+
+class RecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.journal_dir = Path(self.tmp.name) / "journal"
+
+    def crashed_run(self, torn_tail=b'{"txn": "1-9", "op": "end", "res'):
+        """Begin three transitions, end one, and stop without closing them"""
+        journal = TaskJournal(self.journal_dir)
+        done = journal.begin("a.md", "Needs_Action", Path("Needs_Action/a.md"))
+        journal.begin("b.md", "Approved", Path("Approved/b.md"),
+                      claimed=Path("Processing/approved/b.md"), outputs=[Path("Done/b.md")])
+        journal.begin("c.md", "Needs_Action", Path("Needs_Action/c.md"))
+        journal.end(done, "done")
+        journal.close()
+        if torn_tail:
+            with open(journal.segments()[-1], "ab") as f:
+                f.write(torn_tail)
+
+    def test_unfinished_skips_a_torn_tail(self):
+        self.crashed_run()
+        unfinished = TaskJournal(self.journal_dir).unfinished()
+        self.assertEqual(sorted(record["task"] for record in unfinished), ["b.md", "c.md"])
+        b = next(record for record in unfinished if record["task"] == "b.md")
+        self.assertEqual((b["claimed"], b["outputs"]),
+                         (str(Path("Processing/approved/b.md")), [str(Path("Done/b.md"))]))
+
+    def test_torn_begin_is_not_reported(self):
+        self.crashed_run(torn_tail=b'{"txn": "1-4", "op": "begin", "task": "d.md", "st')
+        tasks = [record["task"] for record in TaskJournal(self.journal_dir).unfinished()]
+        self.assertNotIn("d.md", tasks)
+
+    def test_discard_recovered_keeps_the_current_segment(self):
+        self.crashed_run()
+        journal = TaskJournal(self.journal_dir)
+        self.assertEqual(len(journal.unfinished()), 2)
+        txn = journal.begin("e.md", "Needs_Action", Path("Needs_Action/e.md"))
+        journal.discard_recovered()
+        self.assertEqual(journal.segments(), [journal._path])
+        journal.close()
+
+        # What the restarted run left open is all the next restart sees
+        self.assertEqual([record["txn"] for record in TaskJournal(self.journal_dir).unfinished()], [txn])
+
+    def test_discard_recovered_before_any_write(self):
+        self.crashed_run()
+        journal = TaskJournal(self.journal_dir)
+        journal.discard_recovered()
+        self.assertEqual(journal.segments(), [])
+        self.assertEqual(journal.unfinished(), [])
+
+    def test_rolled_segment_carries_open_transitions(self):
+        journal = TaskJournal(self.journal_dir, max_segment_bytes=512)
+        kept = journal.begin("keep.md", "Approved", Path("Approved/keep.md"))
+        for i in range(20):
+            journal.end(journal.begin(f"{i}.md", "Needs_Action", Path(f"Needs_Action/{i}.md")), "done")
+        journal.close()
+        self.assertEqual(len(journal.segments()), 1)
+        self.assertEqual([record["txn"] for record in TaskJournal(self.journal_dir).unfinished()], [kept])
+
+
+if __name__ == "__main__":
+    unittest.main()
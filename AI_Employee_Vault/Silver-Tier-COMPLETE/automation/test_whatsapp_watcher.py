@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the WhatsApp watcher
+Run with: python -m pytest test_whatsapp_watcher.py (or python test_whatsapp_watcher.py)
+
+The fixture test drives fixtures/whatsapp_web.html in a headless browser and
+is skipped when Playwright isn't installed.
+"""
+
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import whatsapp_watcher
+from whatsapp_watcher import FIXTURE_URL, HAS_PLAYWRIGHT, WhatsAppWatcher
+
+
+class WatcherTestCase(unittest.TestCase):
+    """Tasks go to a temporary Needs_Action, and nothing to the vault's audit log"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.needs_action = Path(self.tmp.name) / "Needs_Action"
+        self.needs_action.mkdir()
+        for name, value in (("NEEDS_ACTION_DIR", self.needs_action),
+                            ("log_action", lambda *args: None)):
+            patcher = mock.patch.object(whatsapp_watcher, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.watcher = WhatsAppWatcher(url=FIXTURE_URL,
+                                       marks_file=Path(self.tmp.name) / "marks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def tasks(self):
+        return sorted(path.name for path in self.needs_action.glob("*.md"))
+
+
+class CreateTaskTest(WatcherTestCase):
+
+    def test_same_sender_same_second_keeps_both_tasks(self):
+        frozen = mock.Mock(wraps=datetime)
+        frozen.now.return_value = datetime(2026, 1, 2, 9, 30, 0)
+        with mock.patch.object(whatsapp_watcher, "datetime", frozen):
+            for text in ("Please send the invoice", "Urgent: payment is late", "Call me"):
+                self.watcher.create_task_from_message("Client A", text, ["invoice"])
+
+        self.assertEqual(self.tasks(), ["WHATSAPP_Client A_20260102_093000.md",
+                                        "WHATSAPP_Client A_20260102_093000_2.md",
+                                        "WHATSAPP_Client A_20260102_093000_3.md"])
+        texts = [(self.needs_action / name).read_text() for name in self.tasks()]
+        self.assertIn("Please send the invoice", texts[0])
+        self.assertIn("Call me", texts[2])
+
+
+@unittest.skipUnless(HAS_PLAYWRIGHT, "Playwright is not installed")
+class FixturePageTest(WatcherTestCase):
+
+    def tearDown(self):
+        if self.watcher.browser:
+            self.watcher.browser.close()
+        if self.watcher.playwright:
+            self.watcher.playwright.stop()
+        super().tearDown()
+
+    def test_initial_sync_and_observed_message(self):
+        self.watcher.open_whatsapp()
+        tasks = self.tasks()
+        self.assertEqual(len(tasks), 2)
+        self.assertTrue(any(name.startswith("WHATSAPP_Client_A_") for name in tasks))
+        self.assertTrue(any(name.startswith("WHATSAPP_Vendor_B_") for name in tasks))
+
+        self.watcher.page.evaluate("() => fixtureReceive('15550003@c.us', 'Team_Member_C', "
+                                   "'team_c-2', 'ASAP please, the client is waiting')")
+        self.watcher.wait(1)
+        self.assertEqual(self.watcher.drain_changed_chats(), 1)
+        self.assertTrue(any(name.startswith("WHATSAPP_Team_Member_C_") for name in self.tasks()))
+
+        # Nothing new on the page: nothing more to report
+        self.watcher.wait(1)
+        self.assertEqual(self.watcher.drain_changed_chats(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Vault Watcher for Silver Tier AI Employee System
+Turns new markdown files in vault directories into queued events.
+Uses inotify on Linux and falls back to directory polling elsewhere.
+"""
+
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Dict
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+# A file created in place is only reported once its writer closes it, so the
+# orchestrator never reads a half-written task. Renames are atomic already.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+EVENT_HEADER = struct.Struct("iIII")
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    _libc.inotify_init1
+    _libc.inotify_add_watch
+    HAS_INOTIFY = sys.platform.startswith("linux")
+except (OSError, AttributeError):
+    _libc = None
+    HAS_INOTIFY = False
+
+
+class PollingWatcher:
+    """Fallback watcher that scans directories on a fixed interval"""
+
+    def __init__(self, directories: Dict[Path, queue.Queue], interval: float = 10, suffix: str = ".md"):
+        self.directories = directories
+        self.interval = interval
+        self.suffix = suffix
+        self.running = False
+        self._thread = None
+        self._known = {directory: set() for directory in directories}
+
+    def _list(self, directory: Path) -> set:
+        try:
+            with os.scandir(directory) as entries:
+                return {e.name for e in entries if e.name.endswith(self.suffix) and e.is_file()}
+        except FileNotFoundError:
+            return set()
+
+    def scan(self):
+        """Queue files that appeared since the previous scan"""
+        for directory, events in self.directories.items():
+            current = self._list(directory)
+            for name in sorted(current - self._known[directory]):
+                events.put(directory / name)
+            self._known[directory] = current
+
+    def run(self):
+        while self.running:
+            try:
+                self.scan()
+            except Exception as e:
+                print(f"Vault Watcher polling error: {e}")
+            time.sleep(self.interval)
+
+    def start(self):
+        self.running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+
+class InotifyWatcher:
+    """Kernel-notified watcher; idle cost is a single blocked select()"""
+
+    def __init__(self, directories: Dict[Path, queue.Queue], suffix: str = ".md"):
+        if not HAS_INOTIFY:
+            raise OSError("inotify is not available on this platform")
+        self.directories = directories
+        self.suffix = suffix
+        self.running = False
+        self._thread = None
+        self._fd = None
+        self._watches = {}
+
+    def _open(self):
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        for directory in self.directories:
+            wd = _libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(errno, f"{os.strerror(errno)}: {directory}")
+            self._watches[wd] = directory
+        self._fd = fd
+
+    def _initial_scan(self):
+        """Queue files that were already waiting before the watch started"""
+        for directory, events in self.directories.items():
+            for path in sorted(directory.glob(f"*{self.suffix}")):
+                events.put(path)
+
+    def _dispatch(self, buffer: bytes):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Kernel dropped events; re-queue everything so nothing is lost
+                self._initial_scan()
+                continue
+            if mask & IN_IGNORED or not name.endswith(self.suffix):
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is not None:
+                self.directories[directory].put(directory / name)
+
+    def run(self):
+        while self.running:
+            try:
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if not readable:
+                    continue
+                self._dispatch(os.read(self._fd, 64 * 1024))
+            except BlockingIOError:
+                continue
+            except Exception as e:
+                print(f"Vault Watcher inotify error: {e}")
+                time.sleep(1)
+        os.close(self._fd)
+        self._fd = None
+
+    def start(self):
+        self._open()
+        self.running = True
+        self._initial_scan()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+
+def start_watcher(directories: Dict[Path, queue.Queue], backend: str = "auto", interval: float = 10):
+    """Start a watcher for the given directory -> event queue mapping
+
+    backend is "inotify", "poll" or "auto" (inotify when available, polling
+    if inotify cannot be set up, e.g. when the watch limit is exhausted).
+    """
+    for directory in directories:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    if backend not in ("auto", "inotify", "poll"):
+        raise ValueError(f"Unknown watcher backend: {backend}")
+
+    if backend != "poll" and (HAS_INOTIFY or backend == "inotify"):
+        try:
+            watcher = InotifyWatcher(directories)
+            watcher.start()
+            return watcher
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            print(f"Vault Watcher: inotify unavailable ({e}), falling back to polling")
+
+    watcher = PollingWatcher(directories, interval=interval)
+    watcher.start()
+    return watcher
@@ -9,9 +9,16 @@ import os
 import time
 import json
 import re
+import hashlib
+import argparse
+import itertools
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from audit_log import get_audit_log
+from keyword_classifier import get_keyword_classifier
 
 try:
     from playwright.sync_api import sync_playwright
@@ -23,60 +30,173 @@ except ImportError:
 BASE_PATH = Path(__file__).parent.parent  # Go up one level to the main directory
 NEEDS_ACTION_DIR = BASE_PATH / "Needs_Action"
 LOGS_DIR = BASE_PATH / "Logs"
+STATE_DIR = BASE_PATH / ".state"  # Watcher bookkeeping, kept out of the Obsidian view
+WHATSAPP_WEB_URL = 'https://web.whatsapp.com'
+FIXTURE_URL = (Path(__file__).parent / "fixtures" / "whatsapp_web.html").resolve().as_uri()
+
+# Where chats and messages live in the page. WhatsApp Web changes its markup
+# from time to time; these are the only selectors the watcher depends on.
+CHAT_LIST_SELECTOR = '#pane-side'
+CHAT_SELECTOR = '[data-testid="conversation"]'
+MESSAGE_SELECTOR = '[data-id]'  # Rendered messages carry a stable message ID
+MUTATION_DEBOUNCE_MS = 250  # Coalesce a burst of DOM changes into one callback
 # Ensure Logs folder exists
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
+audit_log = get_audit_log(LOGS_DIR)
 
 
 def log_action(action_type: str, target: str, approval_status: str, result: str):
     """Create structured JSON log entry (compliant with CLAUDE.md)"""
-    timestamp = datetime.now().isoformat()
-    log_entry = {
-        "timestamp": timestamp,
-        "action_type": action_type,
-        "target": target,
-        "approval_status": approval_status,
-        "result": result
+    audit_log.log_action(action_type, target, approval_status, result)
+
+
+# Injected before WhatsApp Web's own scripts run. A MutationObserver marks the
+# chats whose subtree changed and, after a short debounce, hands only those
+# chats to Python through the exposed callback; nothing polls the DOM.
+OBSERVER_SCRIPT = """
+(config => {
+  if (window.__aiEmployee) return;
+  const dirty = new Set();
+  let timer = null;
+
+  function chatId(chat) {
+    const titled = chat.querySelector('[title]');
+    return chat.getAttribute('data-chat-id') || (titled ? titled.getAttribute('title') : '');
+  }
+
+  function read(chat) {
+    const titled = chat.querySelector('[title]');
+    const messages = Array.from(chat.querySelectorAll(config.message), m => ({
+      id: m.getAttribute('data-id'),
+      text: m.textContent.trim(),
+    }));
+    if (!messages.length) {
+      // Only a preview is rendered: treat it as a single message without an ID
+      messages.push({id: null, text: chat.textContent.trim()});
+    }
+    return {
+      chat_id: chatId(chat),
+      sender: titled ? titled.getAttribute('title') : chatId(chat),
+      messages: messages,
+    };
+  }
+
+  function snapshot() {
+    return Array.from(document.querySelectorAll(config.chat), read).filter(c => c.chat_id);
+  }
+
+  function flush() {
+    timer = null;
+    const chats = Array.from(dirty).filter(c => c.isConnected).map(read).filter(c => c.chat_id);
+    dirty.clear();
+    if (chats.length) window[config.callback](chats);
+  }
+
+  function onMutations(mutations) {
+    for (const mutation of mutations) {
+      const target = mutation.target.nodeType === Node.ELEMENT_NODE
+        ? mutation.target : mutation.target.parentElement;
+      const chat = target && target.closest(config.chat);
+      if (chat) dirty.add(chat);
+      for (const node of mutation.addedNodes) {
+        if (node.nodeType !== Node.ELEMENT_NODE) continue;
+        if (node.matches(config.chat)) dirty.add(node);
+        node.querySelectorAll(config.chat).forEach(c => dirty.add(c));
+      }
     }
+    if (dirty.size && timer === null) timer = setTimeout(flush, config.debounce);
+  }
+
+  function start() {
+    new MutationObserver(onMutations).observe(document.body, {
+      childList: true, subtree: true, characterData: true,
+    });
+  }
+
+  window.__aiEmployee = {snapshot: snapshot};
+  if (document.body) start();
+  else document.addEventListener('DOMContentLoaded', start);
+})(%s);
+"""
+OBSERVER_CALLBACK = "aiEmployeeChatsChanged"
 
-    log_file = LOGS_DIR / f"{datetime.now().strftime('%Y-%m-%d')}.json"
 
-    logs = []
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                logs = json.load(f)
-            except json.JSONDecodeError:
-                logs = []
+class ChatMarks:
+    """Per-chat high-water marks: the ID of the newest message already handled
 
-    logs.append(log_entry)
+    Stored as one small JSON file, rewritten atomically when marks move, so a
+    restart resumes where the previous run stopped instead of re-reporting
+    every visible chat.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._marks = {}
+        self._dirty = False
+        try:
+            with open(self.path, 'r') as f:
+                self._marks = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            print(f"WhatsApp Watcher: ignoring unreadable chat marks in {self.path}")
+
+    def get(self, chat_id: str) -> Optional[str]:
+        return self._marks.get(chat_id)
+
+    def new_messages(self, chat_id: str, messages: List[Dict]) -> List[Dict]:
+        """Messages (oldest first) that come after the chat's mark
+
+        If the marked message is no longer rendered, everything visible is
+        newer than it.
+        """
+        mark = self._marks.get(chat_id)
+        for index in range(len(messages) - 1, -1, -1):
+            if messages[index]['id'] == mark:
+                return messages[index + 1:]
+        return messages
+
+    def advance(self, chat_id: str, message_id: str):
+        if self._marks.get(chat_id) != message_id:
+            self._marks[chat_id] = message_id
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(self._marks, f)
+        os.replace(tmp_file, self.path)
+        self._dirty = False
 
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=2)
+
+def message_id(message: Dict) -> str:
+    """Rendered message ID, or a content hash for ID-less chat previews"""
+    if message.get('id'):
+        return message['id']
+    return "text:" + hashlib.sha1(message.get('text', '').encode()).hexdigest()[:16]
 
 
 class WhatsAppWatcher:
-    def __init__(self):
+    def __init__(self, url: str = WHATSAPP_WEB_URL, headless: bool = True, marks_file: Path = None):
+        self.url = url
+        self.headless = headless
         self.playwright = None
         self.browser = None
         self.page = None
         self.is_running = False
+        self.keyword_classifier = get_keyword_classifier()
+        self.marks = ChatMarks(marks_file or STATE_DIR / "whatsapp_marks.json")
+
+        # Chats reported by the page's MutationObserver, drained by the watch loop
+        self._changed_lock = threading.Lock()
+        self._changed_chats = {}
 
     def detect_keywords(self, message_text: str) -> List[str]:
         """Detect important keywords in message text"""
-        keywords = []
-        keyword_patterns = {
-            'invoice': r'\binvoice\b|\b(?:pro)?forma.*bill\b|\bquote\b',
-            'urgent': r'\burgent\b|\basap\b|\bimmediate\b|\bcritical\b',
-            'payment': r'\bpaid\b|\bpayment\b|\bpay\b|\bbill\b|\bamount\b|\$\d+',
-            'meeting': r'\bmeet\b|\bcall\b|\bappointment\b|\bschedule\b',
-            'client': r'\bclient\b|\bcustomer\b|\bcontact\b'
-        }
-
-        for keyword, pattern in keyword_patterns.items():
-            if re.search(pattern, message_text, re.IGNORECASE):
-                keywords.append(keyword)
-
-        return keywords
+        return self.keyword_classifier.classify(message_text)
 
     def create_task_from_message(self, sender: str, message: str, keywords: List[str]):
         """Create a task file from WhatsApp message"""
@@ -84,8 +204,17 @@ class WhatsAppWatcher:
         sanitized_sender = re.sub(r'[^\w\s-]', '_', sender)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-        task_filename = f"WHATSAPP_{sanitized_sender}_{timestamp}.md"
-        task_path = NEEDS_ACTION_DIR / task_filename
+        # Created exclusively: a second task from the same sender within the
+        # same second gets a sequence number instead of replacing the first
+        base_name = f"WHATSAPP_{sanitized_sender}_{timestamp}"
+        for sequence in itertools.count(1):
+            task_filename = f"{base_name}.md" if sequence == 1 else f"{base_name}_{sequence}.md"
+            task_path = NEEDS_ACTION_DIR / task_filename
+            try:
+                task_fd = os.open(task_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                break
+            except FileExistsError:
+                continue
 
         # Determine priority based on keywords
         high_priority_keywords = ['urgent', 'invoice', 'payment']
@@ -113,7 +242,7 @@ received_at: {datetime.now().isoformat()}
 Please review this WhatsApp message and take appropriate action.
 """
 
-        with open(task_path, 'w') as f:
+        with os.fdopen(task_fd, 'w') as f:
             f.write(task_content)
 
         log_action("message_detected", task_filename, "auto", "success")
@@ -142,44 +271,106 @@ Please review this WhatsApp message and take appropriate action.
             if keywords:
                 self.create_task_from_message(sender, message, keywords)
 
+    def process_chats(self, chats: List[Dict]) -> int:
+        """Create tasks for chat messages newer than each chat's mark
+
+        `chats` are snapshots from the page: {chat_id, sender, messages}, with
+        messages oldest first. Returns the number of tasks created.
+        """
+        pending = []
+        for chat in chats:
+            messages = [dict(m, id=message_id(m)) for m in chat['messages']]
+            new = self.marks.new_messages(chat['chat_id'], messages)
+            if new:
+                pending.append((chat, new))
+
+        texts = [m['text'] for _, new in pending for m in new]
+        keyword_lists = iter(self.keyword_classifier.classify_many(texts))
+
+        tasks = 0
+        for chat, new in pending:
+            matched = []
+            keywords = []
+            for message in new:
+                found = next(keyword_lists)
+                if found:
+                    matched.append(message['text'])
+                    keywords.extend(k for k in found if k not in keywords)
+            if matched:
+                # One task per chat per batch, so a burst of messages doesn't
+                # produce a pile of near-identical task files
+                self.create_task_from_message(chat.get('sender') or chat['chat_id'],
+                                              "\n\n".join(matched), keywords)
+                tasks += 1
+            self.marks.advance(chat['chat_id'], new[-1]['id'])
+
+        self.marks.save()
+        return tasks
+
+    def _on_chats_changed(self, chats: List[Dict]):
+        """Called from the page's MutationObserver (via expose_function)"""
+        with self._changed_lock:
+            for chat in chats:
+                self._changed_chats[chat['chat_id']] = chat
+
+    def drain_changed_chats(self) -> int:
+        """Process the chats the observer reported since the last drain"""
+        with self._changed_lock:
+            chats = list(self._changed_chats.values())
+            self._changed_chats.clear()
+        return self.process_chats(chats) if chats else 0
+
+    def open_whatsapp(self):
+        """Launch the browser, install the observer hook and catch up once"""
+        self.playwright = sync_playwright().start()
+        self.browser = self.playwright.chromium.launch(headless=self.headless)
+        self.page = self.browser.new_page()
+
+        config = {
+            "chat": CHAT_SELECTOR,
+            "message": MESSAGE_SELECTOR,
+            "callback": OBSERVER_CALLBACK,
+            "debounce": MUTATION_DEBOUNCE_MS,
+        }
+        self.page.expose_function(OBSERVER_CALLBACK, self._on_chats_changed)
+        self.page.add_init_script(OBSERVER_SCRIPT % json.dumps(config))
+
+        self.page.goto(self.url)
+
+        # Wait for user to scan QR code
+        if self.url == WHATSAPP_WEB_URL:
+            print("Please scan the QR code in the browser to log in to WhatsApp Web...")
+        self.page.wait_for_selector(CHAT_LIST_SELECTOR, timeout=60000)  # Wait up to 60 seconds
+
+        # One full read for messages that arrived while the watcher was down;
+        # after this only chats the observer reports are looked at
+        tasks = self.process_chats(self.page.evaluate("() => window.__aiEmployee.snapshot()"))
+        print(f"WhatsApp Watcher: initial sync created {tasks} task(s)")
+
     def scan_whatsapp_messages(self):
-        """Scan WhatsApp Web for new messages with keywords"""
+        """Process WhatsApp Web chats that changed since the last call"""
         if not HAS_PLAYWRIGHT:
             # Use mock implementation if Playwright is not available
             self.scan_messages_mock()
             return
 
         try:
-            if not self.browser:
-                self.playwright = sync_playwright().start()
-                self.browser = self.playwright.chromium.launch(headless=True)
-                self.page = self.browser.new_page()
-
-                # Navigate to WhatsApp Web
-                self.page.goto('https://web.whatsapp.com')
-
-                # Wait for user to scan QR code
-                print("Please scan the QR code in the browser to log in to WhatsApp Web...")
-                self.page.wait_for_selector('#pane-side', timeout=60000)  # Wait up to 60 seconds
-
-            # Find chat messages (this is simplified - real implementation would be more complex)
-            # Look for new messages in the chat list
-            chat_elements = self.page.query_selector_all('[data-testid="conversation"]')
-
-            for element in chat_elements:
-                # Extract chat info (simplified)
-                chat_text = element.text_content()[:200]  # First 200 chars
-                keywords = self.detect_keywords(chat_text)
-
-                if keywords:
-                    # In a real implementation, we'd extract the actual sender and message
-                    # For now, we'll use a placeholder
-                    self.create_task_from_message("Unknown Contact", chat_text, keywords)
+            if not self.page:
+                self.open_whatsapp()
+            self.drain_changed_chats()
 
         except Exception as e:
             print(f"WhatsApp Watcher Error: {e}")
             log_action("whatsapp_scan", "whatsapp_watcher", "auto", f"failed: {str(e)}")
 
+    def wait(self, seconds: float):
+        """Sleep between scans; with a page open, let Playwright deliver
+        observer callbacks while waiting"""
+        if self.page:
+            self.page.wait_for_timeout(seconds * 1000)
+        else:
+            time.sleep(seconds)
+
     def watch(self):
         """Main watch loop"""
         print("WhatsApp Watcher running...")
@@ -191,8 +382,9 @@ Please review this WhatsApp message and take appropriate action.
             try:
                 self.scan_whatsapp_messages()
 
-                # Wait 30 seconds before next scan
-                time.sleep(30)
+                # Observer callbacks are cheap to drain, so check every second
+                # with a page open; the mock keeps the old 30 second cadence
+                self.wait(1 if self.page else 30)
             except KeyboardInterrupt:
                 print("\nWhatsApp Watcher stopped by user")
                 log_action("watcher_stop", "whatsapp_watcher", "auto", "stopped")
@@ -210,5 +402,11 @@ Please review this WhatsApp message and take appropriate action.
 
 
 if __name__ == "__main__":
-    watcher = WhatsAppWatcher()
+    parser = argparse.ArgumentParser(description="Silver Tier WhatsApp Watcher")
+    parser.add_argument("--url", default=WHATSAPP_WEB_URL,
+                        help=f"page to watch; use {FIXTURE_URL} for the offline test fixture")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    args = parser.parse_args()
+
+    watcher = WhatsAppWatcher(url=args.url, headless=not args.headed)
     watcher.watch()